@@ -0,0 +1,278 @@
+"""Answer analytics: a columnar in-memory sink flushed once per game, and an
+offline report of how well each card works.
+
+During a game AnalyticsSink only appends to per-column lists. flush() writes
+everything in one go: to SQLite with executemany() inside one transaction,
+or, for a path ending in .parquet (a directory), to one Parquet file per
+game when pyarrow is installed.
+
+The report computes, per card over every recorded game:
+    difficulty      share of answers that were correct (the classical p-value)
+    discrimination  point-biserial correlation between answering this card
+                    correctly and the player's share correct on their other
+                    cards in the same game
+Cards that nearly everybody gets right or wrong, or whose discrimination is
+low or negative (often a wrong answer key), are flagged for review.
+"""
+import json
+import os
+import sqlite3
+import time
+import uuid
+
+import numpy as np
+
+from rules import TurnEvent
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+DEFAULT_ANALYTICS = os.path.join(os.path.expanduser("~"), ".berachot_game", "analytics.sqlite")
+
+ANSWER_COLUMNS = ("game_id", "turn", "player", "player_name", "card_id", "category", "correct",
+                  "response_ms", "tile")
+TURN_COLUMNS = ("game_id", "turn", "player", "roll", "start", "end")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (game_id TEXT PRIMARY KEY, finished_at REAL, players TEXT,
+                                  winner INTEGER, turns INTEGER);
+CREATE TABLE IF NOT EXISTS answers (game_id TEXT, turn INTEGER, player INTEGER, player_name TEXT,
+                                    card_id INTEGER, category TEXT, correct INTEGER,
+                                    response_ms INTEGER, tile INTEGER);
+CREATE TABLE IF NOT EXISTS turns (game_id TEXT, turn INTEGER, player INTEGER, roll INTEGER,
+                                  start INTEGER, "end" INTEGER);
+CREATE TABLE IF NOT EXISTS latency (game_id TEXT, kind TEXT, name TEXT, count INTEGER,
+                                    p50_ms INTEGER, p95_ms INTEGER, max_ms INTEGER);
+CREATE INDEX IF NOT EXISTS answers_card ON answers (card_id);
+"""
+
+
+class AnalyticsSink:
+    """Collects answer and turn records for one game, column by column."""
+
+    def __init__(self, path=DEFAULT_ANALYTICS, player_names=(), game_id=None):
+        self.path = path
+        self.player_names = list(player_names)
+        self.game_id = game_id or uuid.uuid4().hex
+        self.answers = {column: [] for column in ANSWER_COLUMNS}
+        self.turns = {column: [] for column in TURN_COLUMNS}
+        self._turn_start = None  # (player, roll, start tile) of the turn in progress
+        self._finished = 0       # Answer rows that belong to finished turns
+
+    def record(self, event, state, response_ms=None):
+        """Take what matters from one TurnEvent; state is the engine's GameState."""
+        if event.kind == TurnEvent.ROLL:
+            self._turn_start = (event.player, event["roll"], state.positions[event.player])
+        elif event.kind == TurnEvent.ANSWER:
+            self.add_answer(state, event.player, event["card"], event["category"], event["correct"],
+                            response_ms)
+        elif event.kind in (TurnEvent.NEXT_PLAYER, TurnEvent.WIN) and self._turn_start:
+            player, roll, start = self._turn_start
+            self._turn_start = None
+            row = (self.game_id, state.turns, player, roll, start, state.positions[player])
+            for column, value in zip(TURN_COLUMNS, row):
+                self.turns[column].append(value)
+            self._finished = len(self)
+
+    def add_answer(self, state, player, card, category, correct, response_ms=None):
+        """Record an answer directly, such as a buzz-in answer from a player whose turn it isn't."""
+        row = (self.game_id, state.turns, player, self._name(player), getattr(card, "card_id", card),
+               category, int(correct), response_ms, state.positions[player])
+        for column, value in zip(ANSWER_COLUMNS, row):
+            self.answers[column].append(value)
+
+    def _name(self, player):
+        return self.player_names[player] if player < len(self.player_names) else str(player)
+
+    def __len__(self):
+        return len(self.answers["game_id"])
+
+    def flush(self, state=None, latency=None):
+        """Write the finished turns in one transaction, then clear the buffers.
+
+        Answers from a turn cut short are dropped: a resumed game replays
+        that turn from its autosave. latency is the game's LatencyStats,
+        whose per-player and per-category percentiles replace any written
+        for this game before.
+        """
+        for values in self.answers.values():
+            del values[self._finished:]
+        if self.path.endswith(".parquet"):
+            self._flush_parquet(latency)
+        else:
+            self._flush_sqlite(state, latency)
+        for columns in (self.answers, self.turns):
+            for values in columns.values():
+                values.clear()
+        self._turn_start = None
+        self._finished = 0
+
+    def _flush_sqlite(self, state, latency):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.path)
+        try:
+            connection.executescript(SCHEMA)
+            with connection:
+                connection.executemany(
+                    f"INSERT INTO answers VALUES ({', '.join('?' * len(ANSWER_COLUMNS))})",
+                    zip(*self.answers.values()))
+                connection.executemany(
+                    f"INSERT INTO turns VALUES ({', '.join('?' * len(TURN_COLUMNS))})",
+                    zip(*self.turns.values()))
+                connection.execute(
+                    "INSERT OR REPLACE INTO games VALUES (?, ?, ?, ?, ?)",
+                    (self.game_id, time.time(), json.dumps(self.player_names),
+                     state.winner if state else None, state.turns if state else None))
+                if latency is not None:
+                    connection.execute("DELETE FROM latency WHERE game_id = ?", (self.game_id,))
+                    connection.executemany("INSERT INTO latency VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                           latency_rows(self.game_id, latency))
+        finally:
+            connection.close()
+
+    def _flush_parquet(self, latency):
+        if pyarrow is None:
+            raise RuntimeError("Writing Parquet needs pyarrow; use a .sqlite path instead")
+        os.makedirs(self.path, exist_ok=True)
+        suffix = time.strftime("%H%M%S")
+        for name, columns in (("answers", self.answers), ("turns", self.turns)):
+            if columns["game_id"]:
+                pyarrow.parquet.write_table(
+                    pyarrow.table(columns),
+                    os.path.join(self.path, f"{name}-{self.game_id}-{suffix}.parquet"))
+        if latency is not None:
+            rows = list(zip(*latency_rows(self.game_id, latency)))
+            if rows:
+                names = ("game_id", "kind", "name", "count", "p50_ms", "p95_ms", "max_ms")
+                pyarrow.parquet.write_table(
+                    pyarrow.table(dict(zip(names, map(list, rows)))),
+                    os.path.join(self.path, f"latency-{self.game_id}.parquet"))
+
+
+def latency_rows(game_id, latency):
+    """(game_id, kind, name, count, p50_ms, p95_ms, max_ms) rows from a LatencyStats."""
+    return [(game_id, kind, str(name), s["count"], s["p50_ms"], s["p95_ms"], s["max_ms"])
+            for kind, summaries in latency.summary().items() for name, s in summaries.items()]
+
+
+def load_answers(path):
+    """Return game_id, player, card_id, category and correct columns as arrays."""
+    if path.endswith(".parquet"):
+        if pyarrow is None:
+            raise RuntimeError("Reading Parquet needs pyarrow")
+        files = [os.path.join(path, name) for name in os.listdir(path) if name.startswith("answers-")]
+        table = pyarrow.concat_tables([pyarrow.parquet.read_table(f) for f in files])
+        columns = {name: table.column(name).to_numpy(zero_copy_only=False)
+                   for name in ("game_id", "player", "card_id", "category", "correct")}
+    else:
+        connection = sqlite3.connect(path)
+        try:
+            rows = connection.execute(
+                "SELECT game_id, player, card_id, category, correct FROM answers").fetchall()
+        finally:
+            connection.close()
+        game_id, player, card_id, category, correct = zip(*rows) if rows else ((),) * 5
+        columns = {"game_id": np.array(game_id, dtype=object), "player": np.array(player),
+                   "card_id": np.array(card_id), "category": np.array(category, dtype=object),
+                   "correct": np.array(correct)}
+    columns["correct"] = columns["correct"].astype(np.float64)
+    columns["card_id"] = columns["card_id"].astype(np.int64)
+    return columns
+
+
+def card_statistics(columns, min_answers=10):
+    """Per-card answers, difficulty and discrimination, computed with grouped sums.
+
+    Returns a dict of equal-length arrays, one entry per card with at least
+    min_answers answers.
+    """
+    correct = columns["correct"]
+    if not len(correct):
+        return {"card_id": np.zeros(0, dtype=np.int64), "answers": np.zeros(0),
+                "difficulty": np.zeros(0), "discrimination": np.zeros(0)}
+    # Each player's record in each game is one examinee
+    examinee_keys = np.char.add(columns["game_id"].astype(str),
+                                np.char.add(":", columns["player"].astype(str)))
+    _, examinee = np.unique(examinee_keys, return_inverse=True)
+    totals = np.bincount(examinee, weights=correct)
+    counts = np.bincount(examinee)
+    # Share correct on the examinee's other cards (the "rest score")
+    others = counts[examinee] - 1
+    usable = others > 0
+    rest = np.where(usable, (totals[examinee] - correct) / np.maximum(others, 1), 0.0)
+
+    cards, card_index = np.unique(columns["card_id"], return_inverse=True)
+    n = np.bincount(card_index).astype(np.float64)
+    difficulty = np.bincount(card_index, weights=correct) / n
+
+    x, y, index = correct[usable], rest[usable], card_index[usable]
+    size = len(cards)
+    m = np.bincount(index, minlength=size).astype(np.float64)
+    sx = np.bincount(index, weights=x, minlength=size)
+    sy = np.bincount(index, weights=y, minlength=size)
+    sxy = np.bincount(index, weights=x * y, minlength=size)
+    sxx = np.bincount(index, weights=x * x, minlength=size)
+    syy = np.bincount(index, weights=y * y, minlength=size)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        covariance = m * sxy - sx * sy
+        spread = np.sqrt((m * sxx - sx * sx) * (m * syy - sy * sy))
+        discrimination = np.where(spread > 0, covariance / spread, np.nan)
+
+    keep = n >= min_answers
+    return {"card_id": cards[keep], "answers": n[keep], "difficulty": difficulty[keep],
+            "discrimination": discrimination[keep]}
+
+
+def flag(difficulty, discrimination):
+    """Why a card needs a look, or an empty string."""
+    reasons = []
+    if difficulty > 0.95:
+        reasons.append("too easy")
+    elif difficulty < 0.2:
+        reasons.append("too hard")
+    if np.isnan(discrimination):
+        pass
+    elif discrimination < 0:
+        reasons.append("negative discrimination, check the answer key")
+    elif discrimination < 0.1:
+        reasons.append("low discrimination")
+    return ", ".join(reasons)
+
+
+def report(path, bank=None, min_answers=10):
+    """Text report of every card, worst first."""
+    columns = load_answers(path)
+    stats = card_statistics(columns, min_answers)
+    games = len(set(columns["game_id"].tolist()))
+    lines = [f"{len(columns['correct'])} answers from {games} games; "
+             f"{len(stats['card_id'])} cards with at least {min_answers} answers"]
+    order = np.argsort(np.nan_to_num(stats["discrimination"], nan=1.0))
+    for i in order:
+        card_id = int(stats["card_id"][i])
+        text = ""
+        if bank is not None and card_id < bank.card_count:
+            text = " " + bank.card(card_id).question[:60]
+        lines.append(f"card {card_id:5d}: n={int(stats['answers'][i]):6d} "
+                     f"p={stats['difficulty'][i]:.2f} r={stats['discrimination'][i]:+.2f}{text}"
+                     f"  {flag(stats['difficulty'][i], stats['discrimination'][i])}".rstrip())
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from question_bank import DEFAULT_BANK, QuestionBank
+
+    parser = argparse.ArgumentParser(description="Per-card difficulty and discrimination report")
+    parser.add_argument("path", nargs="?", default=DEFAULT_ANALYTICS,
+                        help="SQLite file or directory of Parquet files")
+    parser.add_argument("--questions", default=DEFAULT_BANK)
+    parser.add_argument("--min-answers", type=int, default=10)
+    args = parser.parse_args()
+
+    print(report(args.path, QuestionBank.open(args.questions), args.min_answers))
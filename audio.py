@@ -0,0 +1,166 @@
+"""Game audio: decoded sounds played on a fixed pool of mixer channels, and
+background music streamed by pygame.mixer.music.
+
+AudioManager keeps decoded sounds in an LRU cache capped by size, so banks
+that bring per-question clips can't grow mixer memory without bound. Every
+play() gets a channel from the pool: a free one if there is one, otherwise
+the oldest channel playing something of lower or equal priority is taken
+over ("voice stealing"). Nothing is loaded in play(), so it never blocks
+the frame loop; load sounds ahead of time with load() or preload().
+
+NullAudio has the same methods and does nothing, for headless runs and
+machines without an audio device.
+"""
+import os
+import time
+from collections import OrderedDict
+
+import pygame
+
+DEFAULT_SOUND_DIR = "sounds"
+DEFAULT_CHANNELS = 8
+DEFAULT_CACHE_BYTES = 32 * 1024 * 1024  # Decoded samples kept in memory
+
+# Higher priorities steal channels from lower ones when the pool is full
+PRIORITY_EFFECT = 1   # Dice, moves
+PRIORITY_RESULT = 2   # Correct / wrong answer
+PRIORITY_EVENT = 3    # Winning the game
+
+GAME_SOUNDS = {
+    "roll": "dice_roll.wav",
+    "correct": "correct.wav",
+    "wrong": "wrong.wav",
+    "win": "win.wav",
+}
+MUSIC = "background_music.mp3"
+
+
+class NullAudio:
+    """Audio backend that plays nothing."""
+
+    enabled = False
+
+    def load(self, name, path):
+        return False
+
+    def preload(self, sounds, sound_dir=DEFAULT_SOUND_DIR):
+        return []
+
+    def play(self, name, priority=PRIORITY_EFFECT, volume=1.0):
+        return None
+
+    def play_music(self, path, loops=-1, volume=0.5):
+        return False
+
+    def stop_music(self, fade_ms=0):
+        pass
+
+    def stop(self):
+        pass
+
+
+class AudioManager(NullAudio):
+    enabled = True
+
+    def __init__(self, channels=DEFAULT_CHANNELS, max_cache_bytes=DEFAULT_CACHE_BYTES):
+        # The mixer must already be initialized (see create_audio)
+        pygame.mixer.set_num_channels(channels)
+        self.channels = [pygame.mixer.Channel(i) for i in range(channels)]
+        self.priorities = [0] * channels
+        self.started = [0.0] * channels
+        self.max_cache_bytes = max_cache_bytes
+        self.sounds = OrderedDict()  # name -> (Sound, decoded bytes)
+        self.cached_bytes = 0
+        frequency, size, mixer_channels = pygame.mixer.get_init()
+        self._bytes_per_second = frequency * (abs(size) // 8) * mixer_channels
+        # Counters for checking the pool size fits the game
+        self.stolen = 0
+        self.dropped = 0
+
+    def load(self, name, path):
+        """Decode a sound file into the cache under name; False if it can't be read."""
+        try:
+            sound = pygame.mixer.Sound(path)
+        except (pygame.error, FileNotFoundError):
+            return False
+        self._forget(name)
+        size = int(sound.get_length() * self._bytes_per_second)
+        self.sounds[name] = (sound, size)
+        self.cached_bytes += size
+        # Drop the least recently played sounds once over budget
+        while self.cached_bytes > self.max_cache_bytes and len(self.sounds) > 1:
+            self._forget(next(iter(self.sounds)))
+        return True
+
+    def preload(self, sounds, sound_dir=DEFAULT_SOUND_DIR):
+        """Load {name: file name} from sound_dir; return the names that are missing."""
+        return [name for name, file_name in sounds.items()
+                if not self.load(name, os.path.join(sound_dir, file_name))]
+
+    def _forget(self, name):
+        entry = self.sounds.pop(name, None)
+        if entry:
+            self.cached_bytes -= entry[1]
+
+    def play(self, name, priority=PRIORITY_EFFECT, volume=1.0):
+        """Play a cached sound; return the channel, or None if it wasn't played."""
+        entry = self.sounds.get(name)
+        if entry is None:
+            return None
+        self.sounds.move_to_end(name)
+        index = self._free_channel(priority)
+        if index is None:
+            self.dropped += 1
+            return None
+        channel = self.channels[index]
+        channel.set_volume(volume)
+        channel.play(entry[0])
+        self.priorities[index] = priority
+        self.started[index] = time.perf_counter()
+        return channel
+
+    def _free_channel(self, priority):
+        stealable = None
+        for index, channel in enumerate(self.channels):
+            if not channel.get_busy():
+                return index
+            if self.priorities[index] <= priority and (
+                    stealable is None or (self.priorities[index], self.started[index])
+                    < (self.priorities[stealable], self.started[stealable])):
+                stealable = index
+        if stealable is not None:
+            self.channels[stealable].stop()
+            self.stolen += 1
+        return stealable
+
+    def play_music(self, path, loops=-1, volume=0.5):
+        """Stream music from disk; only a small buffer is decoded at a time."""
+        try:
+            pygame.mixer.music.load(path)
+        except (pygame.error, FileNotFoundError):
+            return False
+        pygame.mixer.music.set_volume(volume)
+        pygame.mixer.music.play(loops)
+        return True
+
+    def stop_music(self, fade_ms=0):
+        if fade_ms:
+            pygame.mixer.music.fadeout(fade_ms)
+        else:
+            pygame.mixer.music.stop()
+
+    def stop(self):
+        pygame.mixer.stop()
+        pygame.mixer.music.stop()
+
+
+def create_audio(enabled=True, **kwargs):
+    """An AudioManager, or NullAudio if sound is off or there is no audio device."""
+    if not enabled:
+        return NullAudio()
+    try:
+        pygame.mixer.init()
+    except (pygame.error, NotImplementedError) as e:
+        print(f"No audio device ({e}) - running without sound")
+        return NullAudio()
+    return AudioManager(**kwargs)
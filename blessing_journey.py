@@ -2,13 +2,38 @@ import pygame
 import random
 import sys
 import math
+import os
+import sqlite3
+import time
 from typing import List
 
-# Initialize Pygame
-pygame.init()
-pygame.mixer.init()
+from analytics import DEFAULT_ANALYTICS, AnalyticsSink
+from audio import (DEFAULT_SOUND_DIR, GAME_SOUNDS, MUSIC, PRIORITY_EVENT, PRIORITY_RESULT,
+                   NullAudio, create_audio)
+from dirty_rects import DirtyRectTracker
+from event_log import (BankMismatch, EventLog, ReplayMismatch, new_log_path, read_log, replay,
+                       replay_engine)
+from font_cache import FontCache
+from frame_scheduler import FrameScheduler
+from latency import LatencyStats
+from perf_hud import PerfHud
+from mastery import MasteryModel, MasteryStore
+from question_bank import DEFAULT_BANK, BlessingCard, QuestionBank
+from question_sampler import QuestionSampler
+from rules import (DEFAULT_BOARD, QUESTION_KINDS, BoardTables, Category, RulesEngine, TileKind, TurnEvent,
+                   board_names, encode_board)
+from snapshot import (delete_snapshot, has_snapshot, load_snapshot, rng_state_from_json,
+                      rng_state_to_json, save_snapshot)
+from startup import StartupLoader
+from text_layout import TextLayout
+from timeline import Timeline, Tween, ease_out_quad
+from viewport import Viewport, fit_window_size
+
+# Startup is timed from here; pygame subsystems are only started by BerachotGame
+IMPORTED_AT = time.perf_counter()
 
 # Constants
+QUESTION_BANK = DEFAULT_BANK  # JSON/CSV question source, compiled on first use
 WINDOW_SIZE = (1200, 900)  # Increased window size to accommodate larger board
 SPACE_SIZE = 70  # Slightly smaller tiles to fit more
 COLORS = {
@@ -22,20 +47,35 @@ COLORS = {
     "PRAYER": (255, 236, 214),  # Prayer tiles
     "BLACK_HOLE": (20, 20, 20)  # Dark color for black hole tiles
 }
-
-class BlessingCard:
-    def __init__(self, question: str, options: List[str], correct_option: int, category: str):
-        self.question = question
-        self.options = options
-        self.correct_option = correct_option
-        self.category = category
+TILE_COLORS = {
+    TileKind.FOOD: COLORS["BLUE"],       # Food questions
+    TileKind.DAILY: COLORS["GREEN"],     # Daily blessings
+    TileKind.SPECIAL: COLORS["YELLOW"],  # Special occasions
+    TileKind.STAR: COLORS["RED"],        # Power-up tile
+    TileKind.PRAYER: COLORS["PRAYER"],   # Prayer tile
+    TileKind.START: COLORS["WHITE"],
+    TileKind.END: COLORS["WHITE"],
+    TileKind.BLACK_HOLE: COLORS["BLACK_HOLE"],
+}
+TILE_LETTERS = {
+    TileKind.FOOD: "F",
+    TileKind.DAILY: "D",
+    TileKind.SPECIAL: "S",
+    TileKind.STAR: "★",
+    TileKind.PRAYER: "P",
+    TileKind.BLACK_HOLE: "⚫",
+}
 
 class PowerUp:
+    __slots__ = ("name", "effect")
+
     def __init__(self, name, effect):
         self.name = name
         self.effect = effect
 
 class Player:
+    __slots__ = ("name", "position", "correct_answers", "color", "number", "power_ups")
+
     def __init__(self, name: str, number: int):
         self.name = name
         self.position = 0
@@ -48,375 +88,224 @@ class Player:
         self.power_ups.append(power_up)
 
 class BerachotGame:
-    def __init__(self):
-        # Add try-except for pygame initialization
+    def __init__(self, board=None, sound=True):
+        # Only what the first screen needs is started here; the mixer and the
+        # question bank load on background threads (see start_loading)
         try:
-            pygame.init()
-            pygame.mixer.init()
+            pygame.display.init()
+            pygame.font.init()
         except pygame.error as e:
             print(f"Failed to initialize pygame: {e}")
             sys.exit(1)
 
-        # Initialize in windowed mode
+        # Initialize in windowed mode. Everything is drawn at WINDOW_SIZE and
+        # scaled to the real window, so the layout is the same on every screen
         self.fullscreen = False
-        self.window_size = WINDOW_SIZE
-        self.screen = pygame.display.set_mode(self.window_size)
+        desktop = pygame.display.Info()
+        self.window_size = fit_window_size(WINDOW_SIZE, (desktop.current_w, desktop.current_h))
+        self.viewport = Viewport(WINDOW_SIZE)
+        self.viewport.set_window(pygame.display.set_mode(self.window_size, pygame.RESIZABLE))
         self.window_width, self.window_height = self.screen.get_size()
         pygame.display.set_caption("Berachot Game")
         self.clock = pygame.time.Clock()
-        self.font = pygame.font.Font(None, 32)
+        self.scheduler = FrameScheduler(self.clock, fps=60)
+        self.timeline = Timeline(self.scheduler)
+        self.fonts = FontCache()
+        self.display_updates = DirtyRectTracker(enabled=True)
+        # Frame profiler overlay, toggled with P; Shift+P profiles the next frames
+        self.perf = PerfHud(self.fonts)
+        self.profile_frames = 300
+        self.scheduler.perf = self.display_updates.perf = self.perf
+        self.scheduler.viewport = self.display_updates.viewport = self.viewport
+        self.text = TextLayout(self.fonts)
         self.players: List[Player] = []
         self.current_player = 0
-        self.board_size = 56  # Changed from 36 to 56
+        self.board_size = len(board) if board else len(DEFAULT_BOARD)  # 56 on the standard board
         self.board_positions = []
-        self.cards = self.initialize_cards()
-        self.board = self.create_board()
+        self.static_board = None  # Cached surface with the non-moving board layer
+        self.board = self.create_board(board)
         self.game_started = False
+        self.min_questions_before_repeat = 4  # Minimum questions before a repeat
+        self.event_log = None
+        self.analytics = None
+        self.mastery_store = None  # Only set for live games, so replays don't change anybody's mastery
+        self.response_ns = None  # How long the last card took to answer
+        self.latency = LatencyStats()
 
-        # Try to load sound effects, but continue if files are missing
-        try:
-            self.roll_sound = pygame.mixer.Sound('sounds/dice_roll.wav')
-            self.correct_sound = pygame.mixer.Sound('sounds/correct.wav')
-            self.wrong_sound = pygame.mixer.Sound('sounds/wrong.wav')
-            self.win_sound = pygame.mixer.Sound('sounds/win.wav')
-            self.sound_enabled = True
-            
-            # Try to load and play background music
-            try:
-                pygame.mixer.music.load('sounds/background_music.mp3')
-                pygame.mixer.music.play(-1)
-            except:
+        self._no_audio = NullAudio()
+        self.startup = StartupLoader(IMPORTED_AT)
+        self.startup.mark("window")
+        self.start_loading(sound)
+
+    def start_loading(self, sound=True):
+        """Load the question bank and audio in the background."""
+        self.startup.submit("questions", self._load_questions)
+        if sound:
+            self.startup.submit("audio", self._load_audio)
+        self.startup.report_when_done("first frame")
+
+    def _load_questions(self):
+        cards = self.initialize_cards()
+        return cards, QuestionSampler(cards, self.min_questions_before_repeat), MasteryModel(cards.card_count)
+
+    # These wait for the background load the first time they're needed
+    @property
+    def cards(self):
+        return self.startup.result("questions")[0]
+
+    @property
+    def question_sampler(self):
+        return self.startup.result("questions")[1]
+
+    @property
+    def mastery(self):
+        return self.startup.result("questions")[2]
+
+    def _load_audio(self):
+        """Start the mixer, decode the sound effects and start the music."""
+        audio = create_audio()
+        if audio.enabled:
+            # Continue if files are missing; those sounds just don't play
+            missing = audio.preload(GAME_SOUNDS)
+            if missing:
+                print(f"Sound effects files not found ({', '.join(missing)}) - playing without them")
+            if not audio.play_music(os.path.join(DEFAULT_SOUND_DIR, MUSIC)):
                 print("Background music file not found")
-        except:
-            print("Sound effects files not found - running without sound")
-            self.sound_enabled = False
-
-        self.question_history = {
-            "Food": [],
-            "Daily": [],
-            "Special": [],
-            }
-        self.min_questions_before_repeat = 4  # Minimum questions before a repeat
-        
+        return audio
+
+    @property
+    def audio(self):
+        """The AudioManager once it has loaded; silent until then, never waits."""
+        if self.startup.ready("audio"):
+            return self.startup.result("audio")
+        return self._no_audio
+
+
     def toggle_fullscreen(self):
         """Toggle fullscreen mode using a more robust macOS compatible method."""
         try:
-            # Store current window size before any changes
-            current_size = self.screen.get_size()
-            
             if self.fullscreen:
                 # Switch to windowed mode
-                self.screen = pygame.display.set_mode(
-                    WINDOW_SIZE,  # Use original window size constant
-                    pygame.RESIZABLE
-                )
+                window = pygame.display.set_mode(self.window_size, pygame.RESIZABLE)
                 self.fullscreen = False
             else:
                 # Get current display info before switching
                 display_info = pygame.display.Info()
-                # Switch to fullscreen mode
-                self.screen = pygame.display.set_mode(
+                # Switch to fullscreen mode at the display's own resolution
+                window = pygame.display.set_mode(
                     (display_info.current_w, display_info.current_h),
                     pygame.FULLSCREEN | pygame.HWSURFACE | pygame.DOUBLEBUF
                 )
                 self.fullscreen = True
-            
-            # Update window dimensions
-            self.window_width, self.window_height = self.screen.get_size()
-            
-            # Force a complete redraw
+            self.viewport.set_window(window)
+
+            # Force a complete redraw; the logical layout itself hasn't changed
             self.screen.fill(COLORS["BACKGROUND"])
-            
-            # Recalculate board positions
-            self.board_positions = self.calculate_board_positions()
-            
-            # Redraw everything
             self.draw_board()
             self.draw_info_panel()
-            pygame.display.flip()
-            
+            self.display_updates.invalidate()
+            self.display_updates.present()
+
             # Small delay to let the display settle
             pygame.time.wait(100)
-            
+
         except pygame.error as e:
             print(f"Fullscreen toggle failed: {e}")
             # Fallback to windowed mode
-            self.screen = pygame.display.set_mode(
-                WINDOW_SIZE,
-                pygame.RESIZABLE
-            )
+            self.viewport.set_window(pygame.display.set_mode(self.window_size, pygame.RESIZABLE))
             self.fullscreen = False
-            self.window_width, self.window_height = self.screen.get_size()
-            self.board_positions = self.calculate_board_positions()
+            self.display_updates.invalidate()
+
+    @property
+    def screen(self):
+        """The logical WINDOW_SIZE surface everything is drawn on.
+
+        It can be replaced when the window changes size (FrameScheduler
+        refits the viewport on VIDEORESIZE), so it is looked up each time.
+        """
+        return self.viewport.surface
 
     def initialize_cards(self):
-        cards = {
-            "Food": [
-                BlessingCard("What is the blessing for bread?",
-                            ["Hamotzi", "Mezonot", "Shehakol", "Ha'adama"],
-                            0, "Food"),
-                BlessingCard("In what language should berachot ideally be recited?",
-                            ["Any language is fine", 
-                             "Hebrew if possible", 
-                             "Only Hebrew", 
-                             "Only Aramaic"], 
-                            1, "Food"),
-                BlessingCard("Which of the following is not a category under food blessings (Birchot Ha'nehenin)?",
-                            ["Ha'Eitz", "Ha'Adamah", "Mezonot", "Ha'Mitvot"],
-                            3, "Food"),
-                BlessingCard("True or False: Birchot Ha'nehenin include blessings said over both food and fragrance.",
-                            ["True", "False"],
-                            0, "Food"),
-                BlessingCard("How much must be eaten for a food to require a Bracha Rishona (first blessing)?",
-                            ["A full meal", "A kizayit", "Any amount", "A half portion"],
-                            2, "Food"),
-                BlessingCard("What is the defining feature of a tree that requires the blessing Ha'Eitz?",
-                            ["It bears citrus fruit", "It grows on vines", 
-                             "It continues to produce from year to year", "It grows below ground"],
-                            2, "Food"),
-                BlessingCard("Which food category has the highest priority in halachic importance?",
-                            ["HaEitz", "Mezonot", "HaMotzi", "HaAdamah"],
-                            2, "Food"),
-                # New questions from images
-                BlessingCard("How much must be eaten for a food to require a Bracha Rishona?",
-                            ["A full meal", "A kizayit", "Any amount", "A half portion"],
-                            2, "Food"),
-                BlessingCard("True or False: A kizayit is approximately 3.3-3.5 ounces.",
-                            ["True", "False"],
-                            1, "Food"),
-                BlessingCard("True or False: If you prefer the taste of a HaAdamah food over a HaEitz food, HaAdamah comes first.",
-                            ["True", "False"],
-                            0, "Food"),
-                BlessingCard("Which of the following is NOT one of the Shivat Haminim?",
-                            ["Fig", "Pomegranate", "Apple", "Grapes"],
-                            2, "Food"),
-                BlessingCard("Mezonot is said over which foods?",
-                            ["Fruits only", "Raw vegetables", "Cooked or baked grain-based items", "Dairy items"],
-                            2, "Food"),
-                BlessingCard("True or False: Noodles and cookies require the Mezonot blessing.",
-                            ["True", "False"],
-                            0, "Food"),
-                BlessingCard("Which food requires a Shehakol blessing?",
-                            ["Apple", "Watermelon (raw)", "Potato latkes", "Grape juice"],
-                            2, "Food"),
-                BlessingCard("Ha'Adamah is said when the source food _____ after producing fruit.",
-                            ["grows", "dies", "changes", "ripens"],
-                            1, "Food")
-            ],
-            "Daily": [
-                BlessingCard("What is the first beracha we say in the morning?", ["Modeh Ani", "Shema", "Birkat Hamazon", "Asher Yatzar"], 0, "Daily"),
-                BlessingCard("What is the beracha for seeing lightning?", ["Shehakol", "Oseh Ma'aseh Bereishit", "Ha'adama", "Hamotzi"], 1, "Daily"),
-                BlessingCard("When do we say Birkat Hamazon?", ["Before eating", "After eating bread", "Before sleeping", "In the morning"], 1, "Daily"),
-                BlessingCard("What blessing do we say after using the bathroom?", ["Modeh Ani", "Shema", "Asher Yatzar", "Al Netilat Yadayim"], 2, "Daily"),
-                BlessingCard("When do we say the blessing for washing hands?", ["Before eating bread", "After eating", "Before sleeping", "After the bathroom"], 0, "Daily"),
-                BlessingCard("What blessing do we say before studying Torah?", ["Shema", "La'asok B'divrei Torah", "Ahavat Olam", "Emet V'yatziv"], 1, "Daily"),
-                BlessingCard("When do we say the Shema?", ["Morning and evening", "Afternoon only", "Morning only", "Evening only"], 0, "Daily"),
-                BlessingCard("What blessing do we say on candles before Shabbat?", ["Borei Pri Hagafen", "L'hadlik Ner", "Hamotzi", "Shehecheyanu"], 1, "Daily"),
-                BlessingCard("Why do we say Asher Yatzar after using the bathroom?",
-                            ["Because our body works with wondrous wisdom",
-                             "It's just tradition",
-                             "To be polite",
-                             "No special reason"],
-                            0, "Daily"),
-                BlessingCard("True or False: Only Birkat Hamazon is considered a Torah blessing by most authorities?",
-                            ["True", "False"], 
-                            0, "Daily"),
-                BlessingCard("How many berachot should one try to say daily?",
-                            ["50", "75", "100", "150"], 
-                            2, "Daily"),
-                BlessingCard("Complete the phrase: 'rofey _____ kol basar'",
-                            ["cholay", "cholim", "choleh", "cholot"], 
-                            0, "Daily"),
-                BlessingCard("According to most authorities, only which blessing is a Torah commandment?",
-                            ["Birkat HaMazon", "Asher Yatzar", "HaMotzi", "Mezonot"],
-                            0, "Daily"),
-                BlessingCard("When should berachot generally be recited?",
-                            ["After enjoying something", "During the act", 
-                             "Over lesiyatan – before receiving benefit", "Only on holidays"],
-                            2, "Daily"),
-                BlessingCard("Why did King David institute the recitation of 100 blessings daily?",
-                            ["People weren't praying", "It was commanded in the Torah",
-                             "People were dying without explanation", "There were 100 prophets"],
-                            2, "Daily"),
-                BlessingCard("What should you do if you begin a blessing but realize you have no food after saying Ado-noy?",
-                            ["Stop and say Baruch Shem", "Wait and then eat",
-                             "End with lamdeni chukecha", "Continue the blessing anyway"],
-                            2, "Daily"),
-                BlessingCard("True or False: You may say a blessing even if the food or water is not yet present.",
-                            ["True", "False"],
-                            1, "Daily"),
-                BlessingCard("If one realizes after saying 'Elokainu' that they have no food, they should say:",
-                            ["Nothing", "Baruch Shem Kevod Malchuto Leolam Vaed",
-                             "Start over", "Continue anyway"],
-                            1, "Daily"),
-                BlessingCard("When should a person recite the Asher Yatzar blessing?",
-                            ["After waking up", "After eating", "After leaving the bathroom", "Before sleeping"],
-                            2, "Daily"),
-                BlessingCard("True or False: The blessing Asher Yatzar refers to how the human body functions with wisdom.",
-                            ["True", "False"],
-                            0, "Daily"),
-                BlessingCard("True or False: After saying 'Elokainu' in error, you can continue with the blessing if you get food.",
-                            ["True", "False"],
-                            1, "Daily")
-            ],
-            "Special": [
-                BlessingCard("What is the beracha for a new fruit?", ["Shehecheyanu", "Borei Pri Ha'etz", "Shehakol", "Hamotzi"], 0, "Special"),
-                BlessingCard("What is the beracha for hearing thunder?", ["Shehakol", "Oseh Ma'aseh Bereishit", "Shehecheyanu", "Hamotzi"], 1, "Special"),
-                BlessingCard("What blessing do we say on Chanukah candles?", ["L'hadlik Ner", "Shehecheyanu", "Both A and B", "Neither"], 2, "Special"),
-                BlessingCard("When do we say Shehecheyanu?", ["On new things", "Every morning", "Before eating", "Before sleeping"], 0, "Special"),
-                BlessingCard("What blessing do we say when seeing a rainbow?", ["Oseh Ma'aseh Bereishit", "Zocher HaBrit", "Shehecheyanu", "None"], 1, "Special"),
-                BlessingCard("What blessing do we say on seeing the ocean?", ["Shehecheyanu", "Oseh Ma'aseh Bereishit", "Zocher HaBrit", "None"], 1, "Special"),
-                BlessingCard("What blessing do we say on Rosh Hashanah apples?", ["Borei Pri Ha'etz", "Shehecheyanu", "Both A and B", "Neither"], 2, "Special"),
-                BlessingCard("What blessing do we say at a wedding?", ["Shehecheyanu", "Asher Bara", "Both A and B", "Neither"], 1, "Special"),
-                BlessingCard("When should berachot generally be recited?",
-                            ["After the action", 
-                             "Before the action (over lesiyatan)", 
-                             "During the action",
-                             "Anytime"], 
-                            1, "Special"),
-                BlessingCard("Who benefits from saying a beracha?",
-                            ["G-d", "The person saying it", "Both", "Neither"], 
-                            1, "Special"),
-                BlessingCard("Why do we recite berachot?",
-                            ["To thank G-d actively",
-                             "Because we have to",
-                             "To make noise",
-                             "No reason"], 
-                            0, "Special"),
-                BlessingCard("True or False: A person should say berachot by rote without thinking of their meaning",
-                            ["True", "False"], 
-                            1, "Special"),
-                BlessingCard("The word beracha comes from braycha, which means:",
-                            ["River", "Spring", "Blessing", "Prayer"],
-                            1, "Special"),
-                BlessingCard("True or False: God receives benefit from our blessings.",
-                            ["True", "False"],
-                            1, "Special"),
-                BlessingCard("Why do we recite berachot?",
-                            ["To earn reward", "To fulfill obligation",
-                             "To recognize and thank Hashem", "To announce holiness"],
-                            2, "Special"),
-                BlessingCard("True or False: You may say a blessing even if the food or water is not yet present.",
-                            ["True", "False"],
-                            1, "Special"),
-                BlessingCard("If you say Shehakol by mistake on any food, what should you do?",
-                            ["Always redo the blessing", "Continue eating - it's valid",
-                             "Say Baruch Shem", "Ask a rabbi"],
-                            1, "Special"),
-                BlessingCard("Match the type of bracha: What requires Birchot Ha'nehenin?",
-                            ["Shofar", "Shmoneh Esrai", "Food", "Prayer"],
-                            2, "Special"),
-                BlessingCard("True or False: According to most authorities, only Birkat Ha'mazon is a Torah commandment.",
-                            ["True", "False"],
-                            0, "Special"),
-                BlessingCard("Why did King David institute 100 blessings daily?",
-                            ["People weren't praying", "Torah commanded it",
-                             "People were dying unexplainedly", "There were 100 prophets"],
-                            2, "Special"),
-                BlessingCard("True or False: If Hashem stopped providing sustenance, all blessings would continue regardless.",
-                            ["True", "False"],
-                            1, "Special"),
-                BlessingCard("The word 'beracha' comes from 'braycha,' which means:",
-                            ["River", "Spring", "Blessing", "Prayer"],
-                            1, "Special"),
-                BlessingCard("True or False: The phrase 'Baruch Atah' means 'You are the source of all blessings.'",
-                            ["True", "False"],
-                            0, "Special"),
-                BlessingCard("This recognition [of blessings] is strictly for _____, not for Hashem.",
-                            ["us", "them", "angels", "creation"],
-                            0, "Special"),
-                BlessingCard("True or False: Hashem's involvement stops after the food has grown.",
-                            ["True", "False"],
-                            1, "Special")
-            ]
-        }
-        return cards
+        # Cards come from the question bank; they are only built when drawn
+        return QuestionBank.open(QUESTION_BANK)
 
-    def create_board(self):
-        # First verify board_size is correctly set
-        if self.board_size != 56:
-            raise ValueError(f"Board size must be 56, got {self.board_size}")
-            
-        # Define the pattern of tiles ensuring exactly 56 tiles
-        tile_types = [
-            "START",  # 1
-            # Column 1 (7 tiles)
-            "Daily", "Food", "Special", "Black_Hole", "Star", "Daily", "Food",
-            # Column 2 (7 tiles)
-            "Special", "Star", "Food", "Daily", "Prayer", "Black_Hole", "Star",
-            # Column 3 (7 tiles)
-            "Food", "Daily", "Black_Hole", "Special", "Star", "Food", "Daily",
-            # Column 4 (7 tiles)
-            "Prayer", "Special", "Star", "Black_Hole", "Daily", "Prayer", "Special",
-            # Column 5 (7 tiles)
-            "Star", "Food", "Daily", "Prayer", "Black_Hole", "Star", "Food",
-            # Column 6 (7 tiles)
-            "Daily", "Prayer", "Special", "Star", "Food", "Black_Hole", "Prayer",
-            # Column 7 (7 tiles)
-            "Special", "Star", "Food", "Daily", "Prayer", "Special", "Star",
-            # Column 8 (6 tiles to make total of 56)
-            "Prayer", "Daily", "Special", "Food", "Star", "END"
-        ]
-        
-        # Debug print to verify count
-        print(f"Number of tiles: {len(tile_types)}")
+    def create_board(self, tile_types=None):
+        # Use the standard 56 tile pattern unless a custom layout is given.
+        # The board is kept as one TileKind byte per tile; board_names() gives
+        # the tile names that are saved and sent over the network
+        kinds = encode_board(DEFAULT_BOARD if tile_types is None else tile_types)
         
         # Verify tile count before creating board
-        if len(tile_types) != self.board_size:
-            raise ValueError(f"Tile count mismatch: expected {self.board_size}, got {len(tile_types)}")
+        if len(kinds) != self.board_size:
+            raise ValueError(f"Tile count mismatch: expected {self.board_size}, got {len(kinds)}")
         
-        return tile_types
+        # Precompute per-board lookups (black hole jumps, category tiles)
+        self.board_tables = BoardTables(kinds)
+        return kinds
 
     def calculate_board_positions(self):
+        # New positions invalidate the cached static board layer
+        self.static_board = None
         positions = []
         # Calculate margins based on screen size
         margin_x = self.window_width * 0.1
         margin_y = self.window_height * 0.8
         spacing = min(self.window_width * 0.06, self.window_height * 0.08)  # Dynamic spacing
         
-        columns = 8
         rows = 7
+        columns = math.ceil(self.board_size / rows)
+        # Squeeze columns together when a custom board has more than 8 of them
+        column_step = min(spacing + self.window_width * 0.02, self.window_width * 0.85 / columns)
         
         # Calculate positions column by column with screen size adjustments
         for col in range(columns):
             row_positions = range(rows) if col % 2 == 0 else range(rows-1, -1, -1)
             for row in row_positions:
-                x = margin_x + (col * (spacing + self.window_width * 0.02))
+                x = margin_x + (col * column_step)
                 y = margin_y - (row * spacing)
                 positions.append((int(x), int(y)))
         
-        return positions
+        return positions[:self.board_size]
 
     def start_screen(self):
         while True:
             self.screen.fill(COLORS["BACKGROUND"])
             
             # Draw title
-            title_text = self.font.render("Berachot Game", True, COLORS["BLACK"])
+            title_text = self.fonts.render("Berachot Game", 32, COLORS["BLACK"])
             title_rect = title_text.get_rect(center=(self.window_width // 2, 100))
             self.screen.blit(title_text, title_rect)
 
             # Draw begin button
             start_button = pygame.Rect(self.window_width // 2 - 50, 300, 100, 50)
             pygame.draw.rect(self.screen, COLORS["BLUE"], start_button)
-            start_text = self.font.render("Begin", True, COLORS["WHITE"])
+            start_text = self.fonts.render("Begin", 32, COLORS["WHITE"])
             start_rect = start_text.get_rect(center=start_button.center)
             self.screen.blit(start_text, start_rect)
 
+            # Offer to carry on the autosaved game, if there is one
+            resume_button = None
+            if has_snapshot():
+                resume_button = pygame.Rect(self.window_width // 2 - 60, 370, 120, 50)
+                pygame.draw.rect(self.screen, COLORS["GREEN"], resume_button)
+                resume_text = self.fonts.render("Resume", 32, COLORS["WHITE"])
+                self.screen.blit(resume_text, resume_text.get_rect(center=resume_button.center))
+
             # Add exit instructions
-            exit_text = self.font.render("Press ESC to exit", True, COLORS["BLACK"])
+            exit_text = self.fonts.render("Press ESC to exit", 32, COLORS["BLACK"])
             exit_rect = exit_text.get_rect(center=(self.window_width // 2, 500))
             self.screen.blit(exit_text, exit_rect)
 
             # Add fullscreen instructions
-            fullscreen_text = self.font.render("Press F to toggle fullscreen", True, COLORS["BLACK"])
+            fullscreen_text = self.fonts.render("Press F to toggle fullscreen", 32, COLORS["BLACK"])
             fullscreen_rect = fullscreen_text.get_rect(center=(self.window_width // 2, 450))
             self.screen.blit(fullscreen_text, fullscreen_rect)
 
-            pygame.display.flip()
+            self.display_updates.flip()
+            self.startup.mark("first frame")
 
             # Event handling
-            for event in pygame.event.get():
+            for event in self.scheduler.next_events():
                 if event.type == pygame.QUIT:
                     pygame.quit()
                     sys.exit()
@@ -429,8 +318,9 @@ class BerachotGame:
                 elif event.type == pygame.MOUSEBUTTONDOWN:
                     if start_button.collidepoint(event.pos):
                         return True
-
-            self.clock.tick(60)
+                    if resume_button and resume_button.collidepoint(event.pos):
+                        if self.restore_snapshot():
+                            return False
         return False
 
     def setup_players(self):
@@ -445,13 +335,12 @@ class BerachotGame:
             
             if not players_confirmed:
                 # Draw player count selection
-                title_text = self.font.render("Select Number of Players", True, COLORS["BLACK"])
+                title_text = self.fonts.render("Select Number of Players", 32, COLORS["BLACK"])
                 title_rect = title_text.get_rect(center=(self.window_width // 2, 100))
                 self.screen.blit(title_text, title_rect)
                 
                 # Increase size and visibility of player count
-                player_count_font = pygame.font.Font(None, 48)  # Larger font
-                text = player_count_font.render(f"{num_players} Players", True, COLORS["BLUE"])
+                text = self.fonts.render(f"{num_players} Players", 48, COLORS["BLUE"])  # Larger font
                 text_rect = text.get_rect(center=(self.window_width // 2, 200))
                 self.screen.blit(text, text_rect)
                 
@@ -462,25 +351,25 @@ class BerachotGame:
                 pygame.draw.rect(self.screen, COLORS["BLUE"], dec_button)
                 
                 # Draw + and - symbols
-                plus = self.font.render("+", True, COLORS["WHITE"])
-                minus = self.font.render("-", True, COLORS["WHITE"])
+                plus = self.fonts.render("+", 32, COLORS["WHITE"])
+                minus = self.fonts.render("-", 32, COLORS["WHITE"])
                 self.screen.blit(plus, (inc_button.centerx - 5, inc_button.centery - 10))
                 self.screen.blit(minus, (dec_button.centerx - 5, dec_button.centery - 10))
                 
                 # Add confirm button
                 confirm_button = pygame.Rect(self.window_width // 2 - 60, 300, 120, 40)
                 pygame.draw.rect(self.screen, COLORS["GREEN"], confirm_button)
-                confirm_text = self.font.render("Confirm", True, COLORS["WHITE"])
+                confirm_text = self.fonts.render("Confirm", 32, COLORS["WHITE"])
                 confirm_rect = confirm_text.get_rect(center=confirm_button.center)
                 self.screen.blit(confirm_text, confirm_rect)
             else:
                 # Player name input screen
-                title_text = self.font.render(f"Enter Player {len(player_names) + 1} Name", True, COLORS["BLACK"])
+                title_text = self.fonts.render(f"Enter Player {len(player_names) + 1} Name", 32, COLORS["BLACK"])
                 title_rect = title_text.get_rect(center=(self.window_width // 2, 100))
                 self.screen.blit(title_text, title_rect)
                 
                 # Display current name being typed
-                name_text = self.font.render(current_name + "|", True, COLORS["BLACK"])
+                name_text = self.fonts.render(current_name + "|", 32, COLORS["BLACK"])
                 name_rect = name_text.get_rect(center=(self.window_width // 2, 200))
                 self.screen.blit(name_text, name_rect)
                 
@@ -488,13 +377,13 @@ class BerachotGame:
                 if current_name:
                     confirm_name_button = pygame.Rect(self.window_width // 2 - 60, 300, 120, 40)
                     pygame.draw.rect(self.screen, COLORS["GREEN"], confirm_name_button)
-                    confirm_text = self.font.render("Next", True, COLORS["WHITE"])
+                    confirm_text = self.fonts.render("Next", 32, COLORS["WHITE"])
                     confirm_rect = confirm_text.get_rect(center=confirm_name_button.center)
                     self.screen.blit(confirm_text, confirm_rect)
 
-            pygame.display.flip()
+            self.display_updates.flip()
 
-            for event in pygame.event.get():
+            for event in self.scheduler.next_events():
                 if event.type == pygame.QUIT:
                     pygame.quit()
                     sys.exit()
@@ -537,16 +426,30 @@ class BerachotGame:
                                     self.players.append(Player(name, i + 1))
                                 return
 
-            self.clock.tick(60)
-
     def run_game(self):
-        self.start_screen()
-        self.setup_players()
+        # start_screen returns False when an autosaved game was resumed
+        if self.start_screen():
+            self.setup_players()
+            # The dice seed goes in the event log header so the game can be replayed
+            self.seed = random.randrange(2 ** 32)
+            self.rules = RulesEngine(self.board, len(self.players), rng=random.Random(self.seed),
+                                     draw_card=self.get_next_question, tables=self.board_tables)
+            self.open_event_log(new_log_path())
+            self.analytics = AnalyticsSink(DEFAULT_ANALYTICS, [p.name for p in self.players])
+            self.load_mastery()
         self.board_positions = self.calculate_board_positions()
 
         running = True
         while running:
-            for event in pygame.event.get():
+            self.draw_board()
+            self.draw_info_panel()
+            self.display_updates.present()
+
+            # While the perf HUD is up, report how much of the window is uploaded per frame
+            if self.perf.visible and self.display_updates.frames % 60 == 0:
+                pygame.display.set_caption(f"Berachot Game - {self.display_updates.report()}")
+
+            for event in self.scheduler.next_events():
                 if event.type == pygame.QUIT:
                     running = False
                 elif event.type == pygame.MOUSEBUTTONDOWN:
@@ -556,25 +459,199 @@ class BerachotGame:
                         running = False
                     elif event.key == pygame.K_f:  # Changed from F11 to F key
                         self.toggle_fullscreen()
-                        # Redraw everything
-                        self.draw_board()
-                        self.draw_info_panel()
+                    elif event.key == pygame.K_d:
+                        # Switch between dirty-rect updates and full flips
+                        self.display_updates.toggle()
+                    elif event.key == pygame.K_p and event.mod & pygame.KMOD_SHIFT:
+                        self.perf.capture(self.profile_frames)
+                    elif event.key == pygame.K_p:
+                        self.perf.toggle()
+                        if not self.perf.visible:
+                            pygame.display.set_caption("Berachot Game")
+
+        self.autosave()
+        self.save_mastery()
+        self.flush_analytics()
+        pygame.quit()
+        sys.exit()
+
+    def snapshot_state(self):
+        """Everything needed to carry on this game later, as a JSON-friendly dict."""
+        state = self.rules.state
+        return {
+            "board": board_names(self.board),
+            "card_count": self.cards.card_count,
+            "players": [{"name": p.name, "number": p.number} for p in self.players],
+            "positions": state.positions,
+            "correct_answers": state.correct_answers,
+            "current_player": state.current_player,
+            "turns": state.turns,
+            "rules_rng": rng_state_to_json(self.rules.rng),
+            "sampler": self.question_sampler.get_state(),
+            "log_path": self.event_log.path if self.event_log else None,
+            "game_id": self.analytics.game_id if self.analytics is not None else None,
+            "latency": self.latency.get_state(),
+        }
+
+    def autosave(self):
+        if getattr(self, "rules", None) is None or self.rules.state.winner is not None:
+            return
+        try:
+            save_snapshot(self.snapshot_state())
+        except OSError as e:
+            print(f"Could not save the game: {e}")
+
+    def restore_snapshot(self):
+        """Load the autosaved game; return False if it can't be used."""
+        data = load_snapshot()
+        if data is None:
+            return False
+        if data["board"] != board_names(self.board):
+            print("Saved game was played on a different board")
+            return False
+        self.players = []
+        for info, position, correct in zip(data["players"], data["positions"], data["correct_answers"]):
+            player = Player(info["name"], info["number"])
+            player.position = position
+            player.correct_answers = correct
+            self.players.append(player)
+        self.rules = RulesEngine(self.board, len(self.players), draw_card=self.get_next_question,
+                                 tables=self.board_tables)
+        state = self.rules.state
+        state.positions = list(data["positions"])
+        state.correct_answers = list(data["correct_answers"])
+        state.current_player = self.current_player = data["current_player"]
+        state.turns = data["turns"]
+        rng_state_from_json(self.rules.rng, data["rules_rng"])
+        # Question draw state only fits the bank it was saved with
+        if data["card_count"] == self.cards.card_count:
+            self.question_sampler.set_state(data["sampler"])
+        self.load_mastery()
+        if "latency" in data:
+            self.latency.set_state(data["latency"])
+        # Keep logging to the same file; the log notes where the game carried on from
+        self.open_event_log(data.get("log_path") or new_log_path())
+        if self.event_log:
+            self.event_log.resume(self.rules)
+        self.analytics = AnalyticsSink(DEFAULT_ANALYTICS, [p.name for p in self.players],
+                                       data.get("game_id"))
+        return True
+
+    def load_mastery(self, store=None):
+        """Pick up where each student left off in earlier games."""
+        self.mastery_store = store or MasteryStore()
+        self.mastery_store.load(self.mastery, [p.name for p in self.players])
+
+    def save_mastery(self):
+        """Keep each student's mastery for their next game."""
+        if self.mastery_store is None:
+            return
+        try:
+            self.mastery_store.save(self.mastery, [p.name for p in self.players])
+        except OSError as e:
+            print(f"Could not save mastery: {e}")
+
+    def open_event_log(self, path):
+        try:
+            self.event_log = EventLog(path, board_names(self.board), [p.name for p in self.players],
+                                      getattr(self, "seed", None), bank=self.cards.fingerprint())
+        except OSError as e:
+            print(f"Could not open event log: {e}")
+            self.event_log = None
+
+    def flush_analytics(self):
+        """Write this game's answers to the analytics store in one transaction."""
+        if self.analytics is None:
+            return
+        try:
+            self.analytics.flush(self.rules.state, self.latency)
+        except (OSError, sqlite3.Error, RuntimeError) as e:
+            print(f"Could not save answer analytics: {e}")
+
+    def replay_log(self, path):
+        """Play back a recorded game on screen, checking it against the rules."""
+        header, _ = read_log(path)
+        self.players = [Player(name, i + 1) for i, name in enumerate(header["players"])]
+        self.rules = replay_engine(header, tables=self.board_tables)
+        self.board_positions = self.calculate_board_positions()
 
+        def show(event):
+            if event.kind == TurnEvent.QUESTION:
+                self._show_message(f"{event['category']}: {event['card'].question}",
+                                   COLORS["BLACK"], 1500)
+            elif event.kind == TurnEvent.ANSWER:
+                self._show_result("Correct!" if event["correct"] else "Incorrect!",
+                                  COLORS["GREEN"] if event["correct"] else COLORS["RED"])
+            self._render_turn_event(event)
+
+        def after_turn(engine):
+            for player, position in zip(self.players, engine.state.positions):
+                player.position = position
             self.draw_board()
             self.draw_info_panel()
-            pygame.display.flip()
-            self.clock.tick(60)
+            self.display_updates.flip()
+            for event in self.scheduler.next_events():
+                if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN
+                                                 and event.key == pygame.K_ESCAPE):
+                    pygame.quit()
+                    sys.exit()
 
+        try:
+            engine = replay(path, listener=show, card_lookup=self.cards.card,
+                            engine=self.rules, after_turn=after_turn, bank=self.cards.fingerprint())
+        except BankMismatch as e:
+            print(f"Can't replay {path}: {e}")
+            self._show_message("Replay needs the question bank it was recorded with",
+                               COLORS["RED"], 3000)
+            pygame.quit()
+            sys.exit(1)
+        except (ReplayMismatch, IndexError) as e:
+            # IndexError: an older log without a bank fingerprint names a card this bank lacks
+            print(f"Replay diverged from the log: {e}")
+            self._show_message("Replay diverged from the log", COLORS["RED"], 3000)
+            pygame.quit()
+            sys.exit(1)
+        if engine.state.winner is not None:
+            self.display_winner(self.players[engine.state.winner])
         pygame.quit()
         sys.exit()
 
     def draw_board(self):
-        self.screen.fill(COLORS["BACKGROUND"])
+        started = time.perf_counter_ns()
+        # Static layer (background, path and tiles) is cached between frames
+        if self.static_board is None:
+            self.static_board = self._render_static_board()
+        self.screen.blit(self.static_board, (0, 0))
+
+        # Draw players on their tiles with spacing
+        for i, pos in enumerate(self.board_positions):
+            players_on_tile = [p for p in self.players if p.position == i]
+            for idx, player in enumerate(players_on_tile):
+                row = idx // 3
+                col = idx % 3
+                player_x = pos[0] + 20 + (col * 25)
+                player_y = pos[1] + 35 + (row * 25)
+                
+                # Draw player circle
+                token_rect = pygame.draw.circle(self.screen, player.color, (player_x, player_y), 12)
+                self.display_updates.add(token_rect, player.number)
+                
+                # Draw player number
+                player_num = str(player.number)
+                player_text = self.fonts.render(player_num, 24, COLORS["WHITE"])
+                text_rect = player_text.get_rect(center=(player_x, player_y))
+                self.screen.blit(player_text, text_rect)
+        self.perf.add("draw_board", time.perf_counter_ns() - started)
+
+    def _render_static_board(self):
+        """Render everything on the board that doesn't depend on player positions."""
+        surface = pygame.Surface((self.window_width, self.window_height)).convert()
+        surface.fill(COLORS["BACKGROUND"])
         
         # Draw decorative background pattern
         for i in range(0, self.window_width, 50):
             for j in range(0, self.window_height, 50):
-                pygame.draw.circle(self.screen, (*COLORS["BACKGROUND"], 50), 
+                pygame.draw.circle(surface, (*COLORS["BACKGROUND"], 50), 
                                  (i, j), 3)
         
         # Draw connecting lines between tiles with gradient effect
@@ -583,25 +660,25 @@ class BerachotGame:
                         self.board_positions[i][1] + SPACE_SIZE//2)
             end_pos = (self.board_positions[i + 1][0] + SPACE_SIZE//2, 
                       self.board_positions[i + 1][1] + SPACE_SIZE//2)
-            pygame.draw.line(self.screen, COLORS["BLACK"], start_pos, end_pos, 3)
+            pygame.draw.line(surface, COLORS["BLACK"], start_pos, end_pos, 3)
             # Add decorative dots along the path
             mid_x = (start_pos[0] + end_pos[0]) // 2
             mid_y = (start_pos[1] + end_pos[1]) // 2
-            pygame.draw.circle(self.screen, COLORS["BLACK"], (mid_x, mid_y), 4)
+            pygame.draw.circle(surface, COLORS["BLACK"], (mid_x, mid_y), 4)
         
         # Draw tiles with decorative borders
         for i, pos in enumerate(self.board_positions):
             # Draw tile shadow
             shadow_rect = pygame.Rect(pos[0] + 3, pos[1] + 3, SPACE_SIZE - 5, SPACE_SIZE - 5)
-            pygame.draw.rect(self.screen, (*COLORS["BLACK"], 128), shadow_rect)
+            pygame.draw.rect(surface, (*COLORS["BLACK"], 128), shadow_rect)
             
             # Draw main tile with special pattern for Black Hole
             color = self._get_tile_color(i)
             tile_rect = pygame.Rect(pos[0], pos[1], SPACE_SIZE - 5, SPACE_SIZE - 5)
             
-            if self.board[i] == "Black_Hole":
+            if self.board[i] == TileKind.BLACK_HOLE:
                 # Draw base white background and stripes
-                pygame.draw.rect(self.screen, COLORS["WHITE"], tile_rect)
+                pygame.draw.rect(surface, COLORS["WHITE"], tile_rect)
                 
                 # Draw diagonal stripes contained within tile
                 stripe_spacing = 10
@@ -623,24 +700,24 @@ class BerachotGame:
                         end_x = pos[0] + SPACE_SIZE - 5
                         
                     if start_y <= end_y:
-                        pygame.draw.line(self.screen, COLORS["BLACK_HOLE"],
+                        pygame.draw.line(surface, COLORS["BLACK_HOLE"],
                                        (start_x, start_y),
                                        (end_x, end_y),
                                        stripe_width)
                 
                 # Draw border
-                pygame.draw.rect(self.screen, COLORS["BLACK"], tile_rect, 2)
+                pygame.draw.rect(surface, COLORS["BLACK"], tile_rect, 2)
                 
             else:
-                pygame.draw.rect(self.screen, color, tile_rect)
-                pygame.draw.rect(self.screen, COLORS["BLACK"], tile_rect, 2)
+                pygame.draw.rect(surface, color, tile_rect)
+                pygame.draw.rect(surface, COLORS["BLACK"], tile_rect, 2)
 
             # Draw tile numbers (moved outside the if/else block)
-            number_font = pygame.font.Font(None, 32 if self.board[i] == "Black_Hole" else 24)
-            number_color = COLORS["YELLOW"] if self.board[i] == "Black_Hole" else COLORS["BLACK"]
-            number_text = number_font.render(str(i + 1), True, number_color)
+            number_size = 32 if self.board[i] == TileKind.BLACK_HOLE else 24
+            number_color = COLORS["YELLOW"] if self.board[i] == TileKind.BLACK_HOLE else COLORS["BLACK"]
+            number_text = self.fonts.render(str(i + 1), number_size, number_color)
             number_rect = number_text.get_rect(topleft=(pos[0] + 5, pos[1] + 5))
-            self.screen.blit(number_text, number_rect)
+            surface.blit(number_text, number_rect)
             
             # Draw tile type indicators
             if i == 0:
@@ -648,52 +725,26 @@ class BerachotGame:
             elif i == self.board_size - 1:
                 text = "END"
             else:
-                text = {
-                    "Food": "F",
-                    "Daily": "D",
-                    "Special": "S",
-                    "Star": "★",
-                    "Prayer": "P",
-                    "Black_Hole": "⚫",
-                }.get(self.board[i], "")
+                text = TILE_LETTERS.get(self.board[i], "")
             
             # Draw tile type text
-            type_font = pygame.font.Font(None, 28)
-            type_text = type_font.render(text, True, COLORS["BLACK"])
+            type_text = self.fonts.render(text, 28, COLORS["BLACK"])
             type_rect = type_text.get_rect(center=(pos[0] + SPACE_SIZE//2, pos[1] + SPACE_SIZE//2))
-            self.screen.blit(type_text, type_rect)
+            surface.blit(type_text, type_rect)
             
             # Add small colored indicator in corner for card types
-            if self.board[i] in ["Food", "Daily", "Special"]:
+            if self.board[i] in QUESTION_KINDS:
                 indicator_size = 15
-                pygame.draw.rect(self.screen, 
+                pygame.draw.rect(surface, 
                                self._get_tile_color(i),
                                (pos[0] + SPACE_SIZE - indicator_size - 5,
                                 pos[1] + 5,
                                 indicator_size,
                                 indicator_size))
 
-            # Draw players on the tile with spacing
-            players_on_tile = [p for p in self.players if p.position == i]
-            for idx, player in enumerate(players_on_tile):
-                row = idx // 3
-                col = idx % 3
-                player_x = pos[0] + 20 + (col * 25)
-                player_y = pos[1] + 35 + (row * 25)
-                
-                # Draw player circle
-                pygame.draw.circle(self.screen, player.color, (player_x, player_y), 12)
-                
-                # Draw player number
-                player_num = str(player.number)
-                number_font = pygame.font.Font(None, 24)
-                player_text = number_font.render(player_num, True, COLORS["WHITE"])
-                text_rect = player_text.get_rect(center=(player_x, player_y))
-                self.screen.blit(player_text, text_rect)
-
             # Add special tile indicators
             tile_type = self.board[i]
-            if tile_type == "Star":
+            if tile_type == TileKind.STAR:
                 # Draw star power-up indicator centered in bottom half of tile
                 star_color = COLORS["RED"]
                 star_size = 12
@@ -709,309 +760,315 @@ class BerachotGame:
                     (star_center_x + star_size, star_center_y),  # Right
                     (star_center_x - star_size//2, star_center_y + star_size//2)   # Bottom left
                 ]
-                pygame.draw.polygon(self.screen, star_color, points)
+                pygame.draw.polygon(surface, star_color, points)
             
-            elif tile_type == "Prayer":
+            elif tile_type == TileKind.PRAYER:
                 # Draw prayer power-up indicator centered in bottom half of tile
                 prayer_color = COLORS["PRAYER"]
                 prayer_center_x = pos[0] + SPACE_SIZE//2
                 prayer_center_y = pos[1] + (SPACE_SIZE * 3//4)  # Place in bottom half
                 
-                pygame.draw.circle(self.screen, prayer_color,
+                pygame.draw.circle(surface, prayer_color,
                                  (prayer_center_x, prayer_center_y), 6)
-                pygame.draw.circle(self.screen, COLORS["BLACK"],
+                pygame.draw.circle(surface, COLORS["BLACK"],
                                  (prayer_center_x, prayer_center_y), 6, 1)
 
+        return surface
+
     def _get_tile_color(self, index):
-        tile_type = self.board[index]
-        return {
-            "Food": COLORS["BLUE"],      # Food questions
-            "Daily": COLORS["GREEN"],    # Daily blessings
-            "Special": COLORS["YELLOW"], # Special occasions
-            "Star": COLORS["RED"],       # Power-up tile
-            "Prayer": COLORS["PRAYER"],  # Prayer tile
-            "START": COLORS["WHITE"],
-            "END": COLORS["WHITE"],
-            "Black_Hole": COLORS["BLACK_HOLE"],
-        }.get(tile_type, COLORS["WHITE"])
+        return TILE_COLORS.get(self.board[index], COLORS["WHITE"])
 
     def draw_info_panel(self):
+        if not self.players:
+            return
         current = self.players[self.current_player]
         text = f"Current Player: {current.name}"
-        text_surface = self.font.render(text, True, COLORS["BLACK"])
-        self.screen.blit(text_surface, (50, 50))
+        text_surface = self.fonts.render(text, 32, COLORS["BLACK"])
+        text_rect = self.screen.blit(text_surface, (50, 50))
+        self.display_updates.add(text_rect, text)
 
     def handle_turn(self):
-        current = self.players[self.current_player]
-        
-        # Draw the board first
-        self.draw_board()
-        self.draw_info_panel()
-        
-        # Add a "Roll Dice" button
         roll_button = pygame.Rect(self.window_width - 150, 100, 100, 40)
-        pygame.draw.rect(self.screen, COLORS["BLUE"], roll_button)
-        roll_text = self.font.render("Roll", True, COLORS["WHITE"])
-        roll_rect = roll_text.get_rect(center=roll_button.center)
-        self.screen.blit(roll_text, roll_rect)
-        pygame.display.flip()
 
         # Wait for roll
         waiting_for_roll = True
         while waiting_for_roll:
-            for event in pygame.event.get():
+            # Drawn every time round, like the other screens, so the
+            # window is repainted after it has been resized
+            self.draw_board()
+            self.draw_info_panel()
+            
+            # Add a "Roll Dice" button
+            pygame.draw.rect(self.screen, COLORS["BLUE"], roll_button)
+            roll_text = self.fonts.render("Roll", 32, COLORS["WHITE"])
+            roll_rect = roll_text.get_rect(center=roll_button.center)
+            self.screen.blit(roll_text, roll_rect)
+            self.display_updates.flip()
+
+            for event in self.scheduler.next_events():
                 if event.type == pygame.QUIT:
+                    self.autosave()
+                    self.save_mastery()
+                    self.flush_analytics()
                     pygame.quit()
                     sys.exit()
                 elif event.type == pygame.MOUSEBUTTONDOWN:
                     if roll_button.collidepoint(event.pos):
-                        old_position = current.position
-                        roll = random.randint(1, 6)
-                        self._show_dice_roll(roll)
-                        
-                        # Move player
-                        new_position = min(old_position + roll, self.board_size - 1)
-                        self._animate_player_movement(current, old_position, new_position)
-                        current.position = new_position
-
-                        # Handle tile effects based on where player landed
-                        tile_type = self.board[new_position]
-                        
-                        if tile_type in ["Food", "Daily", "Special"]:
-                            # Get and ask a question
-                            card = self.get_next_question(tile_type)
-                            if self.ask_question(card):
-                                current.correct_answers += 1
-                            else:
-                                move_back = random.randint(1, 3)
-                                self._show_move_back_message(move_back)
-                                new_position = max(0, new_position - move_back)
-                                self._animate_player_movement(current, current.position, new_position)
-                                current.position = new_position
-                        elif tile_type == "Black_Hole":
-                            self._show_black_hole_effect()
-                            new_position = self._find_previous_black_hole(new_position)
-                            self._animate_player_movement(current, current.position, new_position)
-                            current.position = new_position
-                        elif tile_type == "Prayer":
-                            category = self.handle_tile_effect(tile_type, current)
-                            if category:
-                                # Get and ask a question from chosen category
-                                card = self.get_next_question(category)
-                                if self.ask_question(card):
-                                    current.correct_answers += 1
-                                    # Add bonus move for correct answer on prayer tile
-                                    bonus_move = 2
-                                    new_position = min(current.position + bonus_move, self.board_size - 1)
-                                    self._show_special_effect(f"Correct! Move forward {bonus_move} spaces!")
-                                    self._animate_player_movement(current, current.position, new_position)
-                                    current.position = new_position
-                                else:
-                                    self._show_move_back_message(1)
-                                    new_position = max(0, current.position - 1)
-                                    self._animate_player_movement(current, current.position, new_position)
-                                    current.position = new_position
-                        else:
-                            effect = self.handle_tile_effect(tile_type, current)
-                            if effect:
-                                new_position = min(current.position + effect, self.board_size - 1)
-                                self._animate_player_movement(current, current.position, new_position)
-                                current.position = new_position
-
                         waiting_for_roll = False
 
+        # The rules engine plays the turn and this game renders each event
+        self.rules.play_turn(self._answer_card, self._handle_prayer_tile,
+                             listener=self._on_turn_event)
+        if self.event_log:
+            # One write per turn keeps logging off the animation path
+            self.event_log.flush()
+
         # Check for winner
-        if current.position == self.board_size - 1:
-            self.display_winner(current)
+        if self.rules.state.winner is not None:
+            # A finished game can't be resumed
+            delete_snapshot()
+            self.save_mastery()
+            self.flush_analytics()
+            self.display_winner(self.players[self.rules.state.winner])
             return
 
-        # Move to next player
-        self.current_player = (self.current_player + 1) % len(self.players)
-        
+        self.autosave()
+        self.save_mastery()
+
         # Show whose turn is next
         self._show_next_player()
         
         # Redraw board for next player
         self.draw_board()
         self.draw_info_panel()
-        pygame.display.flip()
+        self.display_updates.flip()
+
+    def _on_turn_event(self, event):
+        if self.event_log:
+            self.event_log.record(event, self.rules.state.turns)
+        if self.analytics is not None:
+            response_ms = round(self.response_ns / 1e6) if self.response_ns is not None else None
+            self.analytics.record(event, self.rules.state, response_ms)
+        self._render_turn_event(event)
+
+    def _render_turn_event(self, event):
+        """Show one event coming from the rules engine."""
+        player = self.players[event.player]
+        if event.kind == TurnEvent.ROLL:
+            self._show_dice_roll(event["roll"])
+        elif event.kind == TurnEvent.MOVE:
+            reason = event["reason"]
+            if reason in ("wrong_answer", "prayer_penalty"):
+                self._show_move_back_message(event["spaces"])
+            elif reason == "prayer_bonus":
+                self._show_special_effect(f"Correct! Move forward {event['spaces']} spaces!")
+            elif reason == "star_bonus":
+                self._show_special_effect(f"Move forward {event['spaces']} spaces!")
+            elif reason == "buzz_bonus":
+                self._show_special_effect(f"{player.name} was fastest! Forward {event['spaces']} spaces!")
+            self._animate_player_movement(player, event["start"], event["end"])
+            player.position = event["end"]
+        elif event.kind == TurnEvent.ANSWER:
+            player.correct_answers = self.rules.state.correct_answers[event.player]
+            self.mastery.record(self.mastery.player_index(player.name),
+                                event["card"].card_id, event["correct"])
+        elif event.kind == TurnEvent.BLACK_HOLE:
+            self._show_black_hole_effect()
+        elif event.kind == TurnEvent.STAR:
+            # Show special star effect
+            self._show_special_effect("★ Bonus Move Available! ★")
+        elif event.kind == TurnEvent.NEXT_PLAYER:
+            self.current_player = event.player
+
+    def _answer_card(self, event):
+        self.response_ns = None
+        correct = self.ask_question(event["card"])
+        if self.response_ns is not None:
+            self.latency.record(self.players[event.player].name, event["category"],
+                                self.response_ns // 1000)
+        return correct
 
     def _show_next_player(self):
-        self.screen.fill(COLORS["BACKGROUND"])
         next_player = self.players[self.current_player]
-        
-        # Create fade-in effect
-        for alpha in range(0, 255, 5):
+
+        # Copy the cached text so changing its alpha doesn't affect other users
+        text_surface = self.fonts.render(f"{next_player.name}'s Turn", 32, COLORS["BLACK"]).copy()
+        state = {"alpha": 0}
+
+        # Create fade-in effect, then show the final message for 1 second
+        self.timeline.add(Tween(510, 0, 255, on_update=lambda v: state.update(alpha=v)))
+        self.timeline.add(Tween(1000, delay_ms=510))
+
+        def draw():
             self.screen.fill(COLORS["BACKGROUND"])
-            
+
             # Draw player name with increasing opacity
-            text_surface = self.font.render(f"{next_player.name}'s Turn", True, COLORS["BLACK"])
-            text_surface.set_alpha(alpha)
+            text_surface.set_alpha(int(state["alpha"]))
             text_rect = text_surface.get_rect(center=(self.window_width//2, self.window_height//2))
             self.screen.blit(text_surface, text_rect)
-            
-            pygame.display.flip()
-            pygame.time.wait(10)
-        
-        pygame.time.wait(1000)  # Show final message for 1 second
+            self.display_updates.flip()
+
+        self.play_timeline(draw)
 
     def _show_dice_roll(self, roll):
-        if hasattr(self, 'sound_enabled') and self.sound_enabled:
-            self.roll_sound.play()
-        
-        # Show dice animation
-        for _ in range(10):  # Quick animation
-            temp_roll = random.randint(1, 6)
+        self.audio.play("roll")
+
+        # Quick dice animation through 10 random faces, then the final roll for 1 second
+        faces = [random.randint(1, 6) for _ in range(10)]
+        state = {"text": f"Rolling... {faces[0]}"}
+
+        def show_face(value):
+            if value < len(faces):
+                state["text"] = f"Rolling... {faces[int(value)]}"
+            else:
+                state["text"] = f"You rolled a {roll}!"
+
+        self.timeline.add(Tween(500, 0, len(faces), on_update=show_face))
+        self.timeline.add(Tween(1000, delay_ms=500))
+
+        def draw():
             self.screen.fill(COLORS["BACKGROUND"])
-            roll_text = self.font.render(f"Rolling... {temp_roll}", True, COLORS["BLACK"])
+            roll_text = self.fonts.render(state["text"], 32, COLORS["BLACK"])
             text_rect = roll_text.get_rect(center=(self.window_width//2, self.window_height//2))
             self.screen.blit(roll_text, text_rect)
-            pygame.display.flip()
-            pygame.time.wait(50)
-        
-        # Show final roll
-        self.screen.fill(COLORS["BACKGROUND"])
-        roll_text = self.font.render(f"You rolled a {roll}!", True, COLORS["BLACK"])
-        text_rect = roll_text.get_rect(center=(self.window_width//2, self.window_height//2))
-        self.screen.blit(roll_text, text_rect)
-        pygame.display.flip()
-        pygame.time.wait(1000)
+            self.display_updates.flip()
+
+        self.play_timeline(draw)
 
     def ask_question(self, card: BlessingCard):
+        answer = self.choose_option(card)
+        correct = answer == card.correct_option
+        self._show_result(
+            "Correct!" if correct else "Incorrect!",
+            COLORS["GREEN"] if correct else COLORS["RED"]
+        )
+        return correct
+
+    def choose_option(self, card: BlessingCard) -> int:
+        """Show a card and return the index of the option the player picks.
+
+        Sets response_ns to the time from the card first reaching the screen
+        to the click or key press that answered it.
+        """
         running = True
-        answer_given = False
-        
-        # Calculate the maximum width needed for options
-        max_width = 0
-        option_surfaces = []
-        for option in card.options:
-            option_text = self.font.render(f"{len(option_surfaces) + 1}. {option}", True, COLORS["WHITE"])
-            option_surfaces.append(option_text)
-            max_width = max(max_width, option_text.get_width())
-        
-        # Add padding to the width
-        button_width = max_width + 40  # Add 40 pixels padding
-        button_height = 50  # Increased height for better visibility
-        
-        while running and not answer_given:
+        shown_at = None
+        min_button_height = 50  # Increased height for better visibility
+
+        while running:
             self.screen.fill(COLORS["BACKGROUND"])
-            
-            # Display question - wrap text if too long
-            words = card.question.split()
-            lines = []
-            current_line = []
-            
-            for word in words:
-                test_line = ' '.join(current_line + [word])
-                test_surface = self.font.render(test_line, True, COLORS["BLACK"])
-                if test_surface.get_width() < self.window_width - 100:
-                    current_line.append(word)
-                else:
-                    lines.append(' '.join(current_line))
-                    current_line = [word]
-            lines.append(' '.join(current_line))
-            
-            # Draw wrapped question text
-            question_y = 100
-            for line in lines:
-                question_text = self.font.render(line, True, COLORS["BLACK"])
-                question_rect = question_text.get_rect(midleft=(50, question_y))
-                self.screen.blit(question_text, question_rect)
-                question_y += 40
+
+            # Question and options are wrapped and rendered once, then reused every frame
+            question = self.text.block(card.question, self.window_width - 100, 32, COLORS["BLACK"],
+                                       line_height=40)
+            if question.rtl:
+                question_rect = question.draw(self.screen, topright=(self.window_width - 50, 88))
+            else:
+                question_rect = question.draw(self.screen, topleft=(50, 88))
+            options = [self.text.block(f"{i + 1}. {option}", self.window_width - 200, 32,
+                                       COLORS["WHITE"], align="center")
+                       for i, option in enumerate(card.options)]
 
             # Create clickable option buttons
             option_buttons = []
+            button_width = max(block.surface.get_width() for block in options) + 40  # Add padding
             button_x = (self.window_width - button_width) // 2  # Center buttons horizontally
-            start_y = question_y + 20  # Start buttons below question
-            
-            for i, option_surface in enumerate(option_surfaces):
-                button_rect = pygame.Rect(button_x, start_y + i * (button_height + 10), 
-                                        button_width, button_height)
+            button_y = question_rect.bottom + 20  # Start buttons below question
+
+            for block in options:
+                button_height = max(min_button_height, block.surface.get_height() + 20)
+                button_rect = pygame.Rect(button_x, button_y, button_width, button_height)
                 option_buttons.append(button_rect)
-                
+                button_y += button_height + 10
+
                 # Draw button background
                 pygame.draw.rect(self.screen, COLORS["BLUE"], button_rect)
                 # Draw button text centered in button
-                text_rect = option_surface.get_rect(center=button_rect.center)
-                self.screen.blit(option_surface, text_rect)
+                block.draw(self.screen, center=button_rect.center)
 
-            pygame.display.flip()
+            self.display_updates.flip()
+            if shown_at is None:
+                shown_at = time.perf_counter_ns()
 
-            for event in pygame.event.get():
+            for event in self.scheduler.next_events():
                 if event.type == pygame.QUIT:
+                    self.save_mastery()
+                    self.flush_analytics()
                     pygame.quit()
                     sys.exit()
                 elif event.type == pygame.MOUSEBUTTONDOWN:
                     for i, button in enumerate(option_buttons):
                         if button.collidepoint(event.pos):
-                            correct = i == card.correct_option
-                            self._show_result(
-                                "Correct!" if correct else "Incorrect!", 
-                                COLORS["GREEN"] if correct else COLORS["RED"]
-                            )
-                            answer_given = True
-                            return correct
+                            self.response_ns = self.scheduler.events_at - shown_at
+                            return i
                 elif event.type == pygame.KEYDOWN:
                     if pygame.K_1 <= event.key <= pygame.K_4:
                         answer = event.key - pygame.K_1
                         if answer < len(card.options):
-                            correct = answer == card.correct_option
-                            self._show_result(
-                                "Correct!" if correct else "Incorrect!", 
-                                COLORS["GREEN"] if correct else COLORS["RED"]
-                            )
-                            answer_given = True
-                            return correct
-
-            self.clock.tick(60)
-        return False
+                            self.response_ns = self.scheduler.events_at - shown_at
+                            return answer
+        return -1
 
     def _show_result(self, text, color):
-        if hasattr(self, 'sound_enabled') and self.sound_enabled:
-            if "Correct" in text:
-                self.correct_sound.play()
-            else:
-                self.wrong_sound.play()
+        self.audio.play("correct" if "Correct" in text else "wrong", PRIORITY_RESULT)
         # Display result for 2 seconds
-        self.screen.fill(COLORS["BACKGROUND"])
-        result_text = self.font.render(text, True, color)
-        text_rect = result_text.get_rect(center=(self.window_width//2, self.window_height//2))
-        self.screen.blit(result_text, text_rect)
-        pygame.display.flip()
-        pygame.time.wait(2000)
+        self._show_message(text, color, 2000)
+
+    def _show_message(self, text, color, duration_ms):
+        """Show a centered message for duration_ms while still handling input."""
+        self.timeline.add(Tween(duration_ms))
+
+        def draw():
+            self.screen.fill(COLORS["BACKGROUND"])
+            message = self.text.block(text, self.window_width - 100, 32, color, align="center")
+            message.draw(self.screen, center=(self.window_width//2, self.window_height//2))
+            self.display_updates.flip()
+
+        self.play_timeline(draw)
 
     def display_winner(self, winner: Player):
-        if hasattr(self, 'sound_enabled') and self.sound_enabled:
-            self.win_sound.play()
+        self.audio.play("win", PRIORITY_EVENT)
         
         victory_screen = True
         while victory_screen:
             self.screen.fill(COLORS["BACKGROUND"])
             
             # Draw victory message
-            title_font = pygame.font.Font(None, 64)
-            winner_text = title_font.render(f"{winner.name} Wins!", True, COLORS["BLUE"])
+            winner_text = self.fonts.render(f"{winner.name} Wins!", 64, COLORS["BLUE"])
             text_rect = winner_text.get_rect(center=(self.window_width//2, self.window_height//2))
             self.screen.blit(winner_text, text_rect)
             
             # Draw stats
-            stats_font = pygame.font.Font(None, 32)
-            stats_text = stats_font.render(
+            stats_text = self.fonts.render(
                 f"Correct Answers: {winner.correct_answers}", 
-                True, 
+                32, 
                 COLORS["BLACK"]
             )
             stats_rect = stats_text.get_rect(center=(self.window_width//2, self.window_height//2 + 50))
             self.screen.blit(stats_text, stats_rect)
-            
+
+            # Answer times for everybody, quickest typical answer first
+            times_y = self.window_height//2 + 100
+            for player in sorted(self.players, key=lambda p: self.latency.player(p.name).percentile(50)):
+                times = self.latency.player(player.name)
+                if not times.count:
+                    continue
+                times_text = self.fonts.render(
+                    f"{player.name}: answers in {times.percentile(50) / 1e6:.1f}s "
+                    f"(95% within {times.percentile(95) / 1e6:.1f}s)",
+                    24,
+                    COLORS["BLACK"]
+                )
+                self.screen.blit(times_text, times_text.get_rect(center=(self.window_width//2, times_y)))
+                times_y += 30
+
             # Draw exit instruction
-            exit_text = self.font.render("Press any key to exit", True, COLORS["BLACK"])
-            exit_rect = exit_text.get_rect(center=(self.window_width//2, self.window_height//2 + 100))
+            exit_text = self.fonts.render("Press any key to exit", 32, COLORS["BLACK"])
+            exit_rect = exit_text.get_rect(center=(self.window_width//2, times_y + 20))
             self.screen.blit(exit_text, exit_rect)
             
-            pygame.display.flip()
+            self.display_updates.flip()
             
-            for event in pygame.event.get():
+            for event in self.scheduler.next_events():
                 if event.type == pygame.QUIT:
                     victory_screen = False
                 elif event.type == pygame.KEYDOWN:
@@ -1023,35 +1080,13 @@ class BerachotGame:
         sys.exit()
 
     def _show_move_back_message(self, spaces):
-        self.screen.fill(COLORS["BACKGROUND"])
         message = f"Wrong answer! Moving back {spaces} spaces"
-        text = self.font.render(message, True, COLORS["RED"])
-        text_rect = text.get_rect(center=(self.window_width//2, self.window_height//2))
-        self.screen.blit(text, text_rect)
-        pygame.display.flip()
-        pygame.time.wait(2000)
-
-    def handle_tile_effect(self, tile_type, player):
-        if tile_type == "Star":
-            # Bonus move on correct answer
-            return self._handle_star_tile(player)
-        elif tile_type == "Prayer":
-            # Choose category for next turn
-            return self._handle_prayer_tile(player)
-    
-    def _handle_star_tile(self, player):
-        # Show special star effect
-        self._show_special_effect("★ Bonus Move Available! ★")
-        if self.ask_question(random.choice(self.cards[random.choice(list(self.cards.keys()))])):
-            bonus = random.randint(1, 3)
-            self._show_special_effect(f"Move forward {bonus} spaces!")
-            return bonus
-        return 0
-
-    def _handle_prayer_tile(self, player):
-        """Handle landing on a Prayer tile."""
+        self._show_message(message, COLORS["RED"], 2000)
+
+    def _handle_prayer_tile(self, event):
+        """Let the player choose a question category after landing on a Prayer tile."""
         self._show_special_effect("Prayer Tile - Choose Category")
-        categories = ["Food", "Daily", "Special"]
+        categories = [category.label for category in Category]
         
         # Draw category selection buttons
         button_height = 50
@@ -1076,13 +1111,13 @@ class BerachotGame:
             
             for button, category in buttons:
                 pygame.draw.rect(self.screen, COLORS["BLUE"], button)
-                text = self.font.render(category, True, COLORS["WHITE"])
+                text = self.fonts.render(category, 32, COLORS["WHITE"])
                 text_rect = text.get_rect(center=button.center)
                 self.screen.blit(text, text_rect)
             
-            pygame.display.flip()
+            self.display_updates.flip()
             
-            for event in pygame.event.get():
+            for event in self.scheduler.next_events():
                 if event.type == pygame.MOUSEBUTTONDOWN:
                     for button, category in buttons:
                         if button.collidepoint(event.pos):
@@ -1091,104 +1126,134 @@ class BerachotGame:
         return random.choice(categories)  # Fallback
 
     def _show_special_effect(self, text):
-        self.screen.fill(COLORS["BACKGROUND"])
-        # Create pulsing text effect
-        for size in range(32, 48, 2):
-            effect_font = pygame.font.Font(None, size)
-            effect_text = effect_font.render(text, True, COLORS["YELLOW"])
+        # Create pulsing text effect, then hold it for 1 second
+        state = {"size": 32}
+        self.timeline.add(Tween(400, 32, 46, on_update=lambda v: state.update(size=v)))
+        self.timeline.add(Tween(1000, delay_ms=400))
+
+        def draw():
+            # Keep to even sizes so only a handful of fonts get loaded
+            size = int(state["size"]) // 2 * 2
+            effect_text = self.fonts.render(text, size, COLORS["YELLOW"])
             text_rect = effect_text.get_rect(center=(self.window_width//2, self.window_height//2))
-            
+
             self.screen.fill(COLORS["BACKGROUND"])
             self.screen.blit(effect_text, text_rect)
-            pygame.display.flip()
-            pygame.time.wait(50)
-        
-        pygame.time.wait(1000)
+            self.display_updates.flip()
+
+        self.play_timeline(draw)
 
     def _animate_player_movement(self, player, old_pos, new_pos):
         if old_pos == new_pos:
             return
-            
+
         # Ensure positions are within valid range
         old_pos = max(0, min(old_pos, self.board_size - 1))
         new_pos = max(0, min(new_pos, self.board_size - 1))
-        
+
         # Calculate all positions between old and new
         direction = 1 if new_pos > old_pos else -1
-        positions = range(old_pos, new_pos + direction, direction)
-        
-        for pos in positions:
-            player.position = pos
+        positions = list(range(old_pos, new_pos + direction, direction))
+
+        def step(value):
+            player.position = positions[min(int(value), len(positions) - 1)]
+
+        # Spend 300 ms on each tile to slow down the animation
+        self.timeline.add(Tween(300 * len(positions), 0, len(positions), on_update=step))
+
+        def draw():
+            self.draw_board()
+            self.draw_info_panel()
             # Flash the tile being moved to
-            if 0 <= pos < len(self.board_positions):
-                self._highlight_tile(self.board_positions[pos])
-                self.draw_board()
-                pygame.display.flip()
-                pygame.time.wait(300)  # Slow down animation
+            if 0 <= player.position < len(self.board_positions):
+                self._highlight_tile(self.board_positions[player.position])
+            self.display_updates.present()
+
+        self.play_timeline(draw)
+
+    def play_timeline(self, draw):
+        """Run frames until every tween on the timeline has finished.
+
+        Input is still handled while effects play: SPACE or ENTER skips
+        them and holding TAB fast-forwards.
+        """
+        while self.timeline.busy:
+            draw()
+            for event in self.scheduler.next_events():
+                if event.type == pygame.QUIT:
+                    self.save_mastery()
+                    self.flush_analytics()
+                    pygame.quit()
+                    sys.exit()
+                elif event.type == pygame.KEYDOWN:
+                    if event.key in (pygame.K_SPACE, pygame.K_RETURN):
+                        self.timeline.finish_all()
+                    elif event.key == pygame.K_f:
+                        self.toggle_fullscreen()
+            self.timeline.speed = 4.0 if pygame.key.get_pressed()[pygame.K_TAB] else 1.0
+            # Clamp the step so a long stall doesn't jump straight to the end
+            self.timeline.update(min(self.clock.get_time(), 100))
 
     def _highlight_tile(self, pos):
         highlight = pygame.Surface((SPACE_SIZE, SPACE_SIZE), pygame.SRCALPHA)
         pygame.draw.rect(highlight, (*COLORS["YELLOW"], 128),
                         (0, 0, SPACE_SIZE, SPACE_SIZE))
-        self.screen.blit(highlight, pos)
+        highlight_rect = self.screen.blit(highlight, pos)
+        self.display_updates.add(highlight_rect, "highlight")
 
     def get_next_question(self, category):
-        """Get next question avoiding recent repeats."""
-        available_questions = []
-        all_questions = self.cards[category]
-        
-        # Get questions that haven't been used recently
-        for i, question in enumerate(all_questions):
-            if i not in self.question_history[category]:
-                available_questions.append((i, question))
-        
-        # If running low on questions, clear older history
-        if len(available_questions) < 3:  # Changed threshold
-            self.question_history[category] = self.question_history[category][
-                -min(len(all_questions) // 2, self.min_questions_before_repeat):]
-            # Rebuild available questions
-            available_questions = [(i, q) for i, q in enumerate(all_questions)
-                                 if i not in self.question_history[category]]
-        
-        # Select random question
-        index, question = random.choice(available_questions)
-        self.question_history[category].append(index)
-        
-        return question
-
-    def _find_previous_black_hole(self, current_pos):
-        """Find the position of the previous black hole tile."""
-        # Look for previous black hole
-        for pos in range(current_pos - 1, -1, -1):
-            if self.board[pos] == "Black_Hole":
-                return pos
-                
-        # If no previous black hole found (we're at first black hole), return START
-        return 0  # Send player back to START if at first black hole
+        """Get next question avoiding recent repeats, at the current player's level."""
+        player = self.mastery.player_index(self.players[self.rules.state.current_player].name)
+        card_id = self.question_sampler.draw(
+            category, score=lambda card_id: self.mastery.score(player, card_id))
+        return self.cards.card(card_id)
 
     def _show_black_hole_effect(self):
         """Display black hole effect animation."""
-        self.screen.fill(COLORS["BACKGROUND"])
         text = "Black Hole! Moving back..."
-        
-        # Create swirl effect
-        center_x, center_y = self.window_width // 2, self.window_height // 2
-        for radius in range(100, 0, -5):
+        state = {"radius": 100}
+
+        # Create swirl effect, then hold the last frame for 1 second
+        self.timeline.add(Tween(1000, 100, 5, on_update=lambda v: state.update(radius=v),
+                                easing=ease_out_quad))
+        self.timeline.add(Tween(1000, delay_ms=1000))
+
+        def draw():
+            center_x, center_y = self.window_width // 2, self.window_height // 2
+            radius = int(state["radius"])
             self.screen.fill(COLORS["BACKGROUND"])
-            pygame.draw.circle(self.screen, COLORS["BLACK_HOLE"], 
+            pygame.draw.circle(self.screen, COLORS["BLACK_HOLE"],
                              (center_x, center_y), radius)
-            
+
             if radius < 50:
-                effect_text = self.font.render(text, True, COLORS["WHITE"])
+                effect_text = self.fonts.render(text, 32, COLORS["WHITE"])
                 text_rect = effect_text.get_rect(center=(center_x, center_y))
                 self.screen.blit(effect_text, text_rect)
-            
-            pygame.display.flip()
-            pygame.time.wait(50)
-        
-        pygame.time.wait(1000)
+
+            self.display_updates.flip()
+
+        self.play_timeline(draw)
 
 
 if __name__ == "__main__":
-    game = BerachotGame()
-    game.run_game( )
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Berachot board game")
+    parser.add_argument("--replay", metavar="LOG", help="Play back a recorded event log")
+    parser.add_argument("--no-sound", action="store_true", help="Don't open the audio device")
+    parser.add_argument("--profile", type=int, metavar="FRAMES",
+                        help="Profile the first FRAMES frames with cProfile (Shift+P in game "
+                             "profiles this many frames at any time)")
+    args = parser.parse_args()
+
+    if args.replay:
+        game = BerachotGame(board=read_log(args.replay)[0]["board"], sound=not args.no_sound)
+    else:
+        game = BerachotGame(sound=not args.no_sound)
+    if args.profile:
+        game.profile_frames = args.profile
+        game.perf.capture(args.profile)
+    if args.replay:
+        game.replay_log(args.replay)
+    else:
+        game.run_game()
@@ -0,0 +1,88 @@
+"""Buzz-in judging for LAN games: who answered a card first, fairly.
+
+Every client stamps its answer with its own monotonic clock. The server
+keeps a ClockSync per client from ping/pong round trips (NTP style: the
+sample with the shortest round trip gives the best offset estimate) and
+uses it to turn the client's stamp into server time. A BuzzRound then
+measures each answer from the moment the card reached that client, so a
+student on slow Wi-Fi isn't beaten by one sitting next to the server.
+"""
+import time
+from collections import deque
+
+
+def monotonic():
+    """The clock used for all buzz-in timestamps, in seconds."""
+    return time.perf_counter_ns() / 1e9
+
+
+class ClockSync:
+    """Offset between one client's clock and the server's."""
+
+    def __init__(self, window=16):
+        self.samples = deque(maxlen=window)  # (round trip, offset)
+
+    def add(self, sent, client_time, received):
+        """Record a ping sent at server time sent and answered at client_time."""
+        round_trip = received - sent
+        if round_trip >= 0:
+            self.samples.append((round_trip, client_time - (sent + received) / 2))
+
+    @property
+    def synced(self):
+        return bool(self.samples)
+
+    @property
+    def offset(self):
+        """Client clock minus server clock."""
+        return min(self.samples)[1] if self.samples else 0.0
+
+    @property
+    def one_way_delay(self):
+        return min(self.samples)[0] / 2 if self.samples else 0.0
+
+    def to_server_time(self, client_time):
+        return client_time - self.offset
+
+
+class BuzzRound:
+    """Answers to one card from every player, and who got it right first."""
+
+    def __init__(self, card, opened_at, seats):
+        self.card = card
+        self.opened_at = opened_at  # Server time the card was sent out
+        self.seats = set(seats)     # Players expected to answer
+        self.answers = {}           # seat -> (correct, seconds taken)
+
+    def add(self, seat, option, client_time, received_at, clock):
+        """Judge one answer; later answers from the same seat are ignored."""
+        if seat in self.answers:
+            return
+        shown_at = self.opened_at + clock.one_way_delay
+        answered_at = clock.to_server_time(client_time) if clock.synced else received_at
+        # Nobody can answer before the card reached them or after we got the answer
+        answered_at = min(max(answered_at, shown_at), received_at)
+        self.answers[seat] = (option == self.card.correct_option, answered_at - shown_at)
+
+    @property
+    def complete(self):
+        return self.seats <= set(self.answers)
+
+    def has_correct(self, exclude=None):
+        """True once a seat other than exclude has answered correctly."""
+        return any(correct for seat, (correct, _) in self.answers.items() if seat != exclude)
+
+    def answered(self, seat):
+        return seat in self.answers
+
+    def correct(self, seat):
+        return self.answers.get(seat, (False, None))[0]
+
+    def fastest_correct(self, exclude=None):
+        """Seat with the quickest correct answer, or None."""
+        times = [(taken, seat) for seat, (correct, taken) in self.answers.items()
+                 if correct and seat != exclude]
+        return min(times)[1] if times else None
+
+    def times_ms(self):
+        return {seat: round(taken * 1000) for seat, (_, taken) in self.answers.items()}
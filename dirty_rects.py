@@ -0,0 +1,126 @@
+import time
+
+import pygame
+
+
+class DirtyRectTracker:
+    """Pushes only the changed parts of the screen to the display.
+
+    Each frame the game registers the dynamic elements it drew with add().
+    present() compares them with the previous frame and calls
+    pygame.display.update() for the areas that appeared, disappeared or
+    changed. A full flip is used when the mode is off or after invalidate().
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.needs_full_update = True
+        self.previous = set()
+        self.current = set()
+        # Per-frame statistics
+        self.last_area = 0
+        self.total_area = 0
+        self.frames = 0
+        self.perf = None  # PerfHud that times flips and draws its overlay
+        self.viewport = None  # Viewport that scales the logical screen to the window
+        self._viewport_changes = 0
+
+    def add(self, rect, content=None):
+        """Register a dynamic element drawn this frame, identified by its content."""
+        rect = pygame.Rect(rect)
+        self.current.add((rect.x, rect.y, rect.w, rect.h, content))
+
+    def invalidate(self):
+        """Force a full-window update on the next present()."""
+        self.needs_full_update = True
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.invalidate()
+        self.reset_stats()
+
+    def flip(self):
+        """Full flip for screens drawn outside the tracked board frames."""
+        self._draw_overlay()
+        started = time.perf_counter_ns()
+        self._show()
+        self._timed(started)
+        self._record(self._screen_area())
+        self.previous = set()
+        self.current = set()
+        self.needs_full_update = True
+
+    def present(self):
+        self._draw_overlay()
+        changed = self.previous ^ self.current
+        self.previous = self.current
+        self.current = set()
+        started = time.perf_counter_ns()
+
+        if self.viewport is not None and self.viewport.changes != self._viewport_changes:
+            # The window was resized or replaced; the old rects mean nothing there
+            self._viewport_changes = self.viewport.changes
+            self.needs_full_update = True
+        if not self.enabled or self.needs_full_update:
+            self._show()
+            self.needs_full_update = False
+            self._timed(started)
+            self._record(self._screen_area())
+            return
+
+        rects = [pygame.Rect(x, y, w, h) for x, y, w, h, _ in changed]
+        if rects:
+            self._show(rects)
+        self._timed(started)
+        self._record(sum(rect.w * rect.h for rect in rects))
+
+    def _show(self, rects=None):
+        if self.viewport is not None:
+            self.viewport.present(rects)
+        elif rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(rects)
+
+    def _surface(self):
+        if self.viewport is not None:
+            return self.viewport.surface
+        return pygame.display.get_surface()
+
+    def _draw_overlay(self):
+        if self.perf and self.perf.visible:
+            surface = self._surface()
+            if surface is not None:
+                # The frame number as content makes the overlay update every frame
+                self.add(self.perf.draw(surface), ("perf", self.perf.frames))
+
+    def _timed(self, started):
+        if self.perf:
+            self.perf.add("flip", time.perf_counter_ns() - started)
+
+    def reset_stats(self):
+        self.last_area = 0
+        self.total_area = 0
+        self.frames = 0
+
+    def report(self):
+        """Describe how much of the window was updated per frame on average."""
+        screen_area = self._screen_area()
+        if not self.frames or not screen_area:
+            return "no frames"
+        average = self.total_area / self.frames
+        mode = "dirty rects" if self.enabled else "full flips"
+        return (f"{mode}: last {self.last_area / screen_area:.1%}, "
+                f"avg {average / screen_area:.1%} of window per frame")
+
+    def _record(self, area):
+        self.last_area = area
+        self.total_area += area
+        self.frames += 1
+
+    def _screen_area(self):
+        surface = self._surface()
+        if surface is None:
+            return 0
+        width, height = surface.get_size()
+        return width * height
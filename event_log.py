@@ -0,0 +1,243 @@
+"""Append-only turn event logs and deterministic replay.
+
+A log is a JSONL file. The first line is a header with the board, the
+player names, the seed of the rules engine's dice and any RulesEngine
+options (such as buzz_in); every following line
+is one TurnEvent from rules.RulesEngine plus the turn number it belongs to.
+Cards are stored by card id, so the header also holds the question bank's
+fingerprint (QuestionBank.fingerprint()). When a saved game is resumed, a
+"resume" record holds the engine state the game carried on from.
+
+Replaying feeds the logged answers, category choices and cards back into a
+RulesEngine seeded from the header and checks that it produces exactly the
+logged events, so a log from a classroom reproduces the game it came from.
+"""
+import json
+import os
+import random
+import time
+
+from rules import RulesEngine, TurnEvent
+from snapshot import rng_state_from_json, rng_state_to_json
+
+FORMAT = "berachot-events"
+VERSION = 1
+
+DEFAULT_LOG_DIR = os.path.join(os.path.expanduser("~"), ".berachot_game", "logs")
+
+
+def new_log_path(log_dir=DEFAULT_LOG_DIR):
+    """A log file name for a game starting now that no other log uses."""
+    stem = os.path.join(log_dir, time.strftime("game-%Y%m%d-%H%M%S"))
+    path, n = stem + ".jsonl", 1
+    while os.path.exists(path):
+        n += 1
+        path = f"{stem}-{n}.jsonl"
+    return path
+
+
+def event_record(event, turn):
+    """JSON-friendly form of a TurnEvent, with the card replaced by its id."""
+    record = {"turn": turn, **event.to_dict()}
+    if "card" in record:
+        record["card"] = getattr(record["card"], "card_id", record["card"])
+    return record
+
+
+class EventLog:
+    """Buffered writer; each turn's events reach the file in one write."""
+
+    def __init__(self, path, board=None, player_names=None, seed=None, rules=None, bank=None,
+                 buffer_size=1 << 16):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, "a", buffering=buffer_size, encoding="utf-8")
+        if is_new:
+            self._write({"format": FORMAT, "version": VERSION, "seed": seed,
+                         "board": board, "players": player_names, "rules": rules or {},
+                         "bank": bank})
+            self.flush()
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def record(self, event, turn):
+        self._write(event_record(event, turn))
+
+    def resume(self, engine):
+        """Note that the game carries on from a snapshot of engine."""
+        state = engine.state
+        self._write({"kind": "resume", "turn": state.turns, "positions": state.positions,
+                     "correct_answers": state.correct_answers,
+                     "current_player": state.current_player,
+                     "rng_state": rng_state_to_json(engine.rng)})
+        self.flush()
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def read_log(path):
+    """Return (header, records) from a log file."""
+    with open(path, encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    if not lines or lines[0].get("format") != FORMAT:
+        raise ValueError(f"{path} is not a Berachot event log")
+    if lines[0]["version"] != VERSION:
+        raise ValueError(f"{path} is a version {lines[0]['version']} log; expected {VERSION}")
+    return lines[0], lines[1:]
+
+
+def logged_turns(records):
+    """Split records into ("turn", events) and ("resume", record) items.
+
+    A turn cut short by a crash is dropped: the game carried on (if at all)
+    from the snapshot taken before that turn.
+    """
+    def drop_unfinished_turn():
+        if items and items[-1][0] == "turn" and items[-1][1][-1]["kind"] not in (
+                TurnEvent.NEXT_PLAYER, TurnEvent.WIN):
+            items.pop()
+
+    items = []
+    for record in records:
+        if record["kind"] == "resume":
+            drop_unfinished_turn()
+            items.append(("resume", record))
+        elif items and items[-1][0] == "turn" and items[-1][1][0]["turn"] == record["turn"]:
+            items[-1][1].append(record)
+        else:
+            items.append(("turn", [record]))
+    drop_unfinished_turn()
+    return items
+
+
+class ReplayMismatch(Exception):
+    def __init__(self, turn, expected, actual):
+        super().__init__(f"Turn {turn}: expected {expected}, got {actual}")
+        self.turn = turn
+        self.expected = expected
+        self.actual = actual
+
+
+class BankMismatch(ValueError):
+    """The log's cards came from a different question bank than the one given."""
+
+
+def check_bank(header, fingerprint):
+    """Raise BankMismatch unless the log was recorded with this bank.
+
+    Logs from before banks were recorded can't be checked and pass.
+    """
+    logged = header.get("bank")
+    if logged is None:
+        return
+    if (logged["cards"], logged["sha1"]) != (fingerprint["cards"], fingerprint["sha1"]):
+        raise BankMismatch(f"The log was recorded with the question bank {logged['path']} "
+                           f"({logged['cards']} cards), which has been changed or replaced")
+
+
+class LoggedChoices:
+    """Strategies that give back the answers, categories, buzz-in winners and
+    cards from one logged turn."""
+
+    def __init__(self, events, card_lookup=None):
+        self.answers = [e["correct"] for e in events if e["kind"] == TurnEvent.ANSWER]
+        self.cards = [e["card"] for e in events if e["kind"] == TurnEvent.QUESTION]
+        following = events[1:] + [{"kind": None}]
+        self.categories = [after["category"] for e, after in zip(events, following)
+                           if e["kind"] == TurnEvent.CHOOSE_CATEGORY]
+        self.buzz_winners = [after["player"] if after.get("reason") == "buzz_bonus" else None
+                             for e, after in zip(events, following) if e["kind"] == TurnEvent.BUZZ]
+        self.card_lookup = card_lookup or (lambda card_id: card_id)
+
+    def draw_card(self, category):
+        return self.card_lookup(self.cards.pop(0)) if self.cards else None
+
+    def answer(self, event):
+        return self.answers.pop(0) if self.answers else False
+
+    def choose_category(self, event):
+        return self.categories.pop(0) if self.categories else None
+
+    def buzz(self, event):
+        return self.buzz_winners.pop(0) if self.buzz_winners else None
+
+
+def restore_engine(engine, record):
+    state = engine.state
+    state.positions = list(record["positions"])
+    state.correct_answers = list(record["correct_answers"])
+    state.current_player = record["current_player"]
+    state.turns = record["turn"]
+    rng_state_from_json(engine.rng, record["rng_state"])
+
+
+def replay_engine(header, **kwargs):
+    """A fresh RulesEngine set up like the one that wrote the log."""
+    return RulesEngine(header["board"], len(header["players"]), rng=random.Random(header["seed"]),
+                       **header.get("rules", {}), **kwargs)
+
+
+def replay(path, listener=None, card_lookup=None, engine=None, after_turn=None, bank=None):
+    """Re-run a log through the rules and return the engine at the end.
+
+    listener sees every replayed event and after_turn is called after each
+    turn (both for rendering); card_lookup turns logged card ids into the
+    objects the listener expects. engine defaults to replay_engine(header).
+    With bank (the card_lookup's fingerprint) it raises BankMismatch first
+    if the log's cards came from another bank. Raises ReplayMismatch at the
+    first event that differs from the log.
+    """
+    header, records = read_log(path)
+    if bank is not None:
+        check_bank(header, bank)
+    engine = engine or replay_engine(header)
+    for kind, item in logged_turns(records):
+        if kind == "resume":
+            restore_engine(engine, item)
+            continue
+        choices = LoggedChoices(item, card_lookup)
+        engine.draw_card = choices.draw_card
+        turn = engine.state.turns + 1
+        events = engine.play_turn(choices.answer, choices.choose_category, listener=listener,
+                                  buzz=choices.buzz)
+        actual = [event_record(event, turn) for event in events]
+        for expected_record, actual_record in zip(item, actual):
+            if expected_record != actual_record:
+                raise ReplayMismatch(turn, expected_record, actual_record)
+        if len(item) != len(actual):
+            raise ReplayMismatch(turn, f"{len(item)} events", f"{len(actual)} events")
+        if after_turn:
+            after_turn(engine)
+    return engine
+
+
+if __name__ == "__main__":
+    import argparse
+    import glob
+
+    parser = argparse.ArgumentParser(description="Replay event logs and check they still match the rules")
+    parser.add_argument("logs", nargs="+", help="Log files or glob patterns")
+    args = parser.parse_args()
+
+    paths = [p for pattern in args.logs for p in sorted(glob.glob(pattern)) or [pattern]]
+    failures = 0
+    start = time.perf_counter()
+    for path in paths:
+        try:
+            engine = replay(path)
+        except (ReplayMismatch, ValueError, OSError) as e:
+            failures += 1
+            print(f"FAIL {path}: {e}")
+        else:
+            winner = engine.state.winner
+            print(f"ok   {path}: {engine.state.turns} turns, "
+                  f"{'winner seat ' + str(winner + 1) if winner is not None else 'unfinished'}")
+    print(f"{len(paths) - failures}/{len(paths)} logs replayed in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,59 @@
+import pygame
+from collections import OrderedDict
+
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024  # Cap for cached text surfaces (8 MB)
+
+
+class FontCache:
+    """Shared fonts keyed by size plus an LRU cache of rendered text surfaces.
+
+    Surfaces returned by render() are shared between callers, so copy them
+    before changing alpha or drawing on them.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+        self.cached_bytes = 0
+        # Counters used to check that allocations stay flat between frames
+        self.fonts_created = 0
+        self.surfaces_created = 0
+        self.hits = 0
+
+    def get_font(self, size):
+        """Return the default font at the given size, loading it only once."""
+        font = self.fonts.get(size)
+        if font is None:
+            font = pygame.font.Font(None, size)
+            self.fonts[size] = font
+            self.fonts_created += 1
+        return font
+
+    def render(self, text, size, color):
+        """Return a rendered text surface, reusing a cached one if possible."""
+        key = (text, size, tuple(color))
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        surface = self.get_font(size).render(text, True, color)
+        self.surfaces_created += 1
+        self.surfaces[key] = surface
+        self.cached_bytes += self._surface_bytes(surface)
+
+        # Evict least recently used surfaces once over the memory cap
+        while self.cached_bytes > self.max_bytes and len(self.surfaces) > 1:
+            _, old_surface = self.surfaces.popitem(last=False)
+            self.cached_bytes -= self._surface_bytes(old_surface)
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+        self.cached_bytes = 0
+
+    @staticmethod
+    def _surface_bytes(surface):
+        return surface.get_width() * surface.get_height() * surface.get_bytesize()
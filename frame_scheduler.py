@@ -0,0 +1,64 @@
+import time
+
+import pygame
+
+IDLE_TIMEOUT_MS = 1000  # Longest time an idle screen sleeps between redraws
+
+
+class FrameScheduler:
+    """Runs screens at full frame rate only while something is animating.
+
+    Every game loop fetches its events through next_events(). When nothing is
+    animating the call blocks in pygame.event.wait() until input arrives (or
+    the idle timeout passes), so idle screens use almost no CPU.
+    """
+
+    def __init__(self, clock, fps=60, idle_timeout_ms=IDLE_TIMEOUT_MS):
+        self.clock = clock
+        self.fps = fps
+        self.idle_timeout_ms = idle_timeout_ms
+        self.animations = 0
+        # perf_counter_ns() when the last batch of events was picked up
+        self.events_at = time.perf_counter_ns()
+        self.perf = None  # PerfHud told about every frame, if profiling
+        self.viewport = None  # Viewport that mouse positions are mapped through
+        # Nothing in the game reacts to mouse motion, so don't wake up for it
+        pygame.event.set_blocked(pygame.MOUSEMOTION)
+
+    @property
+    def active(self):
+        return self.animations > 0
+
+    def start_animation(self):
+        self.animations += 1
+
+    def stop_animation(self):
+        self.animations = max(0, self.animations - 1)
+
+    def next_events(self):
+        """Return pending events, sleeping until input arrives when idle."""
+        # Every screen loop calls this once per frame, so it marks frame boundaries
+        if self.perf:
+            self.perf.end_frame()
+            started = time.perf_counter_ns()
+        if not self.active:
+            event = pygame.event.wait(self.idle_timeout_ms)
+            events = [] if event.type == pygame.NOEVENT else [event]
+            events.extend(pygame.event.get())
+            self.events_at = time.perf_counter_ns()
+            # Bursts of input still can't push the loop past the frame rate
+            self.clock.tick(self.fps)
+        else:
+            self.clock.tick(self.fps)
+            events = pygame.event.get()
+            self.events_at = time.perf_counter_ns()
+        if self.viewport is not None:
+            for event in events:
+                if event.type == pygame.VIDEORESIZE:
+                    # Refit here so every screen's loop picks up the new size
+                    self.viewport.set_window(pygame.display.get_surface())
+                elif event.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
+                    event.pos = self.viewport.to_logical(event.pos)
+        if self.perf:
+            self.perf.add("wait", time.perf_counter_ns() - started)
+        return events
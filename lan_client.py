@@ -0,0 +1,315 @@
+"""Clients for lan_server.py.
+
+LanClient is the asyncio side: it sends requests and keeps a copy of the
+room state up to date from the server's full state and diff messages.
+play_bot() drives a LanClient with random answers, which is enough to run
+whole games against a server over loopback. ThinClient is the pygame
+client a student runs on their own device; it reuses BerachotGame's
+drawing and runs the network connection on a background thread.
+"""
+import asyncio
+import json
+import queue
+import random
+import threading
+
+import pygame
+
+from blessing_journey import COLORS, BerachotGame, Player
+from buzz_in import monotonic
+from lan_server import DEFAULT_PORT, encode
+from question_bank import BlessingCard
+from rules import QUESTION_CATEGORIES, RulesEngine, TurnEvent
+
+
+class LanClient:
+    def __init__(self):
+        self.reader = None
+        self.writer = None
+        self.room = None
+        self.seat = None
+        self.board = None
+        self.state = {}
+        self.version = 0
+
+    async def connect(self, host="127.0.0.1", port=DEFAULT_PORT):
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        return self
+
+    async def send(self, message):
+        self.writer.write(encode(message))
+        await self.writer.drain()
+
+    async def join(self, room, name):
+        await self.send({"type": "join", "room": room, "name": name})
+
+    async def receive(self, apply=True):
+        """Next message from the server (None once disconnected).
+
+        With apply=False the caller must pass it to apply() itself, for
+        example on the thread that reads the state.
+        """
+        line = await self.reader.readline()
+        if not line:
+            return None
+        message = json.loads(line)
+        if message["type"] == "ping":
+            # Answer straight away; the delay is what the server measures
+            await self.send({"type": "pong", "sent": message["sent"], "client_time": monotonic()})
+        if apply:
+            self.apply(message)
+        return message
+
+    def apply(self, message):
+        kind = message["type"]
+        if kind == "joined":
+            self.room = message["room"]
+            self.seat = message["seat"]
+            self.board = message["board"]
+        elif kind == "state":
+            self.state = dict(message["state"])
+            self.version = message["version"]
+        elif kind == "diff" and message["version"] > self.version:
+            self.state.update(message["changes"])
+            self.version = message["version"]
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def play_bot(room, name, host="127.0.0.1", port=DEFAULT_PORT, start_with=0, rng=None,
+                   buzz_in=None):
+    """Play a whole game with random answers; return the final room state.
+
+    The first player in the room starts the game once start_with players
+    have joined (0 means don't start it), in buzz-in mode if buzz_in is set.
+    """
+    rng = rng or random.Random()
+    client = await LanClient().connect(host, port)
+    await client.join(room, name)
+    started = False
+    while True:
+        message = await client.receive()
+        if message is None:
+            break
+        kind = message["type"]
+        if kind == "error":
+            raise RuntimeError(message["message"])
+        if (not started and client.seat == 0 and start_with
+                and len(client.state.get("players", ())) >= start_with):
+            started = True
+            await client.send({"type": "start", "buzz_in": buzz_in})
+        if kind == "prompt" and message["prompt"] == "buzz":
+            option = rng.randrange(len(message["card"]["options"]))
+            await client.send({"type": "buzz", "option": option, "at": monotonic()})
+        elif kind == "prompt" and message["seat"] == client.seat:
+            if message["prompt"] == "roll":
+                await client.send({"type": "roll"})
+            elif message["prompt"] == "question":
+                option = rng.randrange(len(message["card"]["options"]))
+                await client.send({"type": "answer", "option": option})
+            elif message["prompt"] == "category":
+                await client.send({"type": "category", "category": rng.choice(QUESTION_CATEGORIES)})
+        if client.state.get("phase") == "over":
+            break
+    await client.close()
+    return client.state
+
+
+class ThinClient:
+    """pygame client: shows the shared board and answers for one student."""
+
+    def __init__(self, host, port, room, name):
+        self.host = host
+        self.port = port
+        self.room = room
+        self.name = name
+        self.client = LanClient()
+        self.incoming = queue.Queue()
+        self.loop = asyncio.new_event_loop()
+        self.game = None
+        self.my_roll = False
+        self.status = ""
+
+    def _run_network(self):
+        self.loop.run_until_complete(self._network())
+
+    async def _network(self):
+        try:
+            await self.client.connect(self.host, self.port)
+            await self.client.join(self.room, self.name)
+            while True:
+                message = await self.client.receive(apply=False)
+                self.incoming.put(message)
+                # Wake the pygame loop if it's idling in event.wait()
+                pygame.event.post(pygame.event.Event(pygame.USEREVENT))
+                if message is None:
+                    break
+        except OSError as e:
+            self.incoming.put({"type": "error", "message": f"Connection failed: {e}"})
+            self.incoming.put(None)
+
+    def send(self, message):
+        asyncio.run_coroutine_threadsafe(self.client.send(message), self.loop)
+
+    def run(self):
+        threading.Thread(target=self._run_network, daemon=True).start()
+        # Wait until the server has given us a seat and the board
+        while self.client.seat is None:
+            message = self.incoming.get()
+            if message is None:
+                return
+            if message["type"] == "error":
+                print(message["message"])
+                continue
+            self.client.apply(message)
+
+        self.game = BerachotGame(board=self.client.board)
+        self.game.board_positions = self.game.calculate_board_positions()
+        self._sync()
+        while True:
+            while not self.incoming.empty():
+                message = self.incoming.get()
+                if message is None:
+                    self.status = "Disconnected from the server"
+                    self.my_roll = False
+                    break
+                self._handle(message)
+            self._draw()
+            for event in self.game.scheduler.next_events():
+                if event.type == pygame.QUIT:
+                    return
+                self._handle_input(event)
+
+    def _sync(self):
+        """Bring the game's players and the rules state mirror up to date."""
+        state = self.client.state
+        names = state.get("players", [])
+        if [p.name for p in self.game.players] != names:
+            self.game.players = [Player(name, i + 1) for i, name in enumerate(names)]
+        if "positions" in state:
+            if getattr(self.game, "rules", None) is None:
+                # Only used as a mirror of the server's state for the drawing code
+                self.game.rules = RulesEngine(self.client.board, len(names), tables=self.game.board_tables)
+            game_state = self.game.rules.state
+            game_state.positions = list(state["positions"])
+            game_state.correct_answers = list(state["correct_answers"])
+            game_state.current_player = self.game.current_player = state["current_player"]
+            for player, position, correct in zip(self.game.players, state["positions"],
+                                                 state["correct_answers"]):
+                player.position = position
+                player.correct_answers = correct
+
+    def _handle(self, message):
+        game = self.game
+        kind = message["type"]
+        self.client.apply(message)
+        if kind in ("state", "diff"):
+            self._sync()
+            if self.client.state.get("phase") == "over":
+                winner = self.client.state["winner"]
+                self.status = f"{self.client.state['players'][winner]} wins!"
+                times = self.client.state.get("latency", {}).get(self.name)
+                if times and times["count"]:
+                    self.status += (f" You answered in {times['p50_ms'] / 1000:.1f}s "
+                                    f"(95% within {times['p95_ms'] / 1000:.1f}s)")
+        elif kind == "error":
+            game._show_message(message["message"], COLORS["RED"], 1500)
+        elif kind == "event":
+            event = TurnEvent(message["kind"], message["player"],
+                              **{k: v for k, v in message.items() if k not in ("type", "kind", "player")})
+            name = game.players[event.player].name
+            buzz_in = self.client.state.get("buzz_in")
+            if event.kind == TurnEvent.QUESTION and event.player != self.client.seat and not buzz_in:
+                game._show_message(f"{name}: {event['card']['question']}", COLORS["BLACK"], 1500)
+            elif event.kind == TurnEvent.ANSWER:
+                correct = event["correct"]
+                text = "Correct!" if correct else "Incorrect!"
+                if event.player != self.client.seat:
+                    text = f"{name}: {text}"
+                game._show_result(text, COLORS["GREEN"] if correct else COLORS["RED"])
+            elif event.kind in (TurnEvent.QUESTION, TurnEvent.CHOOSE_CATEGORY, TurnEvent.BUZZ,
+                                TurnEvent.WIN):
+                pass
+            else:
+                game._render_turn_event(event)
+        elif kind == "buzz_result":
+            if message["fastest"] is not None:
+                fastest = message["fastest"]
+                seconds = message["times_ms"][str(fastest)] / 1000
+                game._show_message(f"Fastest: {game.players[fastest].name} ({seconds:.2f}s)",
+                                   COLORS["BLUE"], 1500)
+        elif kind == "prompt":
+            mine = message["seat"] == self.client.seat
+            self.my_roll = mine and message["prompt"] == "roll"
+            if message["prompt"] == "buzz":
+                # Everybody answers; the time is taken as soon as an option is picked
+                card = message["card"]
+                option = game.choose_option(BlessingCard(card["question"], card["options"], -1,
+                                                         card["category"], card["id"]))
+                self.send({"type": "buzz", "option": option, "at": monotonic()})
+            elif mine and message["prompt"] == "question":
+                card = message["card"]
+                option = game.choose_option(BlessingCard(card["question"], card["options"], -1,
+                                                         card["category"], card["id"]))
+                self.send({"type": "answer", "option": option})
+            elif mine and message["prompt"] == "category":
+                self.send({"type": "category", "category": game._handle_prayer_tile(None)})
+
+    def _roll_button(self):
+        return pygame.Rect(self.game.window_width - 150, 100, 100, 40)
+
+    def _draw(self):
+        game = self.game
+        game.draw_board()
+        game.draw_info_panel()
+        state = self.client.state
+        status = self.status
+        if state.get("phase") == "lobby":
+            status = "Waiting for players: " + ", ".join(state.get("players", []))
+            if self.client.seat == 0:
+                status += " - press S to start, B for buzz-in"
+        elif self.my_roll:
+            button = self._roll_button()
+            pygame.draw.rect(game.screen, COLORS["BLUE"], button)
+            text = game.fonts.render("Roll", 32, COLORS["WHITE"])
+            game.screen.blit(text, text.get_rect(center=button.center))
+        if status:
+            text = game.fonts.render(status, 32, COLORS["BLACK"])
+            game.screen.blit(text, (50, 10))
+        game.display_updates.flip()
+
+    def _handle_input(self, event):
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_s and self.client.state.get("phase") == "lobby":
+                self.send({"type": "start"})
+            elif event.key == pygame.K_b and self.client.state.get("phase") == "lobby":
+                self.send({"type": "start", "buzz_in": True})
+            elif event.key == pygame.K_f:
+                self.game.toggle_fullscreen()
+        elif event.type == pygame.MOUSEBUTTONDOWN and self.my_roll:
+            if self._roll_button().collidepoint(event.pos):
+                self.my_roll = False
+                self.send({"type": "roll"})
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Join a Berachot game on the local network")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--room", required=True)
+    parser.add_argument("--name", required=True)
+    parser.add_argument("--bot", type=int, default=0, metavar="PLAYERS",
+                        help="Play with random answers instead of a window, starting once "
+                             "this many players have joined")
+    parser.add_argument("--buzz-in", action="store_true", help="Bots start games in buzz-in mode")
+    args = parser.parse_args()
+
+    if args.bot:
+        print(asyncio.run(play_bot(args.room, args.name, args.host, args.port, start_with=args.bot,
+                                   buzz_in=args.buzz_in or None)))
+    else:
+        ThinClient(args.host, args.port, args.room, args.name).run()
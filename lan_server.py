@@ -0,0 +1,576 @@
+"""LAN multiplayer server: one asyncio process hosting many game rooms.
+
+The server owns the authoritative game state. Every room runs its own
+rules.RulesEngine, driving the turn() generator as messages arrive, so no
+room ever blocks another. Clients (see lan_client.py) connect over TCP and
+exchange newline-delimited JSON messages.
+
+Client to server:
+    {"type": "join", "room": "4B", "name": "Dina"}
+    {"type": "start"}                          first player in the room only
+    {"type": "roll"}
+    {"type": "answer", "option": 2}
+    {"type": "category", "category": "Food"}
+    {"type": "buzz", "option": 1, "at": t}      buzz-in answer, t from the client's clock
+    {"type": "pong", "sent": s, "client_time": t}
+
+Server to client:
+    {"type": "joined", "room": ..., "seat": n, "board": [...]}
+                                               again if the seat changes in the lobby
+    {"type": "state", "version": v, "state": {...}}    full state, once on join
+                                                       (with answer-time percentiles once over)
+    {"type": "diff", "version": v, "changes": {...}}   changed state keys only
+    {"type": "event", "kind": ..., "player": ..., ...} turn events as they happen
+    {"type": "prompt", "prompt": "roll" | "question" | "category" | "buzz", "seat": n, ...}
+    {"type": "buzz_result", "fastest": n, "correct": [...], "times_ms": {...}}
+    {"type": "ping", "sent": s}                 clock sync, answered with a pong
+    {"type": "error", "message": ...}
+
+In buzz-in mode ({"type": "start", "buzz_in": true}) every player gets a
+"buzz" prompt for each card and answers at once; see buzz_in.py for how
+the fastest answer is judged.
+"""
+import asyncio
+import itertools
+import json
+import random
+import sqlite3
+
+from analytics import AnalyticsSink
+from buzz_in import BuzzRound, ClockSync, monotonic
+from event_log import EventLog, new_log_path
+from latency import LatencyStats
+from question_bank import DEFAULT_BANK, QuestionBank
+from question_sampler import QuestionSampler
+from rules import DEFAULT_BOARD, QUESTION_CATEGORIES, BoardTables, RulesEngine, TurnEvent
+
+MIN_PLAYERS = 2
+MAX_PLAYERS = 6
+DEFAULT_PORT = 8765
+BUZZ_TIMEOUT = 20.0   # Seconds everybody gets to answer a buzz-in card
+BUZZ_GRACE = 0.25     # Seconds to wait after the first correct answer for faster ones in flight
+RECONNECT_GRACE = 300.0  # Seconds a game nobody is connected to is kept for players to rejoin
+PING_INTERVAL = 2.0
+
+# Prompt names sent to clients for the events a room can be waiting on
+PROMPTS = {TurnEvent.NEXT_PLAYER: "roll", TurnEvent.QUESTION: "question",
+           TurnEvent.CHOOSE_CATEGORY: "category"}
+
+
+def encode(message):
+    return (json.dumps(message, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def card_message(card, reveal=False):
+    """What clients see of a card; the answer is only sent once it's been given."""
+    message = {"id": card.card_id, "question": card.question, "options": card.options,
+               "category": card.category}
+    if reveal:
+        message["correct_option"] = card.correct_option
+    return message
+
+
+def event_message(event):
+    message = {"type": "event", **event.to_dict()}
+    if "card" in message:
+        message["card"] = card_message(event["card"], reveal=event.kind == TurnEvent.ANSWER)
+    return message
+
+
+class RoomError(Exception):
+    """A request the room can't accept; reported back to the client."""
+
+
+class Connection:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.room = None
+        self.seat = None
+        self.clock = ClockSync()
+
+    def send(self, message):
+        if not self.writer.is_closing():
+            self.writer.write(encode(message))
+
+
+class Seat:
+    def __init__(self, name, connection):
+        self.name = name
+        self.connection = connection
+
+
+def flush_analytics(analytics, state, latency=None):
+    try:
+        analytics.flush(state, latency)
+    except (OSError, sqlite3.Error, RuntimeError) as e:
+        print(f"Could not save answer analytics: {e}")
+
+
+class Room:
+    """One game: its players, rules engine and the turn in progress."""
+
+    def __init__(self, name, bank, board=None, seed=None, log_dir=None, buzz_in=False,
+                 analytics=None):
+        self.name = name
+        self.bank = bank
+        self.board = list(board or DEFAULT_BOARD)
+        self.tables = BoardTables(self.board)
+        self.seed = random.randrange(2 ** 32) if seed is None else seed
+        self.sampler = QuestionSampler(bank, seed=self.seed)
+        self.log_dir = log_dir
+        self.buzz_in = buzz_in
+        self.buzz = None          # BuzzRound being answered
+        self.buzz_winner = None   # Result of the last round, for the engine's BUZZ prompt
+        self._buzz_timers = []
+        self.event_log = None
+        self.analytics_path = analytics
+        self.analytics = None
+        self.asked_at = None      # When the current question prompt went out
+        self.response_ms = None   # How long the last card took to answer
+        self.unanswered = False   # The asker ran out of time on the last buzz-in card
+        self.latency = LatencyStats()
+        self.seats = []
+        self.engine = None
+        self.phase = "lobby"
+        self.steps = None     # turn() generator of the turn in progress
+        self.pending = None   # The prompt event the turn is waiting on
+        self.version = 0
+        self.sent_state = {}
+
+    @property
+    def empty(self):
+        return all(seat.connection is None for seat in self.seats)
+
+    def state(self):
+        state = {
+            "phase": self.phase,
+            "players": [seat.name for seat in self.seats],
+            "connected": [seat.connection is not None for seat in self.seats],
+        }
+        if self.engine:
+            game = self.engine.state
+            state.update(positions=list(game.positions), correct_answers=list(game.correct_answers),
+                         current_player=game.current_player, winner=game.winner, turns=game.turns,
+                         buzz_in=self.engine.buzz_in)
+        if self.phase == "over":
+            # Answer times per player for everybody's winner screen
+            state["latency"] = self.latency.summary()["player"]
+        return state
+
+    def broadcast(self, message, exclude=None):
+        data = encode(message)
+        for seat in self.seats:
+            if (seat.connection and seat.connection is not exclude
+                    and not seat.connection.writer.is_closing()):
+                seat.connection.writer.write(data)
+
+    def publish_state(self, exclude=None):
+        """Send clients the state keys that changed since the last publish."""
+        state = self.state()
+        changes = {key: value for key, value in state.items() if self.sent_state.get(key) != value}
+        if changes:
+            self.version += 1
+            self.sent_state = state
+            self.broadcast({"type": "diff", "version": self.version, "changes": changes}, exclude)
+
+    def join(self, connection, name):
+        name = name.strip()[:20]
+        if not name:
+            raise RoomError("A name is needed to join")
+        for seat_number, seat in enumerate(self.seats):
+            if seat.name == name:
+                if seat.connection is not None:
+                    raise RoomError(f"{name} is already playing in room {self.name}")
+                seat.connection = connection  # Reconnecting to a game in progress
+                if self.buzz:
+                    self._rejoin_buzz(seat_number)
+                break
+        else:
+            if self.phase != "lobby":
+                raise RoomError(f"The game in room {self.name} has already started")
+            if len(self.seats) >= MAX_PLAYERS:
+                raise RoomError(f"Room {self.name} is full")
+            self.seats.append(Seat(name, connection))
+            seat_number = len(self.seats) - 1
+        connection.room = self
+        connection.seat = seat_number
+
+        # Everybody else gets the change; the new player gets the full state
+        self.publish_state(exclude=connection)
+        connection.send({"type": "joined", "room": self.name, "seat": seat_number, "board": self.board})
+        connection.send({"type": "state", "version": self.version, "state": self.sent_state})
+        if self.pending is not None:
+            connection.send(self._prompt_message())
+
+    def leave(self, connection):
+        if connection.seat is not None and self.seats[connection.seat].connection is connection:
+            if self.phase == "lobby":
+                del self.seats[connection.seat]
+                # Everybody after the leaver moves up a seat and has to know
+                for seat_number, seat in enumerate(self.seats[connection.seat:], connection.seat):
+                    seat.connection.seat = seat_number
+                    seat.connection.send({"type": "joined", "room": self.name, "seat": seat_number,
+                                          "board": self.board})
+            else:
+                # Keep the seat so the player can reconnect under the same name
+                self.seats[connection.seat].connection = None
+                if self.buzz:
+                    self.buzz.seats.discard(connection.seat)
+                    self._check_buzz()
+        connection.room = connection.seat = None
+        self.publish_state()
+
+    def handle(self, connection, message):
+        kind = message.get("type")
+        if kind == "start":
+            self._start(connection, message.get("buzz_in"))
+        elif kind == "roll":
+            self._expect(connection, "roll")
+            self._advance(None)
+        elif kind == "answer":
+            if self.buzz:
+                raise RoomError("Everybody answers this card with a buzz message")
+            self._expect(connection, "question")
+            self._answer_time(connection.seat, monotonic() - self.asked_at)
+            self._advance(message.get("option") == self.pending["card"].correct_option)
+        elif kind == "buzz":
+            if self.buzz is None or connection.seat not in self.buzz.seats:
+                raise RoomError("Not waiting for a buzz-in answer now")
+            self.buzz.add(connection.seat, message.get("option"), float(message.get("at", 0.0)),
+                          monotonic(), connection.clock)
+            self._check_buzz()
+        elif kind == "category":
+            self._expect(connection, "category")
+            category = message.get("category")
+            if category not in QUESTION_CATEGORIES:
+                raise RoomError(f"Unknown category {category!r}")
+            self._advance(category)
+        else:
+            raise RoomError(f"Unknown message type {kind!r}")
+
+    def _start(self, connection, buzz_in=None):
+        if self.phase != "lobby":
+            raise RoomError("The game has already started")
+        if connection.seat != 0:
+            raise RoomError("Only the first player in the room can start the game")
+        if len(self.seats) < MIN_PLAYERS:
+            raise RoomError(f"At least {MIN_PLAYERS} players are needed")
+        self.engine = RulesEngine(self.board, len(self.seats), rng=random.Random(self.seed),
+                                  draw_card=lambda category: self.bank.card(self.sampler.draw(category)),
+                                  tables=self.tables,
+                                  buzz_in=self.buzz_in if buzz_in is None else bool(buzz_in))
+        if self.log_dir:
+            self.event_log = EventLog(new_log_path(self.log_dir), self.board,
+                                      [seat.name for seat in self.seats], self.seed,
+                                      rules={"buzz_in": self.engine.buzz_in},
+                                      bank=self.bank.fingerprint())
+        if self.analytics_path:
+            self.analytics = AnalyticsSink(self.analytics_path, [seat.name for seat in self.seats])
+        self._wait_for_roll()
+        self.publish_state()
+
+    def _expect(self, connection, prompt):
+        if self.pending is None or self._prompt_kind() != prompt:
+            raise RoomError(f"Not waiting for {prompt!r} now")
+        if connection.seat != self.pending.player:
+            raise RoomError("It's not your turn")
+
+    def _prompt_kind(self):
+        return PROMPTS[self.pending.kind]
+
+    def _prompt_message(self):
+        message = {"type": "prompt", "prompt": self._prompt_kind(), "seat": self.pending.player}
+        if self.pending.kind == TurnEvent.QUESTION:
+            message["card"] = card_message(self.pending["card"])
+            if self.buzz:
+                message["prompt"] = "buzz"
+        return message
+
+    def _open_buzz(self, event):
+        """Send the card to everybody and start collecting answers."""
+        seats = [n for n, seat in enumerate(self.seats) if seat.connection is not None]
+        self.buzz = BuzzRound(event["card"], monotonic(), seats)
+        self.phase = "buzz"
+        self.pending = event
+        self.broadcast(self._prompt_message())
+        self._buzz_timers = [asyncio.get_running_loop().call_later(BUZZ_TIMEOUT, self._close_buzz)]
+        self._check_buzz()
+
+    def _check_buzz(self):
+        """Close the round once everybody has answered, or shortly after the
+        asker has answered (or left) and another player got it right: faster
+        answers may still be in flight, slower ones can't win the bonus.
+        The asker's own answer can't win it, so it doesn't start the close.
+        Until then the round stays open up to BUZZ_TIMEOUT.
+        """
+        buzz = self.buzz
+        asker = self.pending.player
+        if buzz.complete:
+            self._close_buzz()
+        elif (buzz.has_correct(exclude=asker) and len(self._buzz_timers) == 1
+              and (buzz.answered(asker) or asker not in buzz.seats)):
+            self._buzz_timers.append(asyncio.get_running_loop().call_later(BUZZ_GRACE, self._close_buzz))
+
+    def _rejoin_buzz(self, seat_number):
+        """Let a player who reconnects during a buzz-in answer the card too."""
+        self.buzz.seats.add(seat_number)
+        if (seat_number == self.pending.player and not self.buzz.answered(seat_number)
+                and len(self._buzz_timers) > 1):
+            # The grace close started because the asker had gone; wait for them again
+            self._buzz_timers.pop().cancel()
+
+    def _close_buzz(self):
+        """Judge the buzz-in and carry on with the turn."""
+        if self.buzz is None:
+            return
+        for timer in self._buzz_timers:
+            timer.cancel()
+        self._buzz_timers = []
+        buzz, self.buzz = self.buzz, None
+        asker = self.pending.player
+        times = buzz.times_ms()
+        # The asker's own answer decides their tile as usual; the bonus is for the others
+        self.buzz_winner = buzz.fastest_correct(exclude=asker)
+        # correct is None for players who didn't answer in time
+        self.broadcast({"type": "buzz_result", "fastest": self.buzz_winner,
+                        "correct": [buzz.correct(n) if buzz.answered(n) else None
+                                    for n in range(len(self.seats))],
+                        "times_ms": times})
+        if self.analytics is not None:
+            # Everybody answered this card, which is just what the per-card report wants
+            for seat, (correct, _) in buzz.answers.items():
+                if seat != asker:
+                    self.analytics.add_answer(self.engine.state, seat, buzz.card,
+                                              self.pending["category"], correct, times[seat])
+        for seat, (_, taken) in buzz.answers.items():
+            if seat != asker:
+                self.latency.record(self.seats[seat].name, self.pending["category"], taken * 1e6)
+        self.response_ms = None
+        if buzz.answered(asker):
+            self._answer_time(asker, buzz.answers[asker][1])
+        else:
+            # Out of time: the card counts as missed for the game, but it
+            # wasn't answered wrong, so it stays out of the answer analytics
+            self.unanswered = True
+        self._advance(buzz.correct(asker))
+
+    def _answer_time(self, seat, seconds):
+        """Note how long seat took to answer the current card."""
+        self.response_ms = round(seconds * 1000)
+        self.latency.record(self.seats[seat].name, self.pending["category"], seconds * 1e6)
+
+    def _wait_for_roll(self):
+        self.phase = "roll"
+        # A roll prompt is represented by the event that handed over the turn
+        self.pending = TurnEvent(TurnEvent.NEXT_PLAYER, self.engine.state.current_player)
+        self.broadcast(self._prompt_message())
+
+    def _advance(self, reply):
+        """Run the turn until it needs another reply or finishes."""
+        if self.steps is None:
+            self.steps = self.engine.turn()
+        self.pending = None
+        while True:
+            try:
+                event = self.steps.send(reply)
+            except StopIteration:
+                self.steps = None
+                break
+            reply = None
+            if self.event_log:
+                self.event_log.record(event, self.engine.state.turns)
+            if self.analytics is not None and not (event.kind == TurnEvent.ANSWER and self.unanswered):
+                self.analytics.record(event, self.engine.state, self.response_ms)
+            self.broadcast(event_message(event))
+            if event.kind == TurnEvent.ANSWER:
+                self.unanswered = False
+            elif event.kind == TurnEvent.BUZZ:
+                # Already judged while everybody answered the card
+                reply, self.buzz_winner = self.buzz_winner, None
+            elif event.kind == TurnEvent.QUESTION and self.engine.buzz_in:
+                self._open_buzz(event)
+                self.publish_state()
+                return
+            elif event.kind in (TurnEvent.QUESTION, TurnEvent.CHOOSE_CATEGORY):
+                self.phase = "question" if event.kind == TurnEvent.QUESTION else "category"
+                self.pending = event
+                self.asked_at = monotonic()
+                self.broadcast(self._prompt_message())
+                self.publish_state()
+                return
+
+        if self.event_log:
+            self.event_log.flush()
+        if self.engine.state.winner is not None:
+            self.phase = "over"
+            if self.event_log:
+                self.event_log.close()
+                self.event_log = None
+            if self.analytics is not None:
+                # One bulk write per game, off the event loop so other rooms keep playing
+                analytics, self.analytics = self.analytics, None
+                asyncio.get_running_loop().run_in_executor(None, flush_analytics, analytics,
+                                                           self.engine.state, self.latency)
+        else:
+            self._wait_for_roll()
+        self.publish_state()
+
+    def close(self):
+        for timer in self._buzz_timers:
+            timer.cancel()
+        if self.event_log:
+            self.event_log.close()
+            self.event_log = None
+        if self.analytics is not None:
+            flush_analytics(self.analytics, self.engine.state, self.latency)
+            self.analytics = None
+
+
+class LanServer:
+    def __init__(self, bank, host="0.0.0.0", port=DEFAULT_PORT, board=None, log_dir=None,
+                 buzz_in=False, analytics=None):
+        self.bank = bank
+        self.buzz_in = buzz_in  # Default for rooms whose host doesn't choose
+        self.host = host
+        self.port = port
+        self.board = board
+        self.log_dir = log_dir
+        self.analytics = analytics  # SQLite file or .parquet directory for answer records
+        self.rooms = {}
+        self.connections = set()
+        self._handlers = set()  # One task per connected client
+        self._expiry = {}       # Room name -> timer that drops the room if nobody rejoins
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        # With port 0 the OS picks a free port
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        self._server.close()
+        for task in self._handlers:
+            task.cancel()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        await self._server.wait_closed()
+        for timer in self._expiry.values():
+            timer.cancel()
+        self._expiry.clear()
+        for room in self.rooms.values():
+            room.close()
+
+    async def _handle_client(self, reader, writer):
+        connection = Connection(reader, writer)
+        self.connections.add(connection)
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        pinger = asyncio.create_task(self._ping(connection))
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                    self._dispatch(connection, message)
+                except (ValueError, KeyError, TypeError, AttributeError, RoomError) as e:
+                    connection.send({"type": "error", "message": str(e)})
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            # Server shutdown (see close()). Finish normally: asyncio's stream
+            # server logs a traceback for every handler task that ends cancelled
+            pass
+        finally:
+            pinger.cancel()
+            self.connections.discard(connection)
+            self._handlers.discard(task)
+            room = connection.room
+            if room:
+                room.leave(connection)
+                if room.empty:
+                    if room.phase in ("lobby", "over"):
+                        self._drop_room(room)
+                    else:
+                        # Everybody dropped out mid-game; give them time to reconnect
+                        self._expiry[room.name] = asyncio.get_running_loop().call_later(
+                            RECONNECT_GRACE, self._drop_room, room)
+            writer.close()
+
+    def _drop_room(self, room):
+        self._expiry.pop(room.name, None)
+        if room.empty and self.rooms.get(room.name) is room:
+            room.close()
+            del self.rooms[room.name]
+
+    async def _ping(self, connection):
+        """Keep the client's clock offset fresh for buzz-in judging."""
+        for count in itertools.count():
+            connection.send({"type": "ping", "sent": monotonic()})
+            # A quick burst first so the very first card is judged fairly
+            await asyncio.sleep(0.05 if count < 5 else PING_INTERVAL)
+
+    def _dispatch(self, connection, message):
+        if message.get("type") == "pong":
+            connection.clock.add(float(message["sent"]), float(message["client_time"]), monotonic())
+        elif message.get("type") == "join":
+            if connection.room:
+                raise RoomError("Already in a room")
+            name = str(message.get("room", "")).strip()[:20]
+            if not name:
+                raise RoomError("A room name is needed to join")
+            room = self.rooms.get(name)
+            timer = self._expiry.pop(name, None)
+            if timer:
+                timer.cancel()
+            if room is None:
+                room = self.rooms[name] = Room(name, self.bank, self.board, log_dir=self.log_dir,
+                                               buzz_in=self.buzz_in, analytics=self.analytics)
+            try:
+                room.join(connection, str(message.get("name", "")))
+            finally:
+                if not room.seats:
+                    del self.rooms[name]
+                elif room.empty and name not in self._expiry:
+                    # A failed join doesn't cut short the wait for the real players
+                    self._expiry[name] = asyncio.get_running_loop().call_later(
+                        RECONNECT_GRACE, self._drop_room, room)
+        elif connection.room is None:
+            raise RoomError("Join a room first")
+        else:
+            connection.room.handle(connection, message)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Host Berachot games for the local network")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--questions", default=DEFAULT_BANK, help="Question source (.json or .csv)")
+    parser.add_argument("--log-dir", default=None, help="Write an event log for every game here")
+    parser.add_argument("--analytics", default=None, metavar="PATH",
+                        help="Save every answer to this SQLite file (or .parquet directory) "
+                             "for analytics.py reports")
+    parser.add_argument("--buzz-in", action="store_true",
+                        help="Everybody answers every card unless the room's host chooses otherwise")
+    args = parser.parse_args()
+
+    async def main():
+        server = await LanServer(QuestionBank.open(args.questions), args.host, args.port,
+                                 log_dir=args.log_dir, buzz_in=args.buzz_in,
+                                 analytics=args.analytics).start()
+        print(f"Serving Berachot games on {args.host}:{server.port}")
+        await server.serve_forever()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,126 @@
+"""Answer-time histograms with fixed memory.
+
+LatencyHistogram is a log-linear histogram in the style of HdrHistogram:
+values below 32 get a bucket each, and every power of two above that is
+split into 16 equal buckets, so any recorded value is known to within about
+3% however many answers are recorded. Values are whole microseconds up to
+about 71 minutes; the counts live in one array of 464 integers.
+
+LatencyStats keeps one histogram per player and one per category.
+"""
+from array import array
+
+SUB_BUCKET_BITS = 5
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS          # 32
+HALF_BUCKETS = SUB_BUCKETS // 2             # 16
+MAX_VALUE = (1 << 32) - 1                   # Microseconds, about 71 minutes
+BUCKETS = (32 - SUB_BUCKET_BITS) * HALF_BUCKETS + SUB_BUCKETS
+
+
+def bucket_index(value):
+    if value < SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    return shift * HALF_BUCKETS + (value >> shift)
+
+
+def bucket_range(index):
+    """Lowest and highest value that land in bucket index."""
+    if index < SUB_BUCKETS:
+        return index, index
+    shift = index // HALF_BUCKETS - 1
+    mantissa = index - shift * HALF_BUCKETS
+    return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """Counts of microsecond values in log-linear buckets."""
+
+    def __init__(self):
+        self.counts = array("Q", bytes(8 * BUCKETS))
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, micros):
+        micros = min(max(int(micros), 0), MAX_VALUE)
+        self.counts[bucket_index(micros)] += 1
+        self.count += 1
+        self.total += micros
+        self.max = max(self.max, micros)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, p):
+        """Value at percentile p (0-100), as the middle of its bucket."""
+        if not self.count:
+            return 0
+        rank = max(1, -(-self.count * p // 100))  # Ceiling without floats
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                low, high = bucket_range(index)
+                return min((low + high) // 2, self.max)
+        return self.max
+
+    def merge(self, other):
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def summary_ms(self):
+        """Count, p50, p95 and max in milliseconds."""
+        return {"count": self.count, "p50_ms": round(self.percentile(50) / 1000),
+                "p95_ms": round(self.percentile(95) / 1000), "max_ms": round(self.max / 1000)}
+
+    def get_state(self):
+        return {"counts": {i: c for i, c in enumerate(self.counts) if c},
+                "total": self.total, "max": self.max}
+
+    def set_state(self, state):
+        self.counts = array("Q", bytes(8 * BUCKETS))
+        for index, count in state["counts"].items():
+            self.counts[int(index)] = count
+        self.count = sum(self.counts)
+        self.total = state["total"]
+        self.max = state["max"]
+
+
+class LatencyStats:
+    """Answer-time histograms per player and per category."""
+
+    def __init__(self):
+        self.players = {}
+        self.categories = {}
+
+    def record(self, player, category, micros):
+        for histograms, key in ((self.players, player), (self.categories, category)):
+            if key not in histograms:
+                histograms[key] = LatencyHistogram()
+            histograms[key].record(micros)
+
+    def player(self, name):
+        return self.players.get(name) or LatencyHistogram()
+
+    def summary(self):
+        """{"player": {name: summary}, "category": {name: summary}} in milliseconds."""
+        return {"player": {k: h.summary_ms() for k, h in self.players.items()},
+                "category": {k: h.summary_ms() for k, h in self.categories.items()}}
+
+    def get_state(self):
+        return {"players": {k: h.get_state() for k, h in self.players.items()},
+                "categories": {k: h.get_state() for k, h in self.categories.items()}}
+
+    def set_state(self, state):
+        for histograms, saved in ((self.players, state["players"]),
+                                  (self.categories, state["categories"])):
+            histograms.clear()
+            for key, histogram_state in saved.items():
+                histograms[key] = LatencyHistogram()
+                histograms[key].set_state(histogram_state)
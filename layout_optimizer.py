@@ -0,0 +1,210 @@
+"""Search for board layouts that suit a class.
+
+Tiles between START and END are shuffled while keeping the number of each
+tile type fixed. Candidates are scored on how close the expected game length
+is to a target, how fair the seats are and how evenly each question category
+is spread along the track. Scoring runs in parallel on every core, and the
+search state is checkpointed so long runs can be resumed.
+"""
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import markov
+from rules import CATEGORY_KINDS, DEFAULT_BOARD, encode_board
+from simulate import simulate
+
+SECONDS_PER_TURN = 30  # Rough classroom pace for one turn, question included
+DEFAULT_CHECKPOINT = os.path.join(os.path.expanduser("~"), ".berachot_game", "layout_search.json")
+
+
+class Objective:
+    """How a layout is scored; lower scores are better."""
+
+    def __init__(self, target_turns, num_players=4, accuracy=0.7, method="exact",
+                 fairness_weight=1.0, spread_weight=0.5, simulated_games=20000):
+        self.target_turns = target_turns
+        self.num_players = num_players
+        self.accuracy = accuracy
+        self.method = method
+        self.fairness_weight = fairness_weight
+        self.spread_weight = spread_weight
+        self.simulated_games = simulated_games
+
+    @classmethod
+    def for_minutes(cls, minutes, num_players=4, seconds_per_turn=SECONDS_PER_TURN, **kwargs):
+        return cls(minutes * 60 / seconds_per_turn, num_players, **kwargs)
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+    def evaluate(self, board):
+        """Return (score, expected turns, seat win probabilities, spread)."""
+        if self.method == "simulate":
+            result = simulate(self.simulated_games, self.num_players, self.accuracy, board=board)
+            expected_turns = float(result.game_turns.mean())
+            wins = result.wins / max(result.wins.sum(), 1)
+        else:
+            wins, expected_turns = markov.seat_statistics(board, self.accuracy, self.num_players)
+        spread = category_spread(board)
+        score = (abs(expected_turns - self.target_turns) / self.target_turns
+                 + self.fairness_weight * float(wins.max() - wins.min())
+                 + self.spread_weight * spread)
+        return score, expected_turns, [float(w) for w in wins], spread
+
+
+def category_spread(board):
+    """How unevenly question categories are spaced (0 means perfectly even).
+
+    For each category this is the coefficient of variation of the gaps
+    between its tiles (counting from START and to END), averaged over the
+    categories.
+    """
+    values = []
+    kinds = encode_board(board)
+    for kind in CATEGORY_KINDS.values():
+        positions = [i for i, tile in enumerate(kinds) if tile == kind]
+        if not positions:
+            continue
+        gaps = np.diff([0] + positions + [len(board) - 1])
+        values.append(gaps.std() / gaps.mean())
+    return float(np.mean(values)) if values else 0.0
+
+
+def _score(job):
+    """Worker entry point: score one candidate layout."""
+    objective, board = job
+    return objective.evaluate(board)
+
+
+def mutate(board, rng, swaps=2):
+    """Return a copy of board with a few interior tiles swapped."""
+    board = list(board)
+    for _ in range(swaps):
+        i, j = rng.sample(range(1, len(board) - 1), 2)
+        board[i], board[j] = board[j], board[i]
+    return board
+
+
+class LayoutSearch:
+    """Parallel beam search over tile arrangements with checkpointing."""
+
+    def __init__(self, objective, board=None, beam_width=8, candidates_per_generation=64,
+                 seed=None, checkpoint_path=None):
+        self.objective = objective
+        self.beam_width = beam_width
+        self.candidates_per_generation = candidates_per_generation
+        self.checkpoint_path = checkpoint_path
+        self.rng = random.Random(seed)
+        self.generation = 0
+        start = list(board or DEFAULT_BOARD)
+        self.beam = [(objective.evaluate(start)[0], start)]
+
+    @property
+    def best(self):
+        return self.beam[0]
+
+    def run(self, generations, workers=None, report=print):
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            for _ in range(generations):
+                candidates = [mutate(self.rng.choice(self.beam)[1], self.rng,
+                                     swaps=self.rng.randint(1, 3))
+                              for _ in range(self.candidates_per_generation)]
+                jobs = [(self.objective, board) for board in candidates]
+                chunk = max(1, len(jobs) // ((workers or os.cpu_count()) * 4))
+                scored = [(result[0], board)
+                          for result, board in zip(pool.map(_score, jobs, chunksize=chunk), candidates)]
+                # Keep the best distinct layouts seen so far
+                merged = {tuple(board): score for score, board in self.beam + scored}
+                self.beam = sorted(((score, list(board)) for board, score in merged.items()),
+                                   key=lambda item: item[0])[:self.beam_width]
+                self.generation += 1
+                if report:
+                    report(f"Generation {self.generation}: best score {self.best[0]:.4f}")
+                if self.checkpoint_path:
+                    self.save_checkpoint(self.checkpoint_path)
+        return self.best
+
+    def save_checkpoint(self, path):
+        state = self.rng.getstate()
+        data = {
+            "generation": self.generation,
+            "objective": self.objective.to_dict(),
+            "beam_width": self.beam_width,
+            "candidates_per_generation": self.candidates_per_generation,
+            "beam": [{"score": score, "board": board} for score, board in self.beam],
+            "rng_state": [state[0], list(state[1]), state[2]],
+        }
+        # Write then rename so an interrupted run never leaves a broken checkpoint
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load_checkpoint(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        search = cls(Objective(**data["objective"]),
+                     board=data["beam"][0]["board"],
+                     beam_width=data["beam_width"],
+                     candidates_per_generation=data["candidates_per_generation"],
+                     checkpoint_path=path)
+        search.generation = data["generation"]
+        search.beam = [(entry["score"], entry["board"]) for entry in data["beam"]]
+        version, internal, gauss = data["rng_state"]
+        search.rng.setstate((version, tuple(internal), gauss))
+        return search
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Optimize the board layout for a target game length")
+    # The objective comes from the checkpoint when resuming, so these default
+    # to None to tell whether they were given
+    objective_defaults = {"minutes": 20, "players": 4, "accuracy": 0.7,
+                          "seconds_per_turn": SECONDS_PER_TURN, "method": "exact"}
+    parser.add_argument("--minutes", type=float, help="Target game length (default 20)")
+    parser.add_argument("--players", type=int, help="Players per game (default 4)")
+    parser.add_argument("--accuracy", type=float, help="Share of questions answered right (default 0.7)")
+    parser.add_argument("--seconds-per-turn", type=float,
+                        help=f"Classroom pace (default {SECONDS_PER_TURN})")
+    parser.add_argument("--method", choices=["exact", "simulate"],
+                        help="How layouts are scored (default exact)")
+    parser.add_argument("--generations", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT)
+    parser.add_argument("--resume", action="store_true", help="Continue from the checkpoint file")
+    args = parser.parse_args()
+
+    if args.resume:
+        given = [name for name in list(objective_defaults) + ["seed"] if getattr(args, name) is not None]
+        if given:
+            parser.error("--resume continues the search saved in the checkpoint; it can't be "
+                         "combined with " + ", ".join("--" + name.replace("_", "-") for name in given))
+        if not os.path.exists(args.checkpoint):
+            parser.error(f"--resume: there is no checkpoint at {args.checkpoint}")
+        search = LayoutSearch.load_checkpoint(args.checkpoint)
+        print(f"Resuming at generation {search.generation}")
+    else:
+        for name, value in objective_defaults.items():
+            if getattr(args, name) is None:
+                setattr(args, name, value)
+        objective = Objective.for_minutes(args.minutes, args.players, args.seconds_per_turn,
+                                          accuracy=args.accuracy, method=args.method)
+        search = LayoutSearch(objective, seed=args.seed, checkpoint_path=args.checkpoint)
+
+    score, board = search.run(args.generations, workers=args.workers)
+    _, turns, wins, spread = search.objective.evaluate(board)
+    print(f"Best score {score:.4f}: {turns:.1f} turns expected "
+          f"(target {search.objective.target_turns:.1f}), "
+          f"seat win rates {', '.join(f'{w:.1%}' for w in wins)}, category spread {spread:.2f}")
+    print(board)
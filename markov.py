@@ -0,0 +1,204 @@
+"""Exact game-length statistics from the board as an absorbing Markov chain.
+
+The state of one player is the tile they stand on after a turn, and the END
+tile is absorbing. A turn's transitions follow rules.RulesEngine: a d6 roll,
+then the effect of the landing tile (question move-back, black hole jump,
+Star bonus, Prayer +2/-1) with the player's answer accuracy. Players don't
+interact, so multi-player results come from combining per-player finish-time
+distributions.
+"""
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import splu
+
+from rules import (DEFAULT_BOARD, PRAYER_BONUS, PRAYER_PENALTY, QUESTION_KINDS,
+                   BoardTables, TileKind)
+from simulate import simulate
+
+
+def _turn_outcomes(position, tables, last_tile, accuracy):
+    """Yield (landing tile, final tile, probability) for one turn from position."""
+    wrong = 1.0 - accuracy
+    for roll in range(1, 7):
+        landing = min(position + roll, last_tile)
+        p = 1.0 / 6
+        kind = tables.kinds[landing]
+        if kind in QUESTION_KINDS:
+            yield landing, landing, p * accuracy
+            for back in (1, 2, 3):
+                yield landing, max(landing - back, 0), p * wrong / 3
+        elif kind == TileKind.BLACK_HOLE:
+            yield landing, tables.previous_black_hole[landing], p
+        elif kind == TileKind.STAR:
+            yield landing, landing, p * wrong
+            for bonus in (1, 2, 3):
+                yield landing, min(landing + bonus, last_tile), p * accuracy / 3
+        elif kind == TileKind.PRAYER:
+            yield landing, min(landing + PRAYER_BONUS, last_tile), p * accuracy
+            yield landing, max(landing - PRAYER_PENALTY, 0), p * wrong
+        else:
+            yield landing, landing, p
+
+
+def transition_matrices(board, accuracy):
+    """Return sparse (transition, roll landing) matrices for one player.
+
+    transition[i, j] is the probability that a turn starting on tile i ends
+    on tile j; landing[i, j] is the probability that its dice roll lands on j.
+    """
+    tables = BoardTables(board)
+    last_tile = len(board) - 1
+    rows, cols, values = [], [], []
+    landing_rows, landing_cols, landing_values = [], [], []
+    for position in range(last_tile):
+        for landing, final, p in _turn_outcomes(position, tables, last_tile, accuracy):
+            rows.append(position)
+            cols.append(final)
+            values.append(p)
+            landing_rows.append(position)
+            landing_cols.append(landing)
+            landing_values.append(p)
+    # END is absorbing
+    rows.append(last_tile)
+    cols.append(last_tile)
+    values.append(1.0)
+    shape = (len(board), len(board))
+    # Duplicate entries are summed when converting to CSR
+    transition = sparse.coo_matrix((values, (rows, cols)), shape=shape).tocsr()
+    landing = sparse.coo_matrix((landing_values, (landing_rows, landing_cols)), shape=shape).tocsr()
+    return transition, landing
+
+
+class MarkovSolution:
+    """Exact single-player statistics for one board and answer accuracy."""
+
+    def __init__(self, board, accuracy):
+        self.board = board
+        self.accuracy = accuracy
+        self.transition, self.landing = transition_matrices(board, accuracy)
+        last_tile = len(board) - 1
+
+        # Q is the transient part of the chain; (I - Q) is factorized once
+        transient = self.transition[:last_tile, :last_tile].tocsc()
+        lu = splu((sparse.identity(last_tile, format="csc") - transient).tocsc())
+        ones = np.ones(last_tile)
+        # Expected turns to finish from each tile: t = N 1 with N = (I - Q)^-1
+        self.expected_turns_from = lu.solve(ones)
+        # Var = (2N - I) t - t^2
+        second = lu.solve(self.expected_turns_from)
+        self.variance_from = 2 * second - self.expected_turns_from - self.expected_turns_from ** 2
+        # Expected number of turns started on each tile, beginning at START
+        start = np.zeros(last_tile)
+        start[0] = 1.0
+        self.turns_started_on = lu.solve(start, trans="T")
+
+    @property
+    def expected_turns(self):
+        return float(self.expected_turns_from[0])
+
+    @property
+    def variance(self):
+        return float(self.variance_from[0])
+
+    def tile_visit_frequency(self):
+        """Expected number of dice-roll landings on each tile per game."""
+        return self.landing[:-1].T @ self.turns_started_on
+
+    def finish_time_distribution(self, tolerance=1e-12, max_turns=100000):
+        """P(finish on turn k) for k = 0, 1, ... until the tail is below tolerance."""
+        state = np.zeros(len(self.board))
+        state[0] = 1.0
+        transition_t = self.transition.T.tocsr()
+        finished = [0.0]
+        for _ in range(max_turns):
+            state = transition_t @ state
+            finished.append(state[-1])
+            if 1.0 - state[-1] < tolerance:
+                break
+        cumulative = np.array(finished)
+        return np.diff(cumulative, prepend=0.0)
+
+
+def solve(board=None, accuracy=0.7):
+    return MarkovSolution(board or DEFAULT_BOARD, accuracy)
+
+
+def seat_statistics(board=None, accuracy=0.7, num_players=2, tolerance=1e-12):
+    """Exact win probability per seat and expected game length in turns.
+
+    accuracy is one value for everybody or one per seat. Seat i wins on its
+    k-th turn if it finishes then, earlier seats haven't finished by their
+    k-th turn and later seats haven't finished by their (k-1)-th turn.
+    """
+    board = board or DEFAULT_BOARD
+    accuracies = np.broadcast_to(np.asarray(accuracy, dtype=float), (num_players,))
+    distributions = {}
+    for value in set(accuracies.tolist()):
+        distributions[value] = solve(board, value).finish_time_distribution(tolerance)
+    length = max(len(d) for d in distributions.values())
+    finish = np.zeros((num_players, length))
+    for seat, value in enumerate(accuracies):
+        d = distributions[value]
+        finish[seat, :len(d)] = d
+    # survival[seat, k] = P(seat hasn't finished after k turns)
+    survival = 1.0 - np.cumsum(finish, axis=1)
+    survival_before = np.concatenate([np.ones((num_players, 1)), survival[:, :-1]], axis=1)
+
+    win_probability = np.zeros(num_players)
+    expected_length = 0.0
+    turn_numbers = np.arange(length)
+    for seat in range(num_players):
+        others = np.ones(length)
+        for other in range(num_players):
+            if other < seat:
+                others *= survival[other]
+            elif other > seat:
+                others *= survival_before[other]
+        win_on_turn = finish[seat] * others
+        win_probability[seat] = win_on_turn.sum()
+        # The game ends on overall turn (k - 1) * players + seat + 1
+        expected_length += (win_on_turn * ((turn_numbers - 1) * num_players + seat + 1)).sum()
+    return win_probability, expected_length
+
+
+def cross_check(board=None, accuracy=0.7, games=200000, seed=0):
+    """Compare exact single-player results with the Monte Carlo simulator."""
+    board = board or DEFAULT_BOARD
+    exact = solve(board, accuracy)
+    simulated = simulate(games, 1, accuracy, board=board, seed=seed)
+    turns = simulated.game_turns
+    rows = [
+        ("expected turns", exact.expected_turns, float(turns.mean())),
+        ("variance", exact.variance, float(turns.var())),
+    ]
+    visits = exact.tile_visit_frequency()
+    simulated_visits = simulated.landings / games
+    # Report the tile where the two disagree the most
+    tile = int(np.argmax(np.abs(visits - simulated_visits)))
+    rows.append((f"landings on tile {tile + 1}", float(visits[tile]), float(simulated_visits[tile])))
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Exact game length statistics for the board")
+    parser.add_argument("--accuracy", type=float, default=0.7)
+    parser.add_argument("--players", type=int, default=2)
+    parser.add_argument("--cross-check", action="store_true",
+                        help="Compare against the Monte Carlo simulator")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    solution = solve(accuracy=args.accuracy)
+    wins, game_length = seat_statistics(accuracy=args.accuracy, num_players=args.players)
+    elapsed = time.perf_counter() - start
+    print(f"Single player: {solution.expected_turns:.2f} turns expected, "
+          f"sd {solution.variance ** 0.5:.2f}")
+    print(f"{args.players} players: {game_length:.2f} turns expected; win probability by seat: "
+          + ", ".join(f"{seat + 1}: {p:.2%}" for seat, p in enumerate(wins)))
+    print(f"Solved in {elapsed * 1000:.1f} ms")
+    if args.cross_check:
+        for name, exact_value, simulated_value in cross_check(accuracy=args.accuracy):
+            print(f"{name}: exact {exact_value:.3f}, simulated {simulated_value:.3f}")
@@ -0,0 +1,190 @@
+"""Per-player, per-card mastery used to pick questions at the right level.
+
+Two models are kept side by side, both updated in O(1) per answer:
+
+- Elo style ratings: every student has an ability and every card a
+  difficulty, and the predicted chance of a correct answer is
+  1 / (1 + exp(difficulty - ability)). Both move towards the observed
+  answer, so card difficulty is learned from the whole class.
+- Leitner boxes: each (student, card) pair sits in box 0-5. A correct
+  answer moves the card up one box, a wrong one sends it back to box 0.
+
+Everything lives in flat arrays (floats for ratings, one byte per
+student and card for the boxes), so a whole school roster with a large
+bank stays a few megabytes.
+
+MasteryStore keeps the model between sessions, apart from the autosave
+(which is deleted when a game ends): one small file per student with their
+ability and boxes, and one with the card difficulties everybody shares.
+"""
+import base64
+import json
+import math
+import os
+from array import array
+from urllib.parse import quote
+
+LEITNER_BOXES = 6
+UNSEEN = 255  # Box value for a card the student hasn't answered yet
+
+DEFAULT_MASTERY_DIR = os.path.join(os.path.expanduser("~"), ".berachot_game", "mastery")
+
+
+def _encode(data):
+    return base64.b64encode(bytes(data)).decode("ascii")
+
+
+def _decode_array(typecode, text):
+    values = array(typecode)
+    values.frombytes(base64.b64decode(text))
+    return values
+
+
+class MasteryModel:
+    def __init__(self, card_count, k_factor=0.4, target_accuracy=0.7):
+        self.card_count = card_count
+        self.k_factor = k_factor
+        # Questions a student gets right this often are at the right level
+        self.target_accuracy = target_accuracy
+        self.players = {}                     # name -> row in the arrays below
+        self.ability = array("f")
+        self.difficulty = array("f", bytes(4 * card_count))
+        self.card_answers = array("I", bytes(4 * card_count))
+        self.boxes = bytearray()              # row-major: player * card_count + card
+
+    def player_index(self, name):
+        """Row for a student, adding them to the roster on first use."""
+        index = self.players.get(name)
+        if index is None:
+            index = self.players[name] = len(self.players)
+            self.ability.append(0.0)
+            self.boxes.extend(bytes([UNSEEN]) * self.card_count)
+        return index
+
+    def expected(self, player, card_id):
+        """Predicted probability that the student answers the card correctly."""
+        return 1.0 / (1.0 + math.exp(self.difficulty[card_id] - self.ability[player]))
+
+    def box(self, player, card_id):
+        return self.boxes[player * self.card_count + card_id]
+
+    def record(self, player, card_id, correct):
+        """Update ratings and the Leitner box after an answer."""
+        surprise = (1.0 if correct else 0.0) - self.expected(player, card_id)
+        # Cards with few answers move faster until their difficulty settles
+        card_k = self.k_factor * 2.0 / (1.0 + min(self.card_answers[card_id], 20) / 10.0)
+        self.ability[player] += self.k_factor * surprise
+        self.difficulty[card_id] -= card_k * surprise
+        self.card_answers[card_id] += 1
+
+        slot = player * self.card_count + card_id
+        box = self.boxes[slot]
+        if correct:
+            self.boxes[slot] = 1 if box == UNSEEN else min(box + 1, LEITNER_BOXES - 1)
+        else:
+            self.boxes[slot] = 0
+
+    def score(self, player, card_id):
+        """How good a pick the card is for the student; higher is better.
+
+        Cards whose predicted accuracy is near the target win, and cards in
+        a high Leitner box (answered right several times in a row) lose.
+        """
+        box = self.box(player, card_id)
+        if box == UNSEEN:
+            box = 0
+        return -abs(self.expected(player, card_id) - self.target_accuracy) - 0.15 * box
+
+    def get_player_state(self, name):
+        """JSON-friendly copy of one student's ability and Leitner boxes."""
+        index = self.players[name]
+        start = index * self.card_count
+        return {
+            "card_count": self.card_count,
+            "ability": self.ability[index],
+            "boxes": _encode(self.boxes[start:start + self.card_count]),
+        }
+
+    def set_player_state(self, name, state):
+        if state["card_count"] != self.card_count:
+            raise ValueError("Mastery state is for a different question bank")
+        boxes = base64.b64decode(state["boxes"])
+        if len(boxes) != self.card_count:
+            raise ValueError("Mastery state has the wrong number of cards")
+        index = self.player_index(name)
+        self.ability[index] = state["ability"]
+        start = index * self.card_count
+        self.boxes[start:start + self.card_count] = boxes
+
+    def get_card_state(self):
+        """JSON-friendly copy of the card difficulties, shared by every student."""
+        return {
+            "card_count": self.card_count,
+            "difficulty": _encode(self.difficulty),
+            "card_answers": _encode(self.card_answers),
+        }
+
+    def set_card_state(self, state):
+        if state["card_count"] != self.card_count:
+            raise ValueError("Mastery state is for a different question bank")
+        difficulty = _decode_array("f", state["difficulty"])
+        card_answers = _decode_array("I", state["card_answers"])
+        if len(difficulty) != self.card_count or len(card_answers) != self.card_count:
+            raise ValueError("Mastery state has the wrong number of cards")
+        self.difficulty, self.card_answers = difficulty, card_answers
+
+
+class MasteryStore:
+    """Mastery files in a directory: cards.json and students/<name>.json."""
+
+    def __init__(self, directory=DEFAULT_MASTERY_DIR):
+        self.directory = directory
+
+    def student_path(self, name):
+        # Names can hold anything (slashes, Hebrew), so they are percent-encoded
+        return os.path.join(self.directory, "students", quote(name, safe="") + ".json")
+
+    def load(self, model, names):
+        """Load the shared card state and each named student into model.
+
+        Missing files are normal (a new student or a first game); files for
+        another bank or that can't be read are reported and skipped.
+        """
+        state = self._read(os.path.join(self.directory, "cards.json"))
+        if state is not None:
+            self._apply(model.set_card_state, state, "card difficulties")
+        for name in names:
+            state = self._read(self.student_path(name))
+            if state is not None:
+                self._apply(lambda s: model.set_player_state(name, s), state, f"mastery for {name}")
+
+    def save(self, model, names):
+        """Write the shared card state and each named student's file."""
+        self._write(os.path.join(self.directory, "cards.json"), model.get_card_state())
+        for name in names:
+            if name in model.players:
+                self._write(self.student_path(name), model.get_player_state(name))
+
+    def _read(self, path):
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"Ignoring mastery file {path}: {e}")
+            return None
+
+    def _apply(self, setter, state, what):
+        try:
+            setter(state)
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"Ignoring saved {what}: {e}")
+
+    def _write(self, path, state):
+        # Write then rename, like the autosave, so a crash keeps the old file
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, separators=(",", ":"))
+        os.replace(temp_path, path)
@@ -0,0 +1,162 @@
+"""Frame profiler overlay.
+
+PerfHud is told about every frame boundary by FrameScheduler.next_events()
+and about flips by DirtyRectTracker, and the game times draw_board() with
+add(). Each frame is split into:
+    draw_board  drawing the board and tokens
+    flip        pushing the frame to the display
+    wait        sleeping in next_events() (idle wait and frame rate cap)
+    logic       everything else: event handling, other drawing, game logic
+The overlay shows those, FPS, fonts and text surfaces created per frame
+(from FontCache) and a graph of recent frame times. capture() records a
+cProfile of the next N frames and writes it to disk for pstats/snakeviz.
+"""
+import cProfile
+import io
+import os
+import pstats
+import time
+from collections import deque
+
+import pygame
+
+DEFAULT_PROFILE_DIR = os.path.join(os.path.expanduser("~"), ".berachot_game", "profiles")
+
+SECTIONS = ("draw_board", "flip", "wait", "logic")
+TEXT_REFRESH_FRAMES = 15   # Re-render the numbers about four times a second
+GRAPH_MAX_MS = 50.0        # Frame time at the top of the graph
+PANEL_SIZE = (300, 190)
+VALUE_X = 150              # Right edge of the section timings
+
+
+class PerfHud:
+    def __init__(self, fonts, history=120, profile_dir=DEFAULT_PROFILE_DIR):
+        self.fonts = fonts
+        self.profile_dir = profile_dir
+        self.visible = False
+        self.frames = 0
+        self.frame_ms = deque(maxlen=history)
+        self.section_ms = {name: deque(maxlen=history) for name in SECTIONS}
+        self._current = dict.fromkeys(SECTIONS, 0)
+        self._frame_start = time.perf_counter_ns()
+        self._counters = (fonts.fonts_created, fonts.surfaces_created)
+        self.fonts_per_frame = 0
+        self.surfaces_per_frame = 0
+        self.profiler = None
+        self.profile_frames_left = 0
+        self._profiled_frames = 0
+        self.panel = None
+        self._lines = []
+
+    def toggle(self):
+        self.visible = not self.visible
+
+    def add(self, section, nanoseconds):
+        self._current[section] += nanoseconds
+
+    def end_frame(self):
+        """Close the frame that started at the previous call."""
+        now = time.perf_counter_ns()
+        frame = now - self._frame_start
+        self._frame_start = now
+        measured = sum(self._current[name] for name in SECTIONS if name != "logic")
+        self._current["logic"] = max(0, frame - measured)
+        self.frame_ms.append(frame / 1e6)
+        for name in SECTIONS:
+            self.section_ms[name].append(self._current[name] / 1e6)
+            self._current[name] = 0
+
+        counters = (self.fonts.fonts_created, self.fonts.surfaces_created)
+        self.fonts_per_frame = counters[0] - self._counters[0]
+        self.surfaces_per_frame = counters[1] - self._counters[1]
+        self._counters = counters
+        self.frames += 1
+
+        if self.profiler is not None:
+            self.profile_frames_left -= 1
+            if self.profile_frames_left <= 0:
+                self._finish_capture()
+
+    # Profiling
+
+    def capture(self, frames=300):
+        """Profile the next frames with cProfile; the result is written to profile_dir."""
+        if self.profiler is not None:
+            return
+        self.profiler = cProfile.Profile()
+        self.profile_frames_left = frames
+        self._profiled_frames = frames
+        self.profiler.enable()
+
+    def _finish_capture(self):
+        profiler, self.profiler = self.profiler, None
+        profiler.disable()
+        try:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            path = os.path.join(self.profile_dir, time.strftime("frames-%Y%m%d-%H%M%S.prof"))
+            profiler.dump_stats(path)
+        except OSError as e:
+            print(f"Could not save the profile: {e}")
+            return
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(15)
+        print(f"Profile of {self._profiled_frames} frames saved to {path}")
+        print(summary.getvalue())
+
+    # Drawing
+
+    def draw(self, screen):
+        """Draw the overlay in the top right corner; return its rect."""
+        if self.panel is None:
+            self.panel = pygame.Surface(PANEL_SIZE)
+            self.panel.set_alpha(220)
+        if self.frames % TEXT_REFRESH_FRAMES == 0 or not self._lines:
+            self._lines = self._render_lines()
+
+        panel = self.panel
+        panel.fill((20, 20, 20))
+        y = 6
+        for label, value in self._lines:
+            panel.blit(label, (8, y))
+            if value is not None:
+                panel.blit(value, (VALUE_X - value.get_width(), y))
+            y += label.get_height() + 2
+        self._draw_graph(panel, pygame.Rect(8, y + 4, PANEL_SIZE[0] - 16, PANEL_SIZE[1] - y - 12))
+
+        rect = panel.get_rect(topright=(screen.get_width() - 10, 10))
+        screen.blit(panel, rect)
+        return rect
+
+    def _render_lines(self):
+        font = self.fonts.get_font(20)
+
+        def average(values):
+            return sum(values) / len(values) if values else 0.0
+
+        frame = average(self.frame_ms)
+        rows = [(f"FPS {1000 / frame if frame else 0:.1f}   frame {frame:.1f} ms"
+                 f"   max {max(self.frame_ms, default=0):.1f} ms", None)]
+        rows += [(name, f"{average(self.section_ms[name]):.2f} ms") for name in SECTIONS]
+        rows.append((f"fonts +{self.fonts_per_frame}   text surfaces +{self.surfaces_per_frame}", None))
+        if self.profiler is not None:
+            rows.append((f"profiling... {self.profile_frames_left} frames left", None))
+
+        # Rendered straight from the font so the overlay doesn't show up in its own counters
+        def render(text):
+            return font.render(text, True, (230, 230, 230))
+
+        return [(render(label), render(value) if value else None) for label, value in rows]
+
+    def _draw_graph(self, surface, area):
+        if area.height <= 0 or not self.frame_ms:
+            return
+        pygame.draw.rect(surface, (50, 50, 50), area, 1)
+        bar_width = max(1, area.width // self.frame_ms.maxlen)
+        for i, ms in enumerate(self.frame_ms):
+            height = min(area.height, int(area.height * ms / GRAPH_MAX_MS))
+            color = (80, 200, 80) if ms <= 1000 / 60 + 1 else (230, 180, 60) if ms <= 34 else (230, 70, 70)
+            pygame.draw.rect(surface, color, (area.x + i * bar_width, area.bottom - height,
+                                              bar_width, height))
+        # 60 FPS budget line
+        budget_y = area.bottom - int(area.height * (1000 / 60) / GRAPH_MAX_MS)
+        pygame.draw.line(surface, (200, 200, 200), (area.x, budget_y), (area.right - 1, budget_y))
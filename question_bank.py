@@ -0,0 +1,295 @@
+"""Question banks: JSON/CSV sources compiled to a memory-mapped binary index.
+
+The compiled file keeps every card's text in one UTF-8 blob with a fixed-size
+index entry per card and an array of card ids per category. Opening a bank
+only maps the file and reads the small header, and BlessingCard objects are
+built one at a time when a card is actually drawn.
+
+Answer options repeat across many cards ("Hamotzi", "Shehakol"...), so each
+distinct option is stored once and cards refer to it by id. Every card built
+from the bank shares one interned string per option.
+
+File layout (little endian):
+    header     magic "BQB1", version, category count, card count, option
+               count, offsets of the index, option ids, option table and text
+    categories per category: name, card count, offset of its id array
+    id arrays  uint32 card ids for each category
+    index      per card: question offset, question length, duplicate group,
+               first option id, category, correct option, option count
+    option ids uint32 option ids of every card, in card order
+    options    per distinct option: text offset, text length
+    text       questions and options
+"""
+import csv
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+from collections import OrderedDict
+from typing import List
+
+MAGIC = b"BQB1"
+VERSION = 3
+PREFIX = struct.Struct("<4sH")  # magic, version
+HEADER = struct.Struct("<4sHHIIIIII")
+CATEGORY = struct.Struct("<II")  # card count, offset of id array
+INDEX_ENTRY = struct.Struct("<IIIIBBBx")
+OPTION_ENTRY = struct.Struct("<II")  # text offset, text length
+
+DEFAULT_BANK = os.path.join(os.path.dirname(os.path.abspath(__file__)), "questions", "berachot.json")
+
+
+class BlessingCard:
+    __slots__ = ("question", "options", "correct_option", "category", "card_id")
+
+    def __init__(self, question: str, options: List[str], correct_option: int, category: str,
+                 card_id: int = None):
+        self.question = question
+        self.options = tuple(options)
+        self.correct_option = correct_option
+        self.category = category
+        self.card_id = card_id
+
+
+def load_source(path):
+    """Read card records from a .json or .csv question source.
+
+    JSON is a list of {"category", "question", "options", "correct"} objects,
+    with an optional "group" naming cards that ask the same thing in other
+    words. CSV has category, question and correct columns followed by option
+    columns.
+    """
+    if path.lower().endswith(".csv"):
+        records = []
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.reader(f):
+                if not row or row[0] == "category":
+                    continue
+                category, question, correct, *options = row
+                records.append({"category": category, "question": question,
+                                "options": [o for o in options if o], "correct": int(correct)})
+        return records
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def duplicate_key(record):
+    """Key shared by cards that ask the same question.
+
+    An explicit "group" wins; otherwise the question text is compared with
+    case, punctuation and parenthetical remarks ignored.
+    """
+    if record.get("group"):
+        return "group:" + record["group"]
+    text = re.sub(r"\([^)]*\)", " ", record["question"].casefold())
+    return " ".join(re.sub(r"[^\w\s]", " ", text).split())
+
+
+def compile_bank(records, output_path):
+    """Write card records to the binary bank format."""
+    categories = []
+    category_ids = {}
+    groups = {}
+    option_ids = {}  # option text -> id, in order of first use
+    index = bytearray()
+    card_options = bytearray()
+    text = bytearray()
+    for card_id, record in enumerate(records):
+        category = record["category"]
+        options = record["options"]
+        if not 0 <= record["correct"] < len(options) or len(options) > 255:
+            raise ValueError(f"Card {card_id} has an invalid correct option or too many options")
+        if category not in category_ids:
+            categories.append(category)
+            category_ids[category] = []
+        category_ids[category].append(card_id)
+        question = record["question"].encode("utf-8")
+        group = groups.setdefault(duplicate_key(record), len(groups))
+        index += INDEX_ENTRY.pack(len(text), len(question), group, len(card_options) // 4,
+                                  categories.index(category), record["correct"], len(options))
+        text += question
+        ids = [option_ids.setdefault(option, len(option_ids)) for option in options]
+        card_options += struct.pack(f"<{len(ids)}I", *ids)
+
+    option_table = bytearray()
+    for option in option_ids:
+        encoded = option.encode("utf-8")
+        option_table += OPTION_ENTRY.pack(len(text), len(encoded))
+        text += encoded
+
+    category_table = bytearray()
+    id_arrays = bytearray()
+    table_size = sum(1 + len(name.encode("utf-8")) + CATEGORY.size for name in categories)
+    ids_start = HEADER.size + table_size
+    for name in categories:
+        encoded = name.encode("utf-8")
+        category_table += bytes([len(encoded)]) + encoded
+        category_table += CATEGORY.pack(len(category_ids[name]), ids_start + len(id_arrays))
+        id_arrays += struct.pack(f"<{len(category_ids[name])}I", *category_ids[name])
+
+    index_offset = ids_start + len(id_arrays)
+    option_ids_offset = index_offset + len(index)
+    options_offset = option_ids_offset + len(card_options)
+    text_offset = options_offset + len(option_table)
+    header = HEADER.pack(MAGIC, VERSION, len(categories), len(records), len(option_ids),
+                         index_offset, option_ids_offset, options_offset, text_offset)
+
+    # Write then rename so a running game never maps a half-written file
+    temp_path = output_path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(header + category_table + id_arrays + index + card_options + option_table + text)
+    os.replace(temp_path, output_path)
+
+
+def is_current(path):
+    """True if path is a compiled bank in this version of the format."""
+    try:
+        with open(path, "rb") as f:
+            prefix = f.read(PREFIX.size)
+    except OSError:
+        return False
+    return len(prefix) == PREFIX.size and PREFIX.unpack(prefix) == (MAGIC, VERSION)
+
+
+class QuestionBank:
+    """Read-only view of a compiled bank through a memory map."""
+
+    def __init__(self, path, cache_size=256):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < HEADER.size or PREFIX.unpack_from(self._map, 0) != (MAGIC, VERSION):
+            raise ValueError(f"{path} is not a version {VERSION} question bank")
+        (_, _, category_count, self.card_count, self.option_count, self._index_offset,
+         option_ids_offset, self._options_offset, self._text_offset) = HEADER.unpack_from(self._map, 0)
+
+        self.categories = []
+        self._category_ids = {}
+        offset = HEADER.size
+        for _ in range(category_count):
+            length = self._map[offset]
+            name = self._map[offset + 1:offset + 1 + length].decode("utf-8")
+            offset += 1 + length
+            count, ids_offset = CATEGORY.unpack_from(self._map, offset)
+            offset += CATEGORY.size
+            self.categories.append(sys.intern(name))
+            # Zero-copy view of this category's card ids
+            self._category_ids[name] = memoryview(self._map)[ids_offset:ids_offset + 4 * count].cast("I")
+
+        self._option_ids = memoryview(self._map)[option_ids_offset:self._options_offset].cast("I")
+        self._options = [None] * self.option_count  # Decoded, interned option texts
+        self._cache = OrderedDict()
+        self.cache_size = cache_size
+        self._fingerprint = None
+
+    @classmethod
+    def open(cls, source_path=DEFAULT_BANK, compiled_path=None):
+        """Open a bank, compiling the source first if it is newer than the binary."""
+        if compiled_path is None:
+            compiled_path = os.path.splitext(source_path)[0] + ".qbk"
+        if (not os.path.exists(compiled_path)
+                or os.path.getmtime(compiled_path) < os.path.getmtime(source_path)
+                or not is_current(compiled_path)):
+            records = load_source(source_path)
+            try:
+                compile_bank(records, compiled_path)
+            except OSError:
+                # Read-only install: keep the compiled bank in the temp directory
+                name = os.path.basename(compiled_path)
+                compiled_path = os.path.join(tempfile.gettempdir(), name)
+                compile_bank(records, compiled_path)
+        return cls(compiled_path)
+
+    def category_ids(self, category):
+        """Card ids in a category, as a read-only sequence of ints."""
+        return self._category_ids[category]
+
+    def count(self, category):
+        return len(self._category_ids[category])
+
+    def group(self, card_id):
+        """Duplicate group of a card; cards asking the same question share one."""
+        return struct.unpack_from("<I", self._map, self._index_offset + card_id * INDEX_ENTRY.size + 8)[0]
+
+    def card(self, card_id):
+        """Build the BlessingCard for card_id, reusing recently built cards."""
+        card = self._cache.get(card_id)
+        if card is not None:
+            self._cache.move_to_end(card_id)
+            return card
+        if not 0 <= card_id < self.card_count:
+            raise IndexError(f"No card {card_id} in {self.path}")
+        card = self._build_card(card_id)
+        self._cache[card_id] = card
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return card
+
+    def _build_card(self, card_id):
+        offset, length, _, first_option, category, correct, option_count = INDEX_ENTRY.unpack_from(
+            self._map, self._index_offset + card_id * INDEX_ENTRY.size)
+        start = self._text_offset + offset
+        question = self._map[start:start + length].decode("utf-8")
+        options = [self.option(option_id)
+                   for option_id in self._option_ids[first_option:first_option + option_count]]
+        return BlessingCard(question, options, correct, self.categories[category], card_id)
+
+    def fingerprint(self):
+        """Identify the bank's content, so card ids saved elsewhere can be checked.
+
+        The hash covers every card's category, question, options and answer
+        in card id order, not the file layout, so recompiling the same source
+        keeps it. Event logs record it because they store cards by id.
+        """
+        if self._fingerprint is None:
+            digest = hashlib.sha1()
+            for card_id in range(self.card_count):
+                card = self._build_card(card_id)
+                digest.update(json.dumps([card.category, card.question, card.options,
+                                          card.correct_option]).encode("utf-8"))
+            self._fingerprint = {"path": self.path, "cards": self.card_count,
+                                 "sha1": digest.hexdigest()}
+        return self._fingerprint
+
+    def option(self, option_id):
+        """Text of an option; every card offering it gets the same string object."""
+        text = self._options[option_id]
+        if text is None:
+            offset, length = OPTION_ENTRY.unpack_from(
+                self._map, self._options_offset + option_id * OPTION_ENTRY.size)
+            start = self._text_offset + offset
+            text = self._options[option_id] = sys.intern(self._map[start:start + length].decode("utf-8"))
+        return text
+
+    def close(self):
+        for ids in self._category_ids.values():
+            ids.release()
+        self._option_ids.release()
+        self._map.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compile or inspect question banks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    compile_parser = subparsers.add_parser("compile", help="Compile a JSON/CSV source")
+    compile_parser.add_argument("source")
+    compile_parser.add_argument("output")
+    info_parser = subparsers.add_parser("info", help="Show what a compiled bank contains")
+    info_parser.add_argument("bank")
+    args = parser.parse_args()
+
+    if args.command == "compile":
+        records = load_source(args.source)
+        compile_bank(records, args.output)
+        print(f"Compiled {len(records)} cards into {args.output}")
+    else:
+        bank = QuestionBank(args.bank)
+        print(f"{bank.card_count} cards, {bank.option_count} distinct options")
+        for category in bank.categories:
+            print(f"  {category}: {bank.count(category)}")
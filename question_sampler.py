@@ -0,0 +1,125 @@
+"""Non-repeating question draws from a QuestionBank.
+
+Each category has a shuffle bag of duplicate groups (cards asking the same
+question share a group, even across categories). A draw takes the next group
+from the bag and one of its cards in that category, so every question comes
+up once before any comes up again. Groups drawn in the last
+min_questions_before_repeat draws, in any category, are skipped by swapping
+a later group forward, which keeps each draw O(1).
+
+draw() can also be given a score function (for example from
+mastery.MasteryModel): it then looks at the next few fresh groups in the bag
+and takes the best scoring card among them.
+"""
+import random
+from collections import deque
+
+from snapshot import rng_state_from_json, rng_state_to_json
+
+
+class QuestionSampler:
+    def __init__(self, bank, min_questions_before_repeat=4, seed=None, lookahead=4):
+        self.bank = bank
+        self.min_questions_before_repeat = min_questions_before_repeat
+        self.lookahead = lookahead  # Fresh groups compared when draw() has a score
+        self.rng = random.Random(seed)
+        self._bags = {}       # category -> list of group ids, shuffled
+        self._positions = {}  # category -> index of the next group in its bag
+        self._variants = {}   # category -> {group id: card ids}
+        self._recent = deque()
+        self._recent_counts = {}
+
+    def _load_variants(self, category):
+        variants = {}
+        for card_id in self.bank.category_ids(category):
+            variants.setdefault(self.bank.group(card_id), []).append(card_id)
+        if not variants:
+            raise ValueError(f"No questions in category {category!r}")
+        self._variants[category] = variants
+        return variants
+
+    def _bag(self, category):
+        bag = self._bags.get(category)
+        if bag is None:
+            bag = self._bags[category] = list(self._load_variants(category))
+            self._shuffle(category)
+        return bag
+
+    def _shuffle(self, category):
+        self.rng.shuffle(self._bags[category])
+        self._positions[category] = 0
+
+    def _find_fresh(self, bag, start, count=1):
+        """Indexes of up to count groups from start on that weren't drawn recently.
+
+        At most min_questions_before_repeat groups are recent, so this looks
+        at no more than that many + count entries.
+        """
+        found = []
+        for i in range(start, min(len(bag), start + len(self._recent) + count)):
+            if bag[i] not in self._recent_counts:
+                found.append(i)
+                if len(found) == count:
+                    break
+        return found
+
+    def draw(self, category, score=None):
+        """Return the id of the next card to ask in category.
+
+        score, if given, maps a card id to how good a pick it is; the best of
+        the next lookahead fresh groups is drawn instead of the first.
+        """
+        bag = self._bag(category)
+        position = self._positions[category]
+        if position >= len(bag):
+            self._shuffle(category)
+            position = 0
+        count = self.lookahead if score else 1
+        fresh = self._find_fresh(bag, position, count)
+        if not fresh:
+            # Only recent groups are left in this round; start a new one
+            self._shuffle(category)
+            position = 0
+            # A category with too few groups has to repeat one
+            fresh = self._find_fresh(bag, position, count) or [position]
+
+        variants = self._variants[category]
+        candidates = [(i, self.rng.choice(variants[bag[i]])) for i in fresh]
+        if score:
+            chosen, card_id = max(candidates, key=lambda candidate: score(candidate[1]))
+        else:
+            chosen, card_id = candidates[0]
+        bag[position], bag[chosen] = bag[chosen], bag[position]
+        self._positions[category] = position + 1
+        self._remember(bag[position])
+        return card_id
+
+    def _remember(self, group):
+        self._recent.append(group)
+        self._recent_counts[group] = self._recent_counts.get(group, 0) + 1
+        while len(self._recent) > self.min_questions_before_repeat:
+            old = self._recent.popleft()
+            self._recent_counts[old] -= 1
+            if not self._recent_counts[old]:
+                del self._recent_counts[old]
+
+    def get_state(self):
+        """JSON-friendly draw state, for save games."""
+        return {
+            "bags": self._bags,
+            "positions": self._positions,
+            "recent": list(self._recent),
+            "rng_state": rng_state_to_json(self.rng),
+        }
+
+    def set_state(self, state):
+        self._bags = {category: list(bag) for category, bag in state["bags"].items()}
+        self._positions = dict(state["positions"])
+        self._variants = {}
+        for category in self._bags:
+            self._load_variants(category)
+        self._recent = deque()
+        self._recent_counts = {}
+        for group in state["recent"]:
+            self._remember(group)
+        rng_state_from_json(self.rng, state["rng_state"])
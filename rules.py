@@ -0,0 +1,361 @@
+"""Game rules for the Berachot board game, independent of pygame.
+
+RulesEngine plays turns on a GameState and reports what happened as a list
+of TurnEvents. Anything that needs a player decision (answering a card,
+picking a category on a Prayer tile) is handed to strategy callables, so
+the same rules drive the pygame game, headless simulations and tests.
+"""
+import random
+from array import array
+from enum import IntEnum
+from typing import Callable, List, Optional
+
+QUESTION_CATEGORIES = ("Food", "Daily", "Special")
+
+# The pattern of tiles on the standard 56 tile board
+DEFAULT_BOARD = [
+    "START",  # 1
+    # Column 1 (7 tiles)
+    "Daily", "Food", "Special", "Black_Hole", "Star", "Daily", "Food",
+    # Column 2 (7 tiles)
+    "Special", "Star", "Food", "Daily", "Prayer", "Black_Hole", "Star",
+    # Column 3 (7 tiles)
+    "Food", "Daily", "Black_Hole", "Special", "Star", "Food", "Daily",
+    # Column 4 (7 tiles)
+    "Prayer", "Special", "Star", "Black_Hole", "Daily", "Prayer", "Special",
+    # Column 5 (7 tiles)
+    "Star", "Food", "Daily", "Prayer", "Black_Hole", "Star", "Food",
+    # Column 6 (7 tiles)
+    "Daily", "Prayer", "Special", "Star", "Food", "Black_Hole", "Prayer",
+    # Column 7 (7 tiles)
+    "Special", "Star", "Food", "Daily", "Prayer", "Special", "Star",
+    # Column 8 (6 tiles to make total of 56)
+    "Prayer", "Daily", "Special", "Food", "Star", "END"
+]
+
+PRAYER_BONUS = 2     # Spaces forward for a correct answer on a Prayer tile
+PRAYER_PENALTY = 1   # Spaces back for a wrong answer on a Prayer tile
+BUZZ_BONUS = (1, 3)  # Range of spaces forward for winning a buzz-in
+
+
+class TileKind(IntEnum):
+    START = 0
+    END = 1
+    FOOD = 2
+    DAILY = 3
+    SPECIAL = 4
+    BLACK_HOLE = 5
+    STAR = 6
+    PRAYER = 7
+
+
+class Category(IntEnum):
+    """Question categories in memory; banks, logs and LAN messages use their labels."""
+    FOOD = 0
+    DAILY = 1
+    SPECIAL = 2
+
+    @property
+    def label(self):
+        return QUESTION_CATEGORIES[self]
+
+    @classmethod
+    def from_label(cls, label):
+        return cls(QUESTION_CATEGORIES.index(label))
+
+
+TILE_KINDS = {
+    "START": TileKind.START,
+    "END": TileKind.END,
+    "Food": TileKind.FOOD,
+    "Daily": TileKind.DAILY,
+    "Special": TileKind.SPECIAL,
+    "Black_Hole": TileKind.BLACK_HOLE,
+    "Star": TileKind.STAR,
+    "Prayer": TileKind.PRAYER,
+}
+TILE_NAMES = {kind: name for name, kind in TILE_KINDS.items()}
+QUESTION_KINDS = (TileKind.FOOD, TileKind.DAILY, TileKind.SPECIAL)
+CATEGORY_KINDS = dict(zip(Category, QUESTION_KINDS))
+
+
+def encode_board(board) -> array:
+    """The board as one byte per tile (TileKind values), from tile names or kinds."""
+    if isinstance(board, array):
+        return board
+    kinds = array("B")
+    for tile in board:
+        if isinstance(tile, str):
+            if tile not in TILE_KINDS:
+                raise ValueError(f"Unknown tile type {tile!r}")
+            kinds.append(TILE_KINDS[tile])
+        else:
+            kinds.append(TileKind(tile))
+    return kinds
+
+
+def board_names(board) -> List[str]:
+    """Tile names of a board, the form saved in logs and snapshots and sent over the LAN."""
+    return [tile if isinstance(tile, str) else TILE_NAMES[tile] for tile in board]
+
+
+class BoardTables:
+    """Lookup tables computed once per board so turns never scan the board.
+
+    kinds[i] is the TileKind of tile i, category[i] its question category
+    (or None), previous_black_hole[i] the black hole a player on tile i
+    would fall back to, and category_tiles maps each category to its tiles.
+    The board can be given as tile names or kinds.
+    """
+
+    __slots__ = ("kinds", "category", "category_tiles", "previous_black_hole")
+
+    def __init__(self, board):
+        self.kinds = encode_board(board)
+        if len(self.kinds) < 2 or self.kinds[0] != TileKind.START or self.kinds[-1] != TileKind.END:
+            raise ValueError("Board must begin with START and finish with END")
+        self.category = [TILE_NAMES[kind] if kind in QUESTION_KINDS else None for kind in self.kinds]
+        self.category_tiles = {category: [] for category in QUESTION_CATEGORIES}
+        self.previous_black_hole = [0] * len(self.kinds)
+        last_black_hole = 0
+        for i, kind in enumerate(self.kinds):
+            self.previous_black_hole[i] = last_black_hole
+            if kind == TileKind.BLACK_HOLE:
+                last_black_hole = i
+            elif kind in QUESTION_KINDS:
+                self.category_tiles[self.category[i]].append(i)
+
+    def __len__(self):
+        return len(self.kinds)
+
+
+class TurnEvent:
+    """Something that happened during a turn.
+
+    QUESTION, CHOOSE_CATEGORY and BUZZ events are prompts: the engine waits
+    for a strategy to answer them before it carries on.
+    """
+
+    ROLL = "roll"
+    MOVE = "move"
+    QUESTION = "question"
+    ANSWER = "answer"
+    BLACK_HOLE = "black_hole"
+    STAR = "star"
+    CHOOSE_CATEGORY = "choose_category"
+    BUZZ = "buzz"
+    WIN = "win"
+    NEXT_PLAYER = "next_player"
+
+    __slots__ = ("kind", "player", "data")
+
+    def __init__(self, kind: str, player: int, **data):
+        self.kind = kind
+        self.player = player
+        self.data = data
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __eq__(self, other):
+        return (isinstance(other, TurnEvent) and self.kind == other.kind
+                and self.player == other.player and self.data == other.data)
+
+    def __repr__(self):
+        return f"TurnEvent({self.kind!r}, {self.player}, {self.data!r})"
+
+    def to_dict(self):
+        return {"kind": self.kind, "player": self.player, **self.data}
+
+
+class GameState:
+    """Positions and scores of every player, plus whose turn it is."""
+
+    __slots__ = ("positions", "correct_answers", "current_player", "winner", "turns")
+
+    def __init__(self, num_players: int):
+        self.positions = [0] * num_players
+        self.correct_answers = [0] * num_players
+        self.current_player = 0
+        self.winner: Optional[int] = None
+        self.turns = 0
+
+    @property
+    def num_players(self):
+        return len(self.positions)
+
+
+class RulesEngine:
+    def __init__(self, board, num_players: int, rng: Optional[random.Random] = None,
+                 draw_card: Optional[Callable[[str], object]] = None,
+                 tables: Optional[BoardTables] = None, buzz_in: bool = False):
+        self.board = board
+        self.tables = tables or BoardTables(board)
+        self.last_tile = len(board) - 1
+        self.rng = rng or random.Random()
+        # Picks the card to ask for a category; None means no card content
+        self.draw_card = draw_card or (lambda category: None)
+        # In buzz-in mode every player answers each card, and the fastest
+        # correct answer from another player earns a move forward
+        self.buzz_in = buzz_in
+        self.state = GameState(num_players)
+
+    def find_previous_black_hole(self, position: int) -> int:
+        """Find the position of the black hole before this one, or START."""
+        return self.tables.previous_black_hole[position]
+
+    def play_turn(self, answer: Callable[[TurnEvent], bool],
+                  choose_category: Callable[[TurnEvent], str],
+                  listener: Optional[Callable[[TurnEvent], None]] = None,
+                  buzz: Optional[Callable[[TurnEvent], Optional[int]]] = None) -> List[TurnEvent]:
+        """Play the current player's turn and return its events in order.
+
+        listener, if given, sees each event as soon as it happens (before any
+        prompt is answered), which lets a renderer animate the turn live.
+        buzz returns the player who won a buzz-in, or None.
+        """
+        events = []
+        steps = self.turn()
+        reply = None
+        while True:
+            try:
+                event = steps.send(reply)
+            except StopIteration:
+                return events
+            events.append(event)
+            if listener:
+                listener(event)
+            reply = None
+            if event.kind == TurnEvent.QUESTION:
+                reply = answer(event)
+            elif event.kind == TurnEvent.CHOOSE_CATEGORY:
+                reply = choose_category(event)
+            elif event.kind == TurnEvent.BUZZ:
+                reply = buzz(event) if buzz else None
+
+    def turn(self):
+        """Generator for one turn: yields events and receives prompt replies."""
+        state = self.state
+        if state.winner is not None:
+            raise RuntimeError("The game is already over")
+        player = state.current_player
+        state.turns += 1
+
+        roll = self.rng.randint(1, 6)
+        yield TurnEvent(TurnEvent.ROLL, player, roll=roll)
+        position = min(state.positions[player] + roll, self.last_tile)
+        yield self._move(player, position, "roll")
+
+        kind = self.tables.kinds[position]
+        if kind in QUESTION_KINDS:
+            correct = yield from self._ask(player, self.tables.category[position])
+            if not correct:
+                move_back = self.rng.randint(1, 3)
+                yield self._move(player, position - move_back, "wrong_answer", spaces=move_back)
+        elif kind == TileKind.BLACK_HOLE:
+            yield TurnEvent(TurnEvent.BLACK_HOLE, player, tile=position)
+            yield self._move(player, self.find_previous_black_hole(position), "black_hole")
+        elif kind == TileKind.PRAYER:
+            category = yield TurnEvent(TurnEvent.CHOOSE_CATEGORY, player)
+            if category not in QUESTION_CATEGORIES:
+                category = self.rng.choice(QUESTION_CATEGORIES)
+            correct = yield from self._ask(player, category)
+            if correct:
+                yield self._move(player, position + PRAYER_BONUS, "prayer_bonus", spaces=PRAYER_BONUS)
+            else:
+                yield self._move(player, position - PRAYER_PENALTY, "prayer_penalty",
+                                 spaces=PRAYER_PENALTY)
+        elif kind == TileKind.STAR:
+            yield TurnEvent(TurnEvent.STAR, player)
+            correct = yield from self._ask(player, self.rng.choice(QUESTION_CATEGORIES))
+            if correct:
+                bonus = self.rng.randint(1, 3)
+                yield self._move(player, position + bonus, "star_bonus", spaces=bonus)
+
+        # A buzz-in bonus can carry another player to the END tile too
+        finished = [p for p, position in enumerate(state.positions) if position == self.last_tile]
+        if finished:
+            state.winner = player if player in finished else finished[0]
+            yield TurnEvent(TurnEvent.WIN, state.winner)
+            return
+
+        state.current_player = (player + 1) % state.num_players
+        yield TurnEvent(TurnEvent.NEXT_PLAYER, state.current_player)
+
+    def _ask(self, player, category):
+        card = self.draw_card(category)
+        correct = bool((yield TurnEvent(TurnEvent.QUESTION, player, category=category, card=card)))
+        if correct:
+            self.state.correct_answers[player] += 1
+        yield TurnEvent(TurnEvent.ANSWER, player, category=category, card=card, correct=correct)
+        if self.buzz_in:
+            fastest = yield TurnEvent(TurnEvent.BUZZ, player, category=category, card=card)
+            if fastest is not None and fastest != player and 0 <= fastest < self.state.num_players:
+                bonus = self.rng.randint(*BUZZ_BONUS)
+                yield self._move(fastest, self.state.positions[fastest] + bonus, "buzz_bonus",
+                                 spaces=bonus)
+        return correct
+
+    def _move(self, player, target, reason, **data):
+        """Move a player, clamped to the board, and return the MOVE event."""
+        start = self.state.positions[player]
+        target = max(0, min(target, self.last_tile))
+        self.state.positions[player] = target
+        return TurnEvent(TurnEvent.MOVE, player, start=start, end=target, reason=reason, **data)
+
+
+class AccuracyStrategy:
+    """Answers correctly with a fixed probability per player."""
+
+    def __init__(self, accuracy, rng: Optional[random.Random] = None):
+        self.accuracy = accuracy
+        self.rng = rng or random.Random()
+
+    def __call__(self, event: TurnEvent) -> bool:
+        accuracy = self.accuracy
+        if isinstance(accuracy, (list, tuple)):
+            accuracy = accuracy[event.player]
+        return self.rng.random() < accuracy
+
+
+class RandomCategoryStrategy:
+    """Picks a category at random when a player lands on a Prayer tile."""
+
+    def __init__(self, rng: Optional[random.Random] = None):
+        self.rng = rng or random.Random()
+
+    def __call__(self, event: TurnEvent) -> str:
+        return self.rng.choice(QUESTION_CATEGORIES)
+
+
+def play_game(engine: RulesEngine, answer, choose_category, max_turns=10000) -> List[TurnEvent]:
+    """Play turns until somebody wins (or max_turns pass) and return all events."""
+    events = []
+    while engine.state.winner is None and engine.state.turns < max_turns:
+        events.extend(engine.play_turn(answer, choose_category))
+    return events
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Simulate Berachot games without a display")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--players", type=int, default=2)
+    parser.add_argument("--accuracy", type=float, default=0.7)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    answer = AccuracyStrategy(args.accuracy, rng)
+    choose = RandomCategoryStrategy(rng)
+    total_turns = 0
+    wins = [0] * args.players
+    for _ in range(args.games):
+        engine = RulesEngine(DEFAULT_BOARD, args.players, rng=rng)
+        play_game(engine, answer, choose)
+        total_turns += engine.state.turns
+        if engine.state.winner is not None:
+            wins[engine.state.winner] += 1
+    print(f"Games: {args.games}, average turns: {total_turns / args.games:.1f}")
+    print("Wins by seat: " + ", ".join(f"{seat + 1}: {count}" for seat, count in enumerate(wins)))
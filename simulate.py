@@ -0,0 +1,178 @@
+"""Vectorized Monte Carlo simulator for board balance questions.
+
+Plays many games at once with NumPy, one array element per game and player,
+following the same rules as rules.RulesEngine. Each player answers questions
+correctly with their own accuracy.
+"""
+import time
+
+import numpy as np
+
+from rules import (DEFAULT_BOARD, PRAYER_BONUS, PRAYER_PENALTY, QUESTION_KINDS, TILE_NAMES,
+                   BoardTables, TileKind, encode_board)
+
+
+def compile_board(board):
+    """Return (tile kind array, question tile mask, previous black hole array)."""
+    tables = BoardTables(board)
+    kinds = np.frombuffer(tables.kinds, dtype=np.uint8).astype(np.int8)
+    is_question = np.isin(kinds, QUESTION_KINDS)
+    previous_black_hole = np.array(tables.previous_black_hole, dtype=np.int32)
+    return kinds, is_question, previous_black_hole
+
+
+class SimulationResult:
+    def __init__(self, board, num_players):
+        self.board = encode_board(board)
+        self.num_players = num_players
+        self.games = 0
+        self.unfinished = 0
+        self.turn_counts = []  # Per-batch arrays of turns each finished game took
+        self.wins = np.zeros(num_players, dtype=np.int64)
+        self.landings = np.zeros(len(board), dtype=np.int64)
+        self.black_hole_spaces_lost = np.zeros(len(board), dtype=np.int64)
+        self.seconds = 0.0
+
+    @property
+    def game_turns(self):
+        if not self.turn_counts:
+            return np.zeros(0, dtype=np.int32)
+        return np.concatenate(self.turn_counts)
+
+    def length_histogram(self):
+        """Number of finished games for each game length in turns."""
+        return np.bincount(self.game_turns)
+
+    def landing_frequency(self):
+        """Share of all dice-roll landings that ended on each tile."""
+        total = self.landings.sum()
+        return self.landings / total if total else self.landings.astype(float)
+
+    def seat_advantage(self):
+        """Win rate of each seat minus the fair share of 1 / players."""
+        finished = self.wins.sum()
+        if not finished:
+            return np.zeros(self.num_players)
+        return self.wins / finished - 1.0 / self.num_players
+
+    def black_hole_costs(self):
+        """{tile index: (landings, average spaces lost)} for every black hole."""
+        costs = {}
+        for tile, kind in enumerate(self.board):
+            if kind == TileKind.BLACK_HOLE:
+                landings = int(self.landings[tile])
+                lost = self.black_hole_spaces_lost[tile] / landings if landings else 0.0
+                costs[tile] = (landings, float(lost))
+        return costs
+
+    def summary(self):
+        turns = self.game_turns
+        lines = [f"Games: {self.games} in {self.seconds:.2f}s "
+                 f"({self.games / max(self.seconds, 1e-9) * 60:,.0f} games/minute)"]
+        if self.unfinished:
+            lines.append(f"Unfinished games (hit max turns): {self.unfinished}")
+        if len(turns):
+            p10, p50, p90 = np.percentile(turns, [10, 50, 90])
+            lines.append(f"Game length in turns: mean {turns.mean():.1f}, sd {turns.std():.1f}, "
+                         f"p10 {p10:.0f}, median {p50:.0f}, p90 {p90:.0f}")
+        lines.append("Seat win rate advantage: " + ", ".join(
+            f"seat {seat + 1}: {advantage:+.2%}" for seat, advantage in enumerate(self.seat_advantage())))
+        frequency = self.landing_frequency()
+        busiest = np.argsort(frequency)[::-1][:5]
+        lines.append("Most landed tiles: " + ", ".join(
+            f"{tile + 1} ({TILE_NAMES[self.board[tile]]}) {frequency[tile]:.2%}" for tile in busiest))
+        for tile, (landings, lost) in self.black_hole_costs().items():
+            lines.append(f"Black hole at tile {tile + 1}: {landings} landings, "
+                         f"{lost:.1f} spaces lost on average")
+        return "\n".join(lines)
+
+
+def simulate(num_games, num_players, accuracy=0.7, board=None, seed=None,
+             batch_size=250000, max_turns=2000):
+    """Simulate num_games games and collect balance statistics.
+
+    accuracy is either one probability for everybody or one per seat.
+    """
+    board = board or DEFAULT_BOARD
+    kinds, is_question, previous_black_hole = compile_board(board)
+    last_tile = len(board) - 1
+    accuracy = np.broadcast_to(np.asarray(accuracy, dtype=np.float64), (num_players,))
+    rng = np.random.default_rng(seed)
+    result = SimulationResult(board, num_players)
+
+    start_time = time.perf_counter()
+    remaining = num_games
+    while remaining > 0:
+        batch = min(batch_size, remaining)
+        _simulate_batch(batch, num_players, accuracy, kinds, is_question, previous_black_hole,
+                        last_tile, rng, result, max_turns)
+        remaining -= batch
+    result.games = num_games
+    result.seconds = time.perf_counter() - start_time
+    return result
+
+
+def _simulate_batch(batch, num_players, accuracy, kinds, is_question, previous_black_hole,
+                    last_tile, rng, result, max_turns):
+    positions = np.zeros((batch, num_players), dtype=np.int32)
+    game_ids = np.arange(batch)
+    finished_turns = []
+
+    for turn in range(max_turns):
+        if not len(game_ids):
+            break
+        seat = turn % num_players
+        count = len(game_ids)
+
+        rolled = np.minimum(positions[game_ids, seat] + rng.integers(1, 7, count), last_tile)
+        result.landings += np.bincount(rolled, minlength=last_tile + 1)
+        kind = kinds[rolled]
+        correct = rng.random(count) < accuracy[seat]
+        step = rng.integers(1, 4, count)  # Move back on a wrong answer, or Star bonus
+        new_position = rolled.copy()
+
+        question = is_question[rolled]
+        wrong = question & ~correct
+        new_position[wrong] -= step[wrong]
+
+        black_hole = kind == TileKind.BLACK_HOLE
+        new_position[black_hole] = previous_black_hole[rolled[black_hole]]
+        result.black_hole_spaces_lost += np.bincount(
+            rolled[black_hole], weights=rolled[black_hole] - new_position[black_hole],
+            minlength=last_tile + 1).astype(np.int64)
+
+        star = (kind == TileKind.STAR) & correct
+        new_position[star] += step[star]
+
+        prayer = kind == TileKind.PRAYER
+        new_position[prayer & correct] += PRAYER_BONUS
+        new_position[prayer & ~correct] -= PRAYER_PENALTY
+
+        np.clip(new_position, 0, last_tile, out=new_position)
+        positions[game_ids, seat] = new_position
+
+        # Games where this seat reached the END tile are over
+        won = new_position == last_tile
+        if won.any():
+            result.wins[seat] += int(won.sum())
+            finished_turns.append(np.full(int(won.sum()), turn + 1, dtype=np.int32))
+            game_ids = game_ids[~won]
+
+    result.unfinished += len(game_ids)
+    if finished_turns:
+        result.turn_counts.append(np.concatenate(finished_turns))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Monte Carlo balance report for the board")
+    parser.add_argument("--games", type=int, default=1000000)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--accuracy", type=float, nargs="+", default=[0.7],
+                        help="One accuracy for everybody, or one per seat")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    accuracy = args.accuracy[0] if len(args.accuracy) == 1 else args.accuracy
+    print(simulate(args.games, args.players, accuracy, seed=args.seed).summary())
@@ -0,0 +1,72 @@
+"""Save and resume games through small versioned snapshot files.
+
+A snapshot is a short binary header followed by zlib-compressed JSON:
+
+    magic "BJS1", format version (uint16), payload length (uint32)
+
+Snapshots are written to a temporary file and renamed over the old one, so
+a crash in the middle of an autosave leaves the previous snapshot intact.
+"""
+import json
+import os
+import struct
+import zlib
+
+MAGIC = b"BJS1"
+VERSION = 1
+HEADER = struct.Struct("<4sHI")
+
+DEFAULT_SNAPSHOT = os.path.join(os.path.expanduser("~"), ".berachot_game", "autosave.snapshot")
+
+
+def rng_state_to_json(rng):
+    version, internal, gauss = rng.getstate()
+    return [version, list(internal), gauss]
+
+
+def rng_state_from_json(rng, state):
+    version, internal, gauss = state
+    rng.setstate((version, tuple(internal), gauss))
+
+
+def save_snapshot(data, path=DEFAULT_SNAPSHOT):
+    """Write a snapshot dict to path atomically."""
+    payload = zlib.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"), 1)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(payload)) + payload)
+    os.replace(temp_path, path)
+
+
+def load_snapshot(path=DEFAULT_SNAPSHOT):
+    """Read a snapshot dict, or return None if there is no usable snapshot."""
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+    except OSError:
+        return None
+    if len(raw) < HEADER.size:
+        return None
+    magic, version, length = HEADER.unpack_from(raw, 0)
+    if magic != MAGIC or version != VERSION or len(raw) != HEADER.size + length:
+        print(f"Ignoring snapshot {path}: unknown format or truncated file")
+        return None
+    try:
+        return json.loads(zlib.decompress(raw[HEADER.size:]))
+    except (zlib.error, ValueError):
+        print(f"Ignoring snapshot {path}: corrupt payload")
+        return None
+
+
+def has_snapshot(path=DEFAULT_SNAPSHOT):
+    return os.path.exists(path)
+
+
+def delete_snapshot(path=DEFAULT_SNAPSHOT):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
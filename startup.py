@@ -0,0 +1,71 @@
+"""Staged startup: slow loading runs on background threads while the first
+screen is already up.
+
+Each stage is a Future, so code that needs its result can block on it
+(result()) or skip it until it's there (ready()). Every stage and any
+marks the game sets (such as "first frame") are timed from process start
+and reported together once the last stage finishes.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class StartupLoader:
+    def __init__(self, began, workers=2, report=print):
+        self.began = began  # perf_counter() when startup began
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="startup")
+        self.futures = {}
+        self.times = {}
+        self.report = report
+        self._waiting_for = None  # Marks the report waits for, once asked for
+        self._reported = False
+        self._lock = threading.Lock()
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.began) * 1000
+
+    def mark(self, name):
+        """Note that name happened now (first call wins)."""
+        self.times.setdefault(name, self.elapsed_ms())
+        self._maybe_report()
+
+    def submit(self, name, function, *args):
+        future = self.executor.submit(self._run, name, function, args)
+        self.futures[name] = future
+        return future
+
+    def _run(self, name, function, args):
+        try:
+            return function(*args)
+        finally:
+            self.mark(name)
+
+    def report_when_done(self, *marks):
+        """Report the timings once every stage has finished and marks were set."""
+        self._waiting_for = marks
+        self._maybe_report()
+
+    def ready(self, name):
+        future = self.futures.get(name)
+        return future is not None and future.done()
+
+    def result(self, name):
+        """The stage's result, waiting for it if it is still loading."""
+        return self.futures[name].result()
+
+    def summary(self):
+        stages = sorted(self.times.items(), key=lambda item: item[1])
+        return "Startup: " + ", ".join(f"{name} {ms:.0f} ms" for name, ms in stages)
+
+    def _maybe_report(self):
+        with self._lock:
+            if (self._reported or self._waiting_for is None
+                    or not all(name in self.times for name in (*self.futures, *self._waiting_for))):
+                return
+            self._reported = True
+        if self.report:
+            self.report(self.summary())
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
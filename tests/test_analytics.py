@@ -0,0 +1,78 @@
+"""Answer analytics: the per-game sink and the per-card report."""
+import numpy as np
+import pytest
+
+from analytics import AnalyticsSink, card_statistics, flag, load_answers, report
+from rules import GameState, TurnEvent
+
+# Four examinees (game, player) answering cards 0-2; 1 is correct
+TABLE = {
+    ("g1", 0): [1, 1, 0],
+    ("g1", 1): [1, 0, 0],
+    ("g2", 0): [0, 1, 1],
+    ("g2", 1): [1, 1, 1],
+}
+
+
+def columns_of(table):
+    rows = [(game, player, card_id, correct) for (game, player), answers in table.items()
+            for card_id, correct in enumerate(answers)]
+    game_id, player, card_id, correct = zip(*rows)
+    return {"game_id": np.array(game_id, dtype=object), "player": np.array(player),
+            "card_id": np.array(card_id), "category": np.array(["Food"] * len(rows), dtype=object),
+            "correct": np.array(correct, dtype=np.float64)}
+
+
+def test_card_statistics_on_a_known_table():
+    stats = card_statistics(columns_of(TABLE), min_answers=1)
+    assert stats["card_id"].tolist() == [0, 1, 2]
+    assert stats["answers"].tolist() == [4, 4, 4]
+    assert stats["difficulty"].tolist() == [0.75, 0.75, 0.5]
+    # Worked by hand: card 0 is missed by the examinee who does best on the rest
+    assert stats["discrimination"][0] == pytest.approx(-0.5222, abs=1e-4)
+    assert stats["discrimination"][2] == pytest.approx(0.0)
+
+    # And against a plain per-card Pearson correlation with the rest score
+    answers = np.array(list(TABLE.values()), dtype=float)
+    for card in range(3):
+        rest = (answers.sum(axis=1) - answers[:, card]) / 2
+        assert stats["discrimination"][card] == pytest.approx(np.corrcoef(answers[:, card], rest)[0, 1])
+
+
+def test_cards_with_few_answers_or_no_spread():
+    table = {("g", player): [1, player % 2] for player in range(6)}
+    stats = card_statistics(columns_of(table), min_answers=1)
+    assert np.isnan(stats["discrimination"][0])  # Everybody got card 0 right
+    assert card_statistics(columns_of(table), min_answers=7)["card_id"].size == 0
+    assert card_statistics({"correct": np.zeros(0)})["card_id"].size == 0
+
+
+def test_flags():
+    assert flag(0.99, 0.5) == "too easy"
+    assert flag(0.1, -0.3) == "too hard, negative discrimination, check the answer key"
+    assert flag(0.6, 0.05) == "low discrimination"
+    assert flag(0.6, np.nan) == ""
+
+
+def test_sink_writes_finished_turns_to_sqlite(tmp_path):
+    path = str(tmp_path / "stats" / "analytics.sqlite")
+    sink = AnalyticsSink(path, ["Dina", "Avi"])
+    state = GameState(2)
+    for turn, (player, card_id, correct) in enumerate([(0, 4, True), (1, 4, False)], 1):
+        state.turns = turn
+        sink.record(TurnEvent(TurnEvent.ROLL, player, roll=3), state)
+        state.positions[player] = 3
+        sink.record(TurnEvent(TurnEvent.ANSWER, player, card=card_id, category="Food",
+                              correct=correct), state, response_ms=1200)
+        sink.record(TurnEvent(TurnEvent.NEXT_PLAYER, 1 - player), state)
+    # A turn cut short: its answer isn't written
+    sink.record(TurnEvent(TurnEvent.ROLL, 0, roll=2), state)
+    sink.record(TurnEvent(TurnEvent.ANSWER, 0, card=5, category="Daily", correct=True), state)
+    sink.flush(state)
+    assert len(sink) == 0
+
+    columns = load_answers(path)
+    assert columns["card_id"].tolist() == [4, 4]
+    assert columns["correct"].tolist() == [1.0, 0.0]
+    assert columns["player"].tolist() == [0, 1]
+    assert report(path, min_answers=1).startswith("2 answers from 1 games; 1 cards")
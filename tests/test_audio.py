@@ -0,0 +1,70 @@
+"""AudioManager channel pool: free channels first, then voice stealing."""
+import pygame
+import pytest
+
+from audio import PRIORITY_EFFECT, PRIORITY_EVENT, PRIORITY_RESULT, AudioManager
+
+
+class FakeChannel:
+    """Stands in for pygame.mixer.Channel; busy until stopped."""
+
+    def __init__(self):
+        self.busy = False
+        self.stops = 0
+
+    def get_busy(self):
+        return self.busy
+
+    def stop(self):
+        self.busy = False
+        self.stops += 1
+
+    def set_volume(self, volume):
+        self.volume = volume
+
+    def play(self, sound):
+        self.busy = True
+
+
+@pytest.fixture
+def audio(monkeypatch):
+    monkeypatch.setenv("SDL_AUDIODRIVER", "dummy")
+    pygame.mixer.init()
+    manager = AudioManager(channels=3)
+    manager.channels = [FakeChannel() for _ in manager.channels]
+    manager.sounds["click"] = (pygame.mixer.Sound(buffer=bytes(400)), 400)
+    yield manager
+    pygame.mixer.quit()
+
+
+def play_all(audio, priorities):
+    return [audio.channels.index(audio.play("click", priority)) for priority in priorities]
+
+
+def test_free_channels_are_used_first(audio):
+    assert play_all(audio, [PRIORITY_EVENT, PRIORITY_RESULT, PRIORITY_EFFECT]) == [0, 1, 2]
+    assert audio.stolen == 0
+    audio.channels[1].stop()
+    assert audio._free_channel(PRIORITY_EFFECT) == 1
+
+
+def test_lowest_priority_then_oldest_is_stolen(audio):
+    play_all(audio, [PRIORITY_RESULT, PRIORITY_EFFECT, PRIORITY_EFFECT])
+    audio.started = [1.0, 3.0, 2.0]
+    # Of the two effects, channel 2 started first
+    assert audio._free_channel(PRIORITY_RESULT) == 2
+    assert audio.channels[2].stops == 1 and audio.stolen == 1
+    audio.channels[2].busy = True
+    # Equal priority can be stolen too: the older effect on channel 1 goes before the result
+    audio.priorities[2] = PRIORITY_RESULT
+    assert audio._free_channel(PRIORITY_EFFECT) == 1
+
+
+def test_lower_priority_sounds_are_dropped_when_all_channels_are_busier(audio):
+    play_all(audio, [PRIORITY_EVENT, PRIORITY_RESULT, PRIORITY_RESULT])
+    assert audio.play("click", PRIORITY_EFFECT) is None
+    assert audio.dropped == 1 and audio.stolen == 0
+    assert not any(channel.stops for channel in audio.channels)
+    assert audio.channels.index(audio.play("click", PRIORITY_EVENT)) == 1
+    assert audio.priorities == [PRIORITY_EVENT, PRIORITY_EVENT, PRIORITY_RESULT]
+    assert audio.play("missing") is None and audio.dropped == 1
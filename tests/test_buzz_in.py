@@ -0,0 +1,45 @@
+"""Buzz-in judging: clock offsets and who answered correctly first."""
+from buzz_in import BuzzRound, ClockSync
+from question_bank import BlessingCard
+
+CARD = BlessingCard("Which blessing over bread?", ["Hamotzi", "Mezonot", "Shehakol"], 0, "Food", 1)
+
+
+def test_clock_sync_uses_the_shortest_round_trip():
+    clock = ClockSync()
+    assert not clock.synced and clock.offset == 0.0
+    clock.add(sent=10.0, client_time=105.5, received=11.0)  # Slow round trip, poor estimate
+    clock.add(sent=20.0, client_time=120.1, received=20.2)
+    assert clock.offset == 100.0
+    assert abs(clock.one_way_delay - 0.1) < 1e-9
+    assert clock.to_server_time(130.0) == 30.0
+    clock.add(sent=30.0, client_time=0.0, received=29.0)  # Clock went backwards: ignored
+    assert len(clock.samples) == 2
+
+
+def test_answers_are_timed_from_when_the_card_reached_each_player():
+    near, far = ClockSync(), ClockSync()
+    near.add(0.0, 0.01, 0.02)        # 10 ms away, same clock
+    far.add(0.0, 50.5, 1.0)          # 500 ms away, clock 50 s ahead
+    round_ = BuzzRound(CARD, opened_at=100.0, seats=[0, 1, 2])
+    round_.add(0, 0, client_time=101.01, received_at=101.02, clock=near)    # 1.0 s after seeing it
+    round_.add(1, 0, client_time=151.3, received_at=101.8, clock=far)       # 0.8 s after seeing it
+    round_.add(1, 2, client_time=150.6, received_at=101.9, clock=far)       # Second answer ignored
+    assert round_.times_ms() == {0: 1000, 1: 800}
+    assert round_.fastest_correct() == 1
+    assert round_.fastest_correct(exclude=1) == 0
+    assert not round_.complete
+
+
+def test_has_correct_can_leave_out_the_asker():
+    round_ = BuzzRound(CARD, opened_at=0.0, seats=[0, 1, 2])
+    clock = ClockSync()
+    round_.add(0, 0, 0.5, 0.5, clock)
+    assert round_.has_correct()
+    assert not round_.has_correct(exclude=0)
+    round_.add(1, 1, 0.6, 0.6, clock)
+    assert not round_.has_correct(exclude=0)
+    assert round_.correct(0) and not round_.correct(1) and not round_.correct(2)
+    assert round_.answered(1) and not round_.answered(2)
+    round_.add(2, 0, 0.7, 0.7, clock)
+    assert round_.has_correct(exclude=0) and round_.complete
@@ -0,0 +1,142 @@
+"""Event logs written during a game replay to the same game."""
+import json
+import random
+
+import pytest
+
+from event_log import BankMismatch, EventLog, ReplayMismatch, check_bank, read_log, replay
+from question_bank import QuestionBank, compile_bank
+from rules import (DEFAULT_BOARD, AccuracyStrategy, RandomCategoryStrategy, RulesEngine,
+                   TurnEvent)
+
+PLAYERS = ["Dina", "Avi", "Noa"]
+
+
+def record_game(path, seed, buzz_in=False, max_turns=10000):
+    """Play a seeded game the way the game does, logging every turn."""
+    rules = {"buzz_in": True} if buzz_in else None
+    log = EventLog(str(path), board=DEFAULT_BOARD, player_names=PLAYERS, seed=seed, rules=rules)
+    cards = random.Random(seed)
+    engine = RulesEngine(DEFAULT_BOARD, len(PLAYERS), rng=random.Random(seed),
+                         draw_card=lambda category: cards.randrange(1000), buzz_in=buzz_in)
+    play_turns(engine, log, seed, max_turns)
+    log.close()
+    return engine
+
+
+def play_turns(engine, log, seed, max_turns):
+    answer = AccuracyStrategy([0.5, 0.7, 0.9], random.Random(seed))
+    choose = RandomCategoryStrategy(random.Random(seed))
+    buzz_rng = random.Random(seed)
+    buzz = lambda event: buzz_rng.choice([None, 0, 1, 2])
+    while engine.state.winner is None and engine.state.turns < max_turns:
+        turn = engine.state.turns + 1
+        engine.play_turn(answer, choose, listener=lambda event: log.record(event, turn), buzz=buzz)
+        log.flush()
+
+
+def assert_same_state(replayed, played):
+    for name in ("positions", "correct_answers", "current_player", "winner", "turns"):
+        assert getattr(replayed.state, name) == getattr(played.state, name), name
+    assert replayed.rng.getstate() == played.rng.getstate()
+
+
+@pytest.mark.parametrize("buzz_in", [False, True])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_replay_reaches_the_same_final_state(tmp_path, seed, buzz_in):
+    path = tmp_path / "game.jsonl"
+    played = record_game(path, seed, buzz_in)
+    assert played.state.winner is not None
+    seen = []
+    replayed = replay(str(path), listener=seen.append)
+    assert_same_state(replayed, played)
+    assert seen[-1] == TurnEvent(TurnEvent.WIN, played.state.winner)
+    header, _ = read_log(str(path))
+    assert header["rules"] == ({"buzz_in": True} if buzz_in else {})
+
+
+def test_resumed_game_replays(tmp_path):
+    path = tmp_path / "game.jsonl"
+    first = record_game(path, 5, max_turns=10)
+
+    # A later session carries on from a snapshot of the engine
+    engine = RulesEngine(DEFAULT_BOARD, len(PLAYERS), rng=random.Random())
+    engine.state.positions = list(first.state.positions)
+    engine.state.correct_answers = list(first.state.correct_answers)
+    engine.state.current_player = first.state.current_player
+    engine.state.turns = first.state.turns
+    engine.rng.setstate(first.rng.getstate())
+    log = EventLog(str(path))
+    log.resume(engine)
+    play_turns(engine, log, 6, max_turns=10000)
+    log.close()
+
+    assert_same_state(replay(str(path)), engine)
+
+
+def test_unfinished_last_turn_is_dropped(tmp_path):
+    path = tmp_path / "game.jsonl"
+    record_game(path, 3, max_turns=6)
+    lines = path.read_text().splitlines()
+    path.write_text("\n".join(lines[:-2]) + "\n")  # Crash part way through turn 6
+    assert replay(str(path)).state.turns == 5
+
+
+def test_edited_log_is_caught(tmp_path):
+    path = tmp_path / "game.jsonl"
+    record_game(path, 4, max_turns=3)
+    lines = path.read_text().splitlines()
+    records = [json.loads(line) for line in lines]
+    roll = next(i for i, record in enumerate(records) if record.get("kind") == TurnEvent.ROLL)
+    records[roll]["roll"] = records[roll]["roll"] % 6 + 1
+    path.write_text("\n".join(json.dumps(record) for record in records) + "\n")
+    with pytest.raises(ReplayMismatch) as error:
+        replay(str(path))
+    assert error.value.turn == 1
+
+
+def make_bank(tmp_path, name, records):
+    path = str(tmp_path / name)
+    compile_bank(records, path)
+    return QuestionBank(path)
+
+
+RECORDS = [{"category": category, "question": f"{category} question {n}?",
+            "options": ["Hamotzi", "Mezonot", "Shehakol"], "correct": n % 3}
+           for category in ("Food", "Daily", "Special") for n in range(4)]
+
+
+def test_replay_checks_the_question_bank(tmp_path):
+    bank = make_bank(tmp_path, "bank.qbk", RECORDS)
+    path = str(tmp_path / "game.jsonl")
+    log = EventLog(path, board=DEFAULT_BOARD, player_names=PLAYERS, seed=9, bank=bank.fingerprint())
+    cards = random.Random(9)
+    engine = RulesEngine(DEFAULT_BOARD, len(PLAYERS), rng=random.Random(9),
+                         draw_card=lambda category: bank.card(cards.choice(bank.category_ids(category))))
+    play_turns(engine, log, 9, max_turns=12)
+    log.close()
+
+    # The same cards compiled again elsewhere are the same bank
+    same = make_bank(tmp_path, "copy.qbk", RECORDS)
+    assert same.fingerprint()["sha1"] == bank.fingerprint()["sha1"]
+    seen = []
+    replay(path, listener=seen.append, card_lookup=same.card, bank=same.fingerprint())
+    asked = [event["card"] for event in seen if event.kind == TurnEvent.QUESTION]
+    assert asked and all(card.question.startswith(card.category) for card in asked)
+
+    edited = [dict(record) for record in RECORDS]
+    edited[5]["question"] = "Something else?"
+    for other in (make_bank(tmp_path, "edited.qbk", edited),
+                  make_bank(tmp_path, "shorter.qbk", RECORDS[:-1])):
+        with pytest.raises(BankMismatch):
+            replay(path, card_lookup=other.card, bank=other.fingerprint())
+        other.close()
+    for opened in (bank, same):
+        opened.close()
+
+
+def test_logs_without_a_bank_are_not_checked(tmp_path):
+    bank = make_bank(tmp_path, "bank.qbk", RECORDS)
+    check_bank({"bank": None}, bank.fingerprint())
+    check_bank({}, bank.fingerprint())
+    bank.close()
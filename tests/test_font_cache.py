@@ -0,0 +1,49 @@
+"""FontCache: shared fonts and the LRU cache of text surfaces."""
+import pygame
+import pytest
+
+from font_cache import FontCache
+
+BLACK = (0, 0, 0)
+
+
+@pytest.fixture(autouse=True)
+def fonts_ready():
+    pygame.font.init()
+    yield
+    pygame.font.quit()
+
+
+def test_fonts_are_loaded_once_per_size():
+    cache = FontCache()
+    assert cache.get_font(24) is cache.get_font(24)
+    cache.get_font(32)
+    assert cache.fonts_created == 2
+
+
+def test_repeated_text_is_rendered_once():
+    cache = FontCache()
+    first = cache.render("Hamotzi", 32, BLACK)
+    assert cache.render("Hamotzi", 32, [0, 0, 0]) is first  # Any color sequence is the same key
+    assert cache.render("Hamotzi", 24, BLACK) is not first
+    assert (cache.surfaces_created, cache.hits) == (2, 1)
+
+
+def test_least_recently_used_surfaces_are_evicted():
+    cache = FontCache()
+    sizes = {text: FontCache._surface_bytes(cache.render(text, 32, BLACK)) for text in "ABC"}
+    cache = FontCache(max_bytes=sizes["A"] + sizes["B"] + sizes["C"] - 1)
+    cache.render("A", 32, BLACK)
+    cache.render("B", 32, BLACK)
+    cache.render("A", 32, BLACK)  # A is now more recent than B
+    cache.render("C", 32, BLACK)
+    assert [key[0] for key in cache.surfaces] == ["A", "C"]
+    assert cache.cached_bytes == sizes["A"] + sizes["C"] <= cache.max_bytes
+
+
+def test_a_surface_bigger_than_the_cap_is_still_kept():
+    cache = FontCache(max_bytes=1)
+    surface = cache.render("Shehakol", 32, BLACK)
+    assert list(cache.surfaces.values()) == [surface]
+    cache.clear()
+    assert not cache.surfaces and cache.cached_bytes == 0
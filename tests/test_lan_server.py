@@ -0,0 +1,319 @@
+"""LAN server rooms played by LanClients over loopback."""
+import asyncio
+import random
+
+import pytest
+
+import lan_server
+from lan_client import LanClient, play_bot
+from lan_server import LanServer
+from question_bank import DEFAULT_BANK, QuestionBank
+
+
+@pytest.fixture(scope="module")
+def bank(tmp_path_factory):
+    bank = QuestionBank.open(DEFAULT_BANK, str(tmp_path_factory.mktemp("bank") / "bank.qbk"))
+    yield bank
+    bank.close()
+
+
+def run(coroutine):
+    return asyncio.run(asyncio.wait_for(coroutine, 60))
+
+
+async def connect(server, room, name):
+    client = await LanClient().connect("127.0.0.1", server.port)
+    await client.join(room, name)
+    await receive_until(client, lambda m: m["type"] == "state")
+    return client
+
+
+async def receive_until(client, predicate, timeout=5):
+    while True:
+        message = await asyncio.wait_for(client.receive(), timeout)
+        assert message is not None, "server closed the connection"
+        if predicate(message):
+            return message
+
+
+def is_prompt(message, prompt=None):
+    return message["type"] == "prompt" and (prompt is None or message["prompt"] == prompt)
+
+
+async def players_in(client, count):
+    while len(client.state.get("players", ())) != count:
+        await asyncio.wait_for(client.receive(), 5)
+
+
+def test_lobby_leave_renumbers_seats(bank):
+    async def scenario():
+        server = await LanServer(bank, "127.0.0.1", 0).start()
+        a = await connect(server, "r", "A")
+        b = await connect(server, "r", "B")
+        c = await connect(server, "r", "C")
+        assert (a.seat, b.seat, c.seat) == (0, 1, 2)
+
+        await a.close()
+        await receive_until(b, lambda m: m["type"] == "joined")
+        await receive_until(c, lambda m: m["type"] == "joined")
+        assert (b.seat, c.seat) == (0, 1)
+        await players_in(b, 2)
+
+        # B is now the host and gets the first roll; before the fix the game deadlocked here
+        await b.send({"type": "start"})
+        prompt = await receive_until(b, lambda m: is_prompt(m, "roll"))
+        assert prompt["seat"] == b.seat
+        await b.send({"type": "roll"})
+        event = await receive_until(c, lambda m: m["type"] == "event" and m["kind"] == "roll")
+        assert event["player"] == 0
+        for client in (b, c):
+            await client.close()
+        await server.close()
+
+    run(scenario())
+
+
+def test_lobby_join_errors(bank):
+    async def scenario():
+        server = await LanServer(bank, "127.0.0.1", 0).start()
+        a = await connect(server, "r", "A")
+        b = await LanClient().connect("127.0.0.1", server.port)
+        await b.join("r", "A")
+        error = await receive_until(b, lambda m: m["type"] == "error")
+        assert "already playing" in error["message"]
+        await b.send({"type": "start"})
+        await receive_until(b, lambda m: m["type"] == "error")
+
+        await a.send({"type": "start"})
+        error = await receive_until(a, lambda m: m["type"] == "error")
+        assert "At least" in error["message"]
+        for client in (a, b):
+            await client.close()
+        await server.close()
+
+    run(scenario())
+
+
+def test_full_turn_cycle(bank):
+    async def scenario():
+        server = await LanServer(bank, "127.0.0.1", 0).start()
+        a = await connect(server, "r", "A")
+        b = await connect(server, "r", "B")
+        await players_in(a, 2)
+        await a.send({"type": "start"})
+
+        # One turn: roll, answer or choose as prompted, until the turn passes to B
+        await receive_until(a, lambda m: is_prompt(m, "roll") and m["seat"] == 0)
+        await a.send({"type": "roll"})
+        while True:
+            message = await receive_until(a, lambda m: is_prompt(m) or m["type"] == "event")
+            if message["type"] == "event" and message["kind"] in ("next_player", "win"):
+                break
+            if is_prompt(message, "question"):
+                assert "correct_option" not in message["card"]
+                await a.send({"type": "answer", "option": 0})
+            elif is_prompt(message, "category"):
+                await a.send({"type": "category", "category": "Food"})
+        assert message == {"type": "event", "kind": "next_player", "player": 1}
+        # Prompts go to everybody; B waits for the one for its own seat
+        await receive_until(b, lambda m: is_prompt(m, "roll") and m["seat"] == b.seat == 1)
+
+        # Rolling out of turn is refused
+        await a.send({"type": "roll"})
+        error = await receive_until(a, lambda m: m["type"] == "error")
+        assert "not your turn" in error["message"]
+        for client in (a, b):
+            await client.close()
+        await server.close()
+
+    run(scenario())
+
+
+@pytest.mark.parametrize("buzz_in", [False, True])
+def test_bots_play_whole_games(bank, buzz_in):
+    async def scenario():
+        server = await LanServer(bank, "127.0.0.1", 0).start()
+        states = await asyncio.gather(*(
+            play_bot(room, name, port=server.port, start_with=3, rng=random.Random(seed),
+                     buzz_in=buzz_in)
+            for seed, (room, name) in enumerate([(room, name) for room in ("r1", "r2")
+                                                 for name in ("A", "B", "C")])))
+        await server.close()
+        return states
+
+    for state in run(scenario()):
+        assert state["phase"] == "over"
+        assert state["positions"][state["winner"]] == len(lan_server.DEFAULT_BOARD) - 1
+        assert state["buzz_in"] is buzz_in
+
+
+def test_reconnect_mid_game(bank):
+    async def scenario():
+        server = await LanServer(bank, "127.0.0.1", 0).start()
+        a = await connect(server, "r", "A")
+        b = await connect(server, "r", "B")
+        await players_in(a, 2)
+        await a.send({"type": "start"})
+        await receive_until(a, lambda m: is_prompt(m, "roll"))
+        room = server.rooms["r"]
+
+        # Everybody drops out; the game waits for them
+        await a.close()
+        await b.close()
+        while not room.empty:
+            await asyncio.sleep(0.01)
+        assert server.rooms["r"] is room
+
+        # A stranger can't take a seat, and doesn't end the wait either
+        stranger = await LanClient().connect("127.0.0.1", server.port)
+        await stranger.join("r", "C")
+        await receive_until(stranger, lambda m: m["type"] == "error")
+        await stranger.close()
+        assert server.rooms["r"] is room
+
+        b = await connect(server, "r", "B")
+        assert b.seat == 1 and b.state["phase"] == "roll"
+        assert b.state["connected"] == [False, True]
+        a = await LanClient().connect("127.0.0.1", server.port)
+        await a.join("r", "A")
+        prompt = await receive_until(a, lambda m: is_prompt(m, "roll"))
+        assert a.seat == 0 and prompt["seat"] == 0
+        await a.send({"type": "roll"})
+        await receive_until(b, lambda m: m["type"] == "event" and m["kind"] == "roll")
+        for client in (a, b):
+            await client.close()
+        await server.close()
+
+    run(scenario())
+
+
+def test_abandoned_game_is_dropped_after_grace(bank, monkeypatch):
+    monkeypatch.setattr(lan_server, "RECONNECT_GRACE", 0.05)
+
+    async def scenario():
+        server = await LanServer(bank, "127.0.0.1", 0).start()
+        a = await connect(server, "r", "A")
+        b = await connect(server, "r", "B")
+        await players_in(a, 2)
+        await a.send({"type": "start"})
+        await receive_until(a, lambda m: is_prompt(m, "roll"))
+        await a.close()
+        await b.close()
+        for _ in range(100):
+            if "r" not in server.rooms:
+                break
+            await asyncio.sleep(0.01)
+        assert "r" not in server.rooms
+        await server.close()
+
+    run(scenario())
+
+
+async def start_buzz_game(server, names):
+    """Join names to a buzz-in game and play until the first card is out.
+
+    Returns the clients and the one whose card it is.
+    """
+    clients = [await connect(server, "r", name) for name in names]
+    await players_in(clients[0], len(names))
+    await clients[0].send({"type": "start", "buzz_in": True})
+    room = server.rooms["r"]
+    while True:
+        message = await receive_until(clients[0], is_prompt)
+        asker = clients[room.engine.state.current_player]
+        if is_prompt(message, "roll"):
+            await asker.send({"type": "roll"})
+        elif is_prompt(message, "category"):
+            await asker.send({"type": "category", "category": "Food"})
+        else:
+            return clients, asker
+
+
+def test_buzz_round_waits_for_the_asker(bank):
+    async def scenario():
+        server = await LanServer(bank, "127.0.0.1", 0).start()
+        clients, asker = await start_buzz_game(server, ["A", "B"])
+        room = server.rooms["r"]
+        other = clients[1 - asker.seat]
+        correct = room.buzz.card.correct_option
+
+        # A plain answer can't skip the round
+        await asker.send({"type": "answer", "option": correct})
+        await receive_until(asker, lambda m: m["type"] == "error")
+        # A fast correct answer from somebody else doesn't close the round on the asker
+        await other.send({"type": "buzz", "option": correct, "at": lan_server.monotonic()})
+        await asyncio.sleep(lan_server.BUZZ_GRACE * 3)
+        assert room.buzz is not None
+        await asker.send({"type": "buzz", "option": correct, "at": lan_server.monotonic()})
+        result = await receive_until(other, lambda m: m["type"] == "buzz_result")
+        answer = await receive_until(other, lambda m: m["type"] == "event" and m["kind"] == "answer")
+        assert result["fastest"] == other.seat
+        assert answer["player"] == asker.seat and answer["correct"] is True
+        for client in clients:
+            await client.close()
+        await server.close()
+
+    run(scenario())
+
+
+def test_asker_reconnecting_during_a_buzz_round_can_answer(bank, monkeypatch):
+    monkeypatch.setattr(lan_server, "BUZZ_GRACE", 0.5)
+
+    async def scenario():
+        server = await LanServer(bank, "127.0.0.1", 0).start()
+        names = ["A", "B", "C"]
+        clients, asker = await start_buzz_game(server, names)
+        room = server.rooms["r"]
+        correct = room.buzz.card.correct_option
+        others = [client for client in clients if client is not asker]
+
+        # The asker drops, and somebody else answers right while they are gone
+        seat = asker.seat
+        await asker.close()
+        while seat in room.buzz.seats:
+            await asyncio.sleep(0.01)
+        await others[0].send({"type": "buzz", "option": correct, "at": lan_server.monotonic()})
+
+        asker = await LanClient().connect("127.0.0.1", server.port)
+        await asker.join("r", names[seat])
+        prompt = await receive_until(asker, lambda m: is_prompt(m, "buzz"))
+        assert asker.seat == seat and prompt["seat"] == seat
+        # The grace close started while the asker was away doesn't cut them off
+        await asyncio.sleep(lan_server.BUZZ_GRACE * 1.5)
+        assert room.buzz is not None
+        await asker.send({"type": "buzz", "option": correct, "at": lan_server.monotonic()})
+        result = await receive_until(others[1], lambda m: m["type"] == "buzz_result")
+        answer = await receive_until(others[1], lambda m: m["type"] == "event" and m["kind"] == "answer")
+        assert result["fastest"] == others[0].seat
+        assert result["correct"][seat] is True
+        assert answer["player"] == seat and answer["correct"] is True
+        for client in [asker] + others:
+            await client.close()
+        await server.close()
+
+    run(scenario())
+
+
+def test_asker_answering_first_does_not_cut_off_the_others(bank):
+    async def scenario():
+        server = await LanServer(bank, "127.0.0.1", 0).start()
+        clients, asker = await start_buzz_game(server, ["A", "B", "C"])
+        room = server.rooms["r"]
+        correct = room.buzz.card.correct_option
+        others = [client for client in clients if client is not asker]
+
+        await asker.send({"type": "buzz", "option": correct, "at": lan_server.monotonic()})
+        await asyncio.sleep(lan_server.BUZZ_GRACE * 3)
+        assert room.buzz is not None
+        # A slower correct answer still wins the bonus
+        await others[0].send({"type": "buzz", "option": correct, "at": lan_server.monotonic()})
+        result = await receive_until(others[1], lambda m: m["type"] == "buzz_result")
+        assert result["fastest"] == others[0].seat
+        bonus = await receive_until(others[1], lambda m: m["type"] == "event"
+                                    and m.get("reason") == "buzz_bonus")
+        assert bonus["player"] == others[0].seat
+        for client in clients:
+            await client.close()
+        await server.close()
+
+    run(scenario())
@@ -0,0 +1,66 @@
+"""Answer-time histograms."""
+import json
+import random
+
+import numpy as np
+import pytest
+
+from latency import BUCKETS, MAX_VALUE, LatencyHistogram, LatencyStats, bucket_index, bucket_range
+
+
+def test_buckets_cover_every_value_once():
+    assert bucket_index(MAX_VALUE) == BUCKETS - 1
+    previous_high = -1
+    for index in range(BUCKETS):
+        low, high = bucket_range(index)
+        assert low == previous_high + 1
+        assert bucket_index(low) == bucket_index(high) == index
+        previous_high = high
+    assert previous_high == MAX_VALUE
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_percentiles_match_numpy_within_bucket_precision(seed):
+    rng = random.Random(seed)
+    # Answer times in microseconds: mostly a few seconds, with some long thinkers
+    values = [int(rng.lognormvariate(15, 0.8)) for _ in range(5000)] + list(range(20))
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+    for p in (1, 10, 50, 90, 95, 99, 100):
+        exact = np.percentile(values, p, method="inverted_cdf")
+        assert histogram.percentile(p) == pytest.approx(exact, rel=1 / 30, abs=1)
+    assert histogram.max == max(values)
+    assert histogram.mean == pytest.approx(np.mean(values))
+
+
+def test_small_values_are_exact_and_out_of_range_values_are_clamped():
+    histogram = LatencyHistogram()
+    for value in (3, 7, 7, -5, 2 ** 40):
+        histogram.record(value)
+    assert histogram.percentile(50) == 7
+    assert histogram.percentile(0) == 0
+    assert histogram.max == MAX_VALUE
+    assert LatencyHistogram().percentile(50) == 0
+
+
+def test_merge_and_saved_state():
+    a, b = LatencyHistogram(), LatencyHistogram()
+    for value in range(0, 100000, 7):
+        a.record(value)
+    for value in range(50000, 200000, 11):
+        b.record(value)
+    merged = LatencyHistogram()
+    merged.merge(a)
+    merged.merge(b)
+    assert merged.count == a.count + b.count and merged.max == b.max
+
+    stats = LatencyStats()
+    stats.record("Dina", "Food", 1500000)
+    stats.record("Dina", "Daily", 2500000)
+    stats.record("Avi", "Food", 800000)
+    restored = LatencyStats()
+    restored.set_state(json.loads(json.dumps(stats.get_state())))
+    assert restored.summary() == stats.summary()
+    assert restored.summary()["player"]["Dina"]["count"] == 2
+    assert restored.player("Nobody").count == 0
@@ -0,0 +1,35 @@
+"""Board layout search: mutations and resuming from a checkpoint."""
+import random
+from collections import Counter
+
+from layout_optimizer import LayoutSearch, Objective, mutate
+from rules import DEFAULT_BOARD
+
+
+def test_mutate_only_swaps_interior_tiles():
+    rng = random.Random(1)
+    board = mutate(DEFAULT_BOARD, rng, swaps=5)
+    assert board != DEFAULT_BOARD
+    assert Counter(board) == Counter(DEFAULT_BOARD)
+    assert board[0] == "START" and board[-1] == "END"
+
+
+def test_resumed_search_continues_where_it_stopped(tmp_path):
+    checkpoint = str(tmp_path / "nested" / "layout_search.json")
+
+    def search(**kwargs):
+        return LayoutSearch(Objective(30, num_players=2), beam_width=3, candidates_per_generation=6,
+                            seed=5, **kwargs)
+
+    stopped = search(checkpoint_path=checkpoint)
+    stopped.run(2, workers=1, report=None)
+    resumed = LayoutSearch.load_checkpoint(checkpoint)
+    assert resumed.generation == 2
+    assert resumed.beam == stopped.beam
+    assert resumed.objective.to_dict() == stopped.objective.to_dict()
+    resumed.run(1, workers=1, report=None)
+
+    straight = search()
+    straight.run(3, workers=1, report=None)
+    assert resumed.beam == straight.beam
+    assert straight.best[0] <= straight.objective.evaluate(DEFAULT_BOARD)[0]
@@ -0,0 +1,48 @@
+"""The exact Markov chain results against the Monte Carlo simulator."""
+import numpy as np
+import pytest
+
+import markov
+from rules import DEFAULT_BOARD
+from simulate import simulate
+
+GAMES = 40000
+
+
+@pytest.fixture(scope="module", params=[0.5, 0.7, 0.9])
+def single_player(request):
+    accuracy = request.param
+    return markov.solve(DEFAULT_BOARD, accuracy), simulate(GAMES, 1, accuracy, seed=1)
+
+
+def test_expected_turns_agree(single_player):
+    exact, simulated = single_player
+    turns = simulated.game_turns
+    assert len(turns) == GAMES
+    # Well within five standard errors of the exact mean
+    assert abs(turns.mean() - exact.expected_turns) < 5 * np.sqrt(exact.variance / GAMES)
+    assert turns.var() == pytest.approx(exact.variance, rel=0.05)
+
+
+def test_landings_agree(single_player):
+    exact, simulated = single_player
+    visits = exact.tile_visit_frequency()
+    simulated_visits = simulated.landings / GAMES
+    assert np.abs(visits - simulated_visits).max() < 0.03
+
+
+def test_finish_time_distribution_matches_game_lengths(single_player):
+    exact, simulated = single_player
+    distribution = exact.finish_time_distribution()
+    assert distribution.sum() == pytest.approx(1.0)
+    histogram = simulated.length_histogram() / GAMES
+    length = min(len(distribution), len(histogram))
+    assert np.abs(distribution[:length] - histogram[:length]).max() < 0.01
+
+
+def test_seat_win_rates_agree():
+    wins, expected_length = markov.seat_statistics(DEFAULT_BOARD, 0.7, num_players=3)
+    simulated = simulate(GAMES, 3, 0.7, seed=2)
+    assert wins.sum() == pytest.approx(1.0)
+    np.testing.assert_allclose(simulated.wins / GAMES, wins, atol=0.015)
+    assert simulated.game_turns.mean() == pytest.approx(expected_length, rel=0.02)
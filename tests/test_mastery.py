@@ -0,0 +1,51 @@
+"""Mastery carried between sessions through MasteryStore."""
+import os
+
+from mastery import MasteryModel, MasteryStore
+
+
+def play(model, name, answers):
+    player = model.player_index(name)
+    for card_id, correct in answers:
+        model.record(player, card_id, correct)
+    return player
+
+
+def test_students_carry_mastery_to_the_next_session(tmp_path):
+    store = MasteryStore(str(tmp_path))
+    first = MasteryModel(10)
+    play(first, "Dina", [(1, True), (1, True), (2, False)])
+    play(first, "Yosef/Levi", [(3, True)])
+    store.save(first, ["Dina", "Yosef/Levi"])
+
+    # A later session with a different roster order and a new student
+    later = MasteryModel(10)
+    play(later, "Avi", [(4, False)])
+    store.load(later, ["Yosef/Levi", "Dina", "Avi"])
+    for name in ("Dina", "Yosef/Levi"):
+        assert later.get_player_state(name) == first.get_player_state(name)
+    assert later.get_card_state() == first.get_card_state()
+    assert later.box(later.players["Dina"], 1) == 2
+    assert later.ability[later.players["Avi"]] < 0  # Not overwritten: Avi had no file
+
+
+def test_files_for_another_bank_are_ignored(tmp_path, capsys):
+    store = MasteryStore(str(tmp_path))
+    old = MasteryModel(10)
+    play(old, "Dina", [(1, True)])
+    store.save(old, ["Dina"])
+
+    model = MasteryModel(12)
+    store.load(model, ["Dina"])
+    assert model.players == {}
+    assert "different question bank" in capsys.readouterr().out
+
+
+def test_unreadable_file_is_skipped(tmp_path, capsys):
+    store = MasteryStore(str(tmp_path))
+    os.makedirs(os.path.dirname(store.student_path("Dina")))
+    with open(store.student_path("Dina"), "w") as f:
+        f.write("{not json")
+    model = MasteryModel(5)
+    store.load(model, ["Dina"])
+    assert "Ignoring mastery file" in capsys.readouterr().out
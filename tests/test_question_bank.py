@@ -0,0 +1,131 @@
+"""Question banks compiled from JSON/CSV sources and read through mmap."""
+import json
+import os
+
+import pytest
+
+from question_bank import DEFAULT_BANK, QuestionBank, compile_bank, duplicate_key, load_source
+
+RECORDS = [
+    {"category": "Food", "question": "What is the blessing for bread?",
+     "options": ["Hamotzi", "Mezonot", "Shehakol"], "correct": 0},
+    {"category": "Food", "question": "What is the blessing for BREAD (a roll)?",
+     "options": ["Hamotzi", "Mezonot"], "correct": 0},
+    {"category": "Daily", "question": "Which blessing is said on waking?",
+     "options": ["Modeh Ani", "Shema"], "correct": 0, "group": "waking"},
+    {"category": "Daily", "question": "What do we say first thing in the morning?",
+     "options": ["Shema", "Modeh Ani"], "correct": 1, "group": "waking"},
+    {"category": "Special", "question": "ברכה על ברק?",
+     "options": ["עושה מעשה בראשית", "שהחיינו"], "correct": 0},
+]
+
+
+def write_source(path, records):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(records, f, ensure_ascii=False)
+
+
+@pytest.fixture
+def bank(tmp_path):
+    path = str(tmp_path / "bank.qbk")
+    compile_bank(RECORDS, path)
+    bank = QuestionBank(path)
+    yield bank
+    bank.close()
+
+
+def test_cards_round_trip(bank):
+    assert bank.card_count == len(RECORDS)
+    assert bank.categories == ["Food", "Daily", "Special"]
+    for card_id, record in enumerate(RECORDS):
+        card = bank.card(card_id)
+        assert (card.category, card.question, list(card.options), card.correct_option, card.card_id) == (
+            record["category"], record["question"], record["options"], record["correct"], card_id)
+    assert list(bank.category_ids("Daily")) == [2, 3]
+    assert bank.count("Special") == 1
+    with pytest.raises(IndexError):
+        bank.card(len(RECORDS))
+
+
+def test_duplicate_groups(bank):
+    # Same question apart from case and a parenthetical remark, or an explicit group
+    assert bank.group(0) == bank.group(1)
+    assert bank.group(2) == bank.group(3)
+    assert len({bank.group(0), bank.group(2), bank.group(4)}) == 3
+    assert duplicate_key(RECORDS[0]) == "what is the blessing for bread"
+
+
+def test_recently_built_cards_are_reused(tmp_path):
+    path = str(tmp_path / "bank.qbk")
+    compile_bank(RECORDS, path)
+    bank = QuestionBank(path, cache_size=2)
+    first = bank.card(0)
+    assert bank.card(0) is first
+    bank.card(1)
+    bank.card(2)  # Pushes card 0 out
+    assert bank.card(0) is not first
+    bank.close()
+
+
+def test_bad_cards_are_refused(tmp_path):
+    with pytest.raises(ValueError):
+        compile_bank([dict(RECORDS[0], correct=3)], str(tmp_path / "bad.qbk"))
+    not_a_bank = tmp_path / "not_a_bank.qbk"
+    not_a_bank.write_bytes(b"nothing to see here, just some bytes")
+    with pytest.raises(ValueError):
+        QuestionBank(str(not_a_bank))
+
+
+def test_csv_source(tmp_path):
+    source = tmp_path / "cards.csv"
+    source.write_text("category,question,correct,option1,option2,option3\n"
+                      "Food,Blessing for apples?,1,Hamotzi,Ha'etz,\n", encoding="utf-8")
+    assert load_source(str(source)) == [{"category": "Food", "question": "Blessing for apples?",
+                                         "options": ["Hamotzi", "Ha'etz"], "correct": 1}]
+
+
+def test_open_compiles_and_recompiles_a_stale_bank(tmp_path):
+    source = str(tmp_path / "cards.json")
+    write_source(source, RECORDS)
+    bank = QuestionBank.open(source)
+    compiled = bank.path
+    assert compiled == str(tmp_path / "cards.qbk")
+    bank.close()
+
+    # An unchanged source reuses the compiled file
+    before = os.path.getmtime(compiled)
+    QuestionBank.open(source).close()
+    assert os.path.getmtime(compiled) == before
+
+    # An edited source is newer than the compiled bank
+    write_source(source, RECORDS[:2])
+    os.utime(compiled, (before - 10, before - 10))
+    bank = QuestionBank.open(source)
+    assert bank.card_count == 2
+    bank.close()
+
+
+def test_the_shipped_bank_compiles(tmp_path):
+    bank = QuestionBank.open(DEFAULT_BANK, str(tmp_path / "berachot.qbk"))
+    assert bank.card_count == len(load_source(DEFAULT_BANK))
+    assert set(bank.categories) >= {"Food", "Daily", "Special"}
+    bank.close()
+
+
+def test_cards_share_one_string_per_option(bank):
+    assert bank.option_count == 7  # 11 options on the cards, 7 different
+    assert bank.card(0).options[0] is bank.card(1).options[0]
+    assert bank.card(2).options[1] is bank.card(3).options[0]
+    assert bank.option(0) == "Hamotzi"
+
+
+def test_bank_in_an_older_format_is_recompiled(tmp_path):
+    source = str(tmp_path / "cards.json")
+    write_source(source, RECORDS)
+    compiled = tmp_path / "cards.qbk"
+    compiled.write_bytes(b"BQB1\x02\x00" + bytes(64))  # Version 2 header
+    os.utime(source, (0, 0))  # The source is older, so only the version says it's stale
+    bank = QuestionBank.open(source)
+    assert bank.card_count == len(RECORDS)
+    assert bank.card(4).options == tuple(RECORDS[4]["options"])
+    bank.close()
@@ -0,0 +1,78 @@
+"""Non-repeating question draws."""
+import json
+
+from question_sampler import QuestionSampler
+
+
+class FakeBank:
+    """Just the parts of QuestionBank the sampler uses."""
+
+    def __init__(self, cards):
+        self.cards = cards  # card id -> (category, group)
+
+    def category_ids(self, category):
+        return [card_id for card_id, (c, _) in enumerate(self.cards) if c == category]
+
+    def group(self, card_id):
+        return self.cards[card_id][1]
+
+
+def groups_of(bank, card_ids):
+    return [bank.group(card_id) for card_id in card_ids]
+
+
+def test_every_question_comes_up_once_per_round():
+    bank = FakeBank([("Food", group) for group in range(10)])
+    sampler = QuestionSampler(bank, seed=1)
+    draws = [sampler.draw("Food") for _ in range(30)]
+    for round_start in range(0, 30, 10):
+        assert sorted(draws[round_start:round_start + 10]) == list(range(10))
+
+
+def test_recent_groups_are_not_repeated_across_categories():
+    # Groups 0-3 are asked in both categories, in other words
+    cards = [("Food", group) for group in range(6)] + [("Daily", group) for group in range(4)]
+    bank = FakeBank(cards)
+    sampler = QuestionSampler(bank, min_questions_before_repeat=3, seed=2)
+    draws = [sampler.draw(category) for _ in range(40) for category in ("Food", "Daily")]
+    groups = groups_of(bank, draws)
+    for i, group in enumerate(groups):
+        assert group not in groups[max(0, i - 3):i]
+
+
+def test_variants_of_a_group_count_as_one_question():
+    cards = [("Food", 0), ("Food", 0), ("Food", 0), ("Food", 1), ("Food", 2)]
+    bank = FakeBank(cards)
+    sampler = QuestionSampler(bank, min_questions_before_repeat=1, seed=3)
+    draws = [sampler.draw("Food") for _ in range(30)]
+    groups = groups_of(bank, draws)
+    for round_start in range(0, 30, 3):
+        assert sorted(groups[round_start:round_start + 3]) == [0, 1, 2]
+    assert set(draws) == {0, 1, 2, 3, 4}  # Each wording gets asked at some point
+
+
+def test_a_tiny_category_has_to_repeat():
+    bank = FakeBank([("Special", 0)])
+    sampler = QuestionSampler(bank, min_questions_before_repeat=4, seed=4)
+    assert [sampler.draw("Special") for _ in range(3)] == [0, 0, 0]
+
+
+def test_score_picks_the_best_of_the_next_fresh_groups():
+    bank = FakeBank([("Food", group) for group in range(20)])
+    sampler = QuestionSampler(bank, min_questions_before_repeat=0, seed=5, lookahead=20)
+    assert sampler.draw("Food", score=lambda card_id: card_id) == 19
+    assert sampler.draw("Food", score=lambda card_id: -card_id) == 0
+
+
+def test_saved_state_carries_on_with_the_same_draws():
+    cards = [("Food", group) for group in range(8)] + [("Daily", group) for group in range(3, 9)]
+    bank = FakeBank(cards)
+    sampler = QuestionSampler(bank, seed=6)
+    for _ in range(7):
+        sampler.draw("Food")
+        sampler.draw("Daily")
+    state = json.loads(json.dumps(sampler.get_state()))
+    restored = QuestionSampler(bank, seed=99)
+    restored.set_state(state)
+    expected = [sampler.draw(category) for _ in range(20) for category in ("Food", "Daily")]
+    assert [restored.draw(category) for _ in range(20) for category in ("Food", "Daily")] == expected
@@ -0,0 +1,166 @@
+"""RulesEngine turns played with seeded dice."""
+import random
+from array import array
+
+import pytest
+
+from rules import (BUZZ_BONUS, DEFAULT_BOARD, PRAYER_BONUS, PRAYER_PENALTY, QUESTION_CATEGORIES,
+                   TILE_NAMES, AccuracyStrategy, BoardTables, Category, RandomCategoryStrategy,
+                   RulesEngine, TileKind, TurnEvent, board_names, encode_board, play_game)
+
+SEEDS = range(8)
+
+
+def board_of(tile, length=8):
+    return ["START"] + [tile] * length + ["END"]
+
+
+def dice(seed):
+    """A copy of the engine's dice, to work out what a turn should do."""
+    return random.Random(seed)
+
+
+def play(engine, answer=True, category="Daily", buzz=None):
+    return engine.play_turn(lambda event: answer, lambda event: category, buzz=buzz)
+
+
+def kinds(events):
+    return [event.kind for event in events]
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_correct_answer_stays(seed):
+    engine = RulesEngine(board_of("Food"), 2, rng=random.Random(seed), draw_card=lambda c: c + "!")
+    roll = dice(seed).randint(1, 6)
+    events = play(engine, answer=True)
+    assert events == [
+        TurnEvent(TurnEvent.ROLL, 0, roll=roll),
+        TurnEvent(TurnEvent.MOVE, 0, start=0, end=roll, reason="roll"),
+        TurnEvent(TurnEvent.QUESTION, 0, category="Food", card="Food!"),
+        TurnEvent(TurnEvent.ANSWER, 0, category="Food", card="Food!", correct=True),
+        TurnEvent(TurnEvent.NEXT_PLAYER, 1),
+    ]
+    assert engine.state.positions == [roll, 0]
+    assert engine.state.correct_answers == [1, 0]
+    assert engine.state.turns == 1
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_wrong_answer_moves_back(seed):
+    engine = RulesEngine(board_of("Daily"), 1, rng=random.Random(seed))
+    rng = dice(seed)
+    roll, back = rng.randint(1, 6), rng.randint(1, 3)
+    events = play(engine, answer=False)
+    assert events[-2] == TurnEvent(TurnEvent.MOVE, 0, start=roll, end=max(0, roll - back),
+                                   reason="wrong_answer", spaces=back)
+    assert engine.state.correct_answers == [0]
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_black_hole_sends_back_to_the_one_before(seed):
+    engine = RulesEngine(board_of("Black_Hole"), 1, rng=random.Random(seed))
+    roll = dice(seed).randint(1, 6)
+    events = play(engine)
+    assert kinds(events) == [TurnEvent.ROLL, TurnEvent.MOVE, TurnEvent.BLACK_HOLE, TurnEvent.MOVE,
+                             TurnEvent.NEXT_PLAYER]
+    # Every tile is a black hole, so the one before is the previous tile (or START)
+    assert events[3]["end"] == roll - 1
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("correct", [True, False])
+def test_prayer_asks_the_chosen_category(seed, correct):
+    engine = RulesEngine(board_of("Prayer", 12), 1, rng=random.Random(seed))
+    roll = dice(seed).randint(1, 6)
+    events = play(engine, answer=correct, category="Special")
+    assert events[2].kind == TurnEvent.CHOOSE_CATEGORY
+    assert events[3]["category"] == "Special"
+    expected = roll + PRAYER_BONUS if correct else roll - PRAYER_PENALTY
+    assert engine.state.positions == [expected]
+
+
+def test_prayer_with_an_unknown_category_picks_one():
+    engine = RulesEngine(board_of("Prayer"), 1, rng=random.Random(3))
+    events = play(engine, category="Nonsense")
+    assert events[3]["category"] in ("Food", "Daily", "Special")
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_star_bonus(seed):
+    engine = RulesEngine(board_of("Star", 12), 1, rng=random.Random(seed))
+    rng = dice(seed)
+    roll = rng.randint(1, 6)
+    category = rng.choice(("Food", "Daily", "Special"))
+    bonus = rng.randint(1, 3)
+    events = play(engine)
+    assert events[2].kind == TurnEvent.STAR
+    assert events[3]["category"] == category
+    assert engine.state.positions == [roll + bonus]
+
+
+def test_reaching_end_wins_and_ends_the_game():
+    engine = RulesEngine(["START", "END"], 2, rng=random.Random(0))
+    events = play(engine)
+    assert events[-1] == TurnEvent(TurnEvent.WIN, 0)
+    assert engine.state.winner == 0
+    with pytest.raises(RuntimeError):
+        play(engine)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_buzz_winner_moves_forward(seed):
+    engine = RulesEngine(board_of("Food", 20), 2, rng=random.Random(seed), buzz_in=True)
+    rng = dice(seed)
+    rng.randint(1, 6)
+    bonus = rng.randint(*BUZZ_BONUS)
+    events = play(engine, buzz=lambda event: 1)
+    assert events[4].kind == TurnEvent.BUZZ
+    assert events[5] == TurnEvent(TurnEvent.MOVE, 1, start=0, end=bonus, reason="buzz_bonus",
+                                  spaces=bonus)
+
+
+def test_asker_cannot_win_their_own_buzz():
+    engine = RulesEngine(board_of("Food"), 2, rng=random.Random(1), buzz_in=True)
+    events = play(engine, buzz=lambda event: 0)
+    assert kinds(events)[-2:] == [TurnEvent.BUZZ, TurnEvent.NEXT_PLAYER]
+    assert engine.state.positions[1] == 0
+
+
+def test_same_seed_plays_the_same_game():
+    def game(seed):
+        engine = RulesEngine(DEFAULT_BOARD, 3, rng=random.Random(seed))
+        events = play_game(engine, AccuracyStrategy(0.7, random.Random(seed)),
+                           RandomCategoryStrategy(random.Random(seed)))
+        return events, engine.state
+
+    first, state = game(42)
+    second, _ = game(42)
+    assert first == second
+    assert state.winner is not None
+    assert state.positions[state.winner] == len(DEFAULT_BOARD) - 1
+    assert first[-1] == TurnEvent(TurnEvent.WIN, state.winner)
+    assert game(43)[0] != first
+
+
+def test_boards_round_trip_between_names_and_kinds():
+    kinds = encode_board(DEFAULT_BOARD)
+    assert isinstance(kinds, array) and kinds.itemsize == 1 and len(kinds) == len(DEFAULT_BOARD)
+    assert board_names(kinds) == DEFAULT_BOARD
+    assert encode_board(kinds) is kinds
+    assert encode_board([TileKind.START, 2, TileKind.END]).tolist() == [0, 2, 1]
+    assert board_names(["START", TileKind.FOOD, "END"]) == ["START", "Food", "END"]
+    with pytest.raises(ValueError):
+        encode_board(["START", "Lava", "END"])
+    with pytest.raises(ValueError):
+        BoardTables(["Food", "END"])
+
+
+def test_categories_and_tables():
+    assert [category.label for category in Category] == list(QUESTION_CATEGORIES)
+    assert Category.from_label("Daily") is Category.DAILY
+    tables = BoardTables(DEFAULT_BOARD)
+    assert all(TILE_NAMES[tables.kinds[i]] == tables.category[i]
+               for i in tables.category_tiles["Food"])
+    engine = RulesEngine(encode_board(DEFAULT_BOARD), 2, rng=random.Random(0))
+    assert board_names(engine.board) == DEFAULT_BOARD
+    assert not hasattr(engine.state, "__dict__")
@@ -0,0 +1,59 @@
+"""The vectorized simulator against games played by RulesEngine."""
+import random
+
+import numpy as np
+import pytest
+
+from rules import DEFAULT_BOARD, AccuracyStrategy, RandomCategoryStrategy, RulesEngine, play_game
+from simulate import simulate
+
+ENGINE_GAMES = 1000
+GAMES = 40000
+
+
+def engine_games(num_players, accuracy, seed):
+    """Game lengths and winning seats from RulesEngine, the reference rules."""
+    rng = random.Random(seed)
+    turns, winners = [], []
+    for _ in range(ENGINE_GAMES):
+        engine = RulesEngine(DEFAULT_BOARD, num_players, rng=rng)
+        play_game(engine, AccuracyStrategy(accuracy, rng), RandomCategoryStrategy(rng))
+        turns.append(engine.state.turns)
+        winners.append(engine.state.winner)
+    return np.array(turns), np.bincount(winners, minlength=num_players)
+
+
+@pytest.mark.parametrize("num_players, accuracy", [(1, 0.7), (3, 0.5), (2, 0.9)])
+def test_game_length_matches_the_rules_engine(num_players, accuracy):
+    turns, _ = engine_games(num_players, accuracy, seed=num_players)
+    simulated = simulate(GAMES, num_players, accuracy, seed=num_players).game_turns
+    standard_error = np.sqrt(turns.var() / ENGINE_GAMES + simulated.var() / GAMES)
+    assert abs(turns.mean() - simulated.mean()) < 5 * standard_error
+
+
+def test_win_rates_match_the_rules_engine():
+    _, wins = engine_games(2, 0.7, seed=7)
+    simulated = simulate(GAMES, 2, 0.7, seed=7)
+    np.testing.assert_allclose(simulated.wins / GAMES, wins / ENGINE_GAMES, atol=0.06)
+
+
+def test_same_seed_same_result():
+    first = simulate(5000, 2, [0.6, 0.8], seed=3, batch_size=1000)
+    second = simulate(5000, 2, [0.6, 0.8], seed=3, batch_size=1000)
+    np.testing.assert_array_equal(first.game_turns, second.game_turns)
+    np.testing.assert_array_equal(first.landings, second.landings)
+
+
+def test_statistics_add_up():
+    result = simulate(5000, 3, 0.7, seed=4, batch_size=1500)
+    assert result.games == 5000 and result.unfinished == 0
+    assert result.wins.sum() == len(result.game_turns) == 5000
+    assert result.landing_frequency().sum() == pytest.approx(1.0)
+    assert result.seat_advantage().sum() == pytest.approx(0.0)
+    assert result.length_histogram().sum() == 5000
+
+
+def test_games_over_max_turns_are_unfinished():
+    result = simulate(1000, 2, 0.0, seed=5, max_turns=4)
+    assert result.unfinished == 1000
+    assert len(result.game_turns) == 0
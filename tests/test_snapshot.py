@@ -0,0 +1,51 @@
+"""Autosave snapshot files."""
+import random
+
+from snapshot import (HEADER, delete_snapshot, has_snapshot, load_snapshot, rng_state_from_json,
+                      rng_state_to_json, save_snapshot)
+
+STATE = {"board": ["START", "Food", "END"], "players": [{"name": "דינה", "number": 1}],
+         "positions": [1], "turns": 3}
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "games" / "autosave.snapshot")
+    assert not has_snapshot(path) and load_snapshot(path) is None
+    save_snapshot(STATE, path)
+    assert has_snapshot(path)
+    assert load_snapshot(path) == STATE
+    assert not (tmp_path / "games" / "autosave.snapshot.tmp").exists()
+    save_snapshot(dict(STATE, turns=4), path)  # Replaces the old one
+    assert load_snapshot(path)["turns"] == 4
+    delete_snapshot(path)
+    delete_snapshot(path)  # Already gone is fine
+    assert not has_snapshot(path)
+
+
+def test_rng_state_survives_json(tmp_path):
+    rng = random.Random(7)
+    rng.random()
+    path = str(tmp_path / "autosave.snapshot")
+    save_snapshot({"rng": rng_state_to_json(rng)}, path)
+    restored = random.Random()
+    rng_state_from_json(restored, load_snapshot(path)["rng"])
+    assert [restored.random() for _ in range(5)] == [rng.random() for _ in range(5)]
+
+
+def test_bad_files_are_ignored(tmp_path, capsys):
+    path = tmp_path / "autosave.snapshot"
+    save_snapshot(STATE, str(path))
+    good = path.read_bytes()
+    payload = good[HEADER.size:]
+    bad_files = {
+        "wrong magic": b"XXXX" + good[4:],
+        "newer version": HEADER.pack(b"BJS1", 99, len(payload)) + payload,
+        "truncated": good[:-3],
+        "too short": good[:5],
+        "corrupt payload": HEADER.pack(b"BJS1", 1, 4) + b"junk",
+    }
+    for data in bad_files.values():
+        path.write_bytes(data)
+        assert load_snapshot(str(path)) is None
+    output = capsys.readouterr().out
+    assert "unknown format or truncated file" in output and "corrupt payload" in output
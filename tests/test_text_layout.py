@@ -0,0 +1,59 @@
+"""TextLayout wrapping and the right-to-left display order."""
+import pygame
+import pytest
+
+from font_cache import FontCache
+from text_layout import TextLayout, is_rtl, visual_order
+
+BLACK = (0, 0, 0)
+
+
+@pytest.fixture
+def layout():
+    pygame.font.init()
+    yield TextLayout(FontCache())
+    pygame.font.quit()
+
+
+@pytest.mark.parametrize("line, shown", [
+    ("hello world", "hello world"),
+    ("שלום world 123", "world 123 םולש"),  # Digits after Latin keep to the Latin run
+    ("בשנת 2024 בירך", "ךריב 2024 תנשב"),  # Numbers keep their own order
+    ("Say שלום (now)", "Say םולש (now)"),
+    ("(שלום)", "(םולש)"),                  # Brackets are mirrored in right-to-left runs
+])
+def test_visual_order(line, shown):
+    assert visual_order(line) == shown
+
+
+def test_paragraph_direction_comes_from_the_first_strong_character():
+    assert is_rtl("123 שלום world")
+    assert not is_rtl("Amen אמן")
+    assert not is_rtl("123 ...")
+    assert visual_order("Amen אמן", rtl=True) == "ןמא Amen"
+
+
+def test_wrap_keeps_lines_within_the_width(layout):
+    font = layout.fonts.get_font(24)
+    text = "Which blessing is said over bread and which over cake?\nShehakol"
+    lines = layout.wrap(text, 200, 24)
+    assert len(lines) > 2 and lines[-1] == "Shehakol"
+    assert " ".join(lines[:-1]) == text.split("\n")[0]
+    assert all(font.size(line)[0] <= 200 for line in lines)
+
+
+def test_wrap_breaks_a_word_wider_than_the_line(layout):
+    font = layout.fonts.get_font(24)
+    long_word = "Borei" * 12
+    lines = layout.wrap(f"Say {long_word} now", 120, 24)
+    assert lines[0] == "Say"
+    assert "".join(lines[1:-1]) + lines[-1].split()[0] == long_word
+    assert lines[-1].endswith(" now")
+    assert all(font.size(line)[0] <= 120 for line in lines)
+
+
+def test_blocks_are_rendered_once(layout):
+    block = layout.block("Hamotzi", 300, 24, BLACK)
+    assert layout.block("Hamotzi", 300, 24, [0, 0, 0]) is block
+    assert layout.blocks_created == 1 and not block.rtl
+    assert layout.block("שלום", 300, 24, BLACK).lines == ["םולש"]
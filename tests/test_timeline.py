@@ -0,0 +1,64 @@
+"""Tweens and the timeline that drives them from the frame loop."""
+from timeline import Timeline, Tween, ease_out_quad
+
+
+class CountingScheduler:
+    def __init__(self):
+        self.animations = 0
+
+    def start_animation(self):
+        self.animations += 1
+
+    def stop_animation(self):
+        self.animations -= 1
+
+
+def test_tween_interpolates_after_its_delay():
+    values = []
+    tween = Tween(100, 10, 20, on_update=values.append, delay_ms=50)
+    tween.advance(40)
+    assert values == []  # Still waiting out the delay
+    tween.advance(20)
+    tween.advance(40)
+    assert values == [11.0, 15.0]
+    assert not tween.done
+    tween.advance(100)
+    assert tween.done and values[-1] == 20
+
+
+def test_easing_and_zero_duration():
+    tween = Tween(100, 0, 1, easing=ease_out_quad)
+    tween.advance(50)
+    assert tween.value == 0.75
+    assert Tween(0, 3, 7).value == 7
+
+
+def test_timeline_runs_the_scheduler_only_while_busy():
+    scheduler = CountingScheduler()
+    timeline = Timeline(scheduler)
+    short, long = Tween(100), Tween(300)
+    timeline.add(short)
+    timeline.add(long)
+    assert timeline.busy and scheduler.animations == 1
+    timeline.update(150)
+    assert timeline.tweens == [long]
+    timeline.speed = 2.0  # Fast-forward
+    timeline.update(75)
+    assert not timeline.busy and scheduler.animations == 0
+    timeline.update(10)  # Updating an idle timeline does nothing
+    assert scheduler.animations == 0
+
+
+def test_finish_all_skips_to_the_end():
+    scheduler = CountingScheduler()
+    timeline = Timeline(scheduler)
+    positions = {}
+    timeline.add(Tween(500, 0, 8, on_update=lambda v: positions.__setitem__("token", v)))
+    timeline.add(Tween(200, 1, 0, on_update=lambda v: positions.__setitem__("alpha", v),
+                       delay_ms=1000))
+    timeline.update(100)
+    timeline.finish_all()
+    assert positions == {"token": 8, "alpha": 0}
+    assert not timeline.busy and scheduler.animations == 0
+    timeline.finish_all()
+    assert scheduler.animations == 0
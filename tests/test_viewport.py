@@ -0,0 +1,63 @@
+"""Viewport mapping between the logical surface and a letterboxed window."""
+import pygame
+import pytest
+
+from viewport import Viewport, fit_window_size
+
+LOGICAL = (800, 600)
+
+
+@pytest.fixture
+def viewport(monkeypatch):
+    # The logical surface is convert()ed, which needs a display mode
+    monkeypatch.setenv("SDL_VIDEODRIVER", "dummy")
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    yield Viewport(LOGICAL)
+    pygame.display.quit()
+
+
+def test_letterboxed_window(viewport):
+    surface = viewport.set_window(pygame.Surface((1600, 1400)))
+    assert surface.get_size() == LOGICAL and viewport.scaled
+    assert viewport.scale == 2 and viewport.area == pygame.Rect(0, 100, 1600, 1200)
+    assert viewport.to_logical((0, 100)) == (0, 0)
+    assert viewport.to_logical((800, 700)) == (400, 300)
+    assert viewport.to_logical((1599, 1299)) == (799, 599)
+    assert viewport.to_logical((10, 50)) == (5, -25)  # In the bar above the board
+    assert viewport.to_window((10, 20, 30, 40)) == pygame.Rect(20, 140, 60, 80)
+    assert viewport.to_window((-50, -50, 2000, 2000)) == viewport.area
+
+
+def test_pillarboxed_window(viewport):
+    viewport.set_window(pygame.Surface((1000, 600)))
+    assert viewport.scale == 1 and viewport.area == pygame.Rect(100, 0, 800, 600)
+    assert viewport.to_logical((100, 0)) == (0, 0)
+    assert viewport.to_window((0, 0, 10, 10)) == pygame.Rect(100, 0, 10, 10)
+
+
+def test_fractional_scale_covers_every_logical_pixel(viewport):
+    viewport.set_window(pygame.Surface((1200, 1000)))
+    assert viewport.scale == 1.5
+    for x, y in [(0, 0), (1, 1), (5, 3), (399, 299), (799, 599)]:
+        covered = viewport.to_window((x, y, 1, 1))
+        assert covered.w >= 1 and covered.h >= 1
+        # Its edge pixels are shared with the neighbours, but the last one is its own
+        assert viewport.to_logical((covered.right - 1, covered.bottom - 1)) == (x, y)
+    assert viewport.to_window((1, 1, 1, 1)) == pygame.Rect(1, 51, 2, 2)
+
+
+def test_window_of_the_logical_size_is_drawn_on_directly(viewport):
+    window = pygame.Surface(LOGICAL)
+    assert viewport.set_window(window) is window and not viewport.scaled
+    assert viewport.to_logical((123, 45)) == (123, 45)
+    changes = viewport.changes
+    # Resizing away from it gets a separate logical surface again
+    assert viewport.set_window(pygame.Surface((400, 300))) is not window
+    assert viewport.scale == 0.5 and viewport.changes == changes + 1
+
+
+def test_fit_window_size():
+    assert fit_window_size(LOGICAL, (1920, 1080)) == LOGICAL
+    assert fit_window_size(LOGICAL, (1024, 600)) == (720, 540)
+    assert fit_window_size(LOGICAL, (0, 0)) == LOGICAL
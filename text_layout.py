@@ -0,0 +1,225 @@
+"""Wrapped text blocks, laid out and rendered once and then reused.
+
+TextLayout wraps text to a width by measuring words with font.size()
+(nothing is rendered to measure), renders the lines into one surface and
+keeps it in an LRU cache keyed by (text, width, size, color, align). Drawing
+a question after its first frame is then a single blit.
+
+Right-to-left text (Hebrew) is supported with a simple version of the
+Unicode bidi rules: a paragraph whose first strong character is Hebrew is
+laid out right to left, Hebrew runs are reversed for display, and numbers
+and Latin words inside it keep their own order. The lines are wrapped in
+reading order before reordering, and right-aligned. pygame's default font
+has no Hebrew glyphs, so Hebrew text also needs a font that has them.
+"""
+from collections import OrderedDict
+
+import pygame
+
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024  # Cap for cached blocks (8 MB)
+LINE_SPACING = 1.25                   # Line height as a multiple of the font height
+
+MIRRORED = str.maketrans("()[]{}<>", ")(][}{><")
+
+
+def is_rtl_char(char):
+    code = ord(char)
+    # Hebrew, Arabic and the Hebrew/Arabic presentation forms
+    return 0x0590 <= code <= 0x08FF or 0xFB1D <= code <= 0xFDFF or 0xFE70 <= code <= 0xFEFF
+
+
+def is_strong_ltr(char):
+    return char.isalpha() and not is_rtl_char(char)
+
+
+def is_rtl(text):
+    """True if the first strongly directional character is right to left."""
+    for char in text:
+        if is_rtl_char(char):
+            return True
+        if is_strong_ltr(char):
+            return False
+    return False
+
+
+def visual_order(line, rtl=None):
+    """Reorder one line of text from reading order into left-to-right display order.
+
+    A cut-down Unicode bidi algorithm: characters are R (Hebrew), L (other
+    letters), EN (digits) or neutral; digits after Latin text count as L,
+    neutrals between two runs of the same direction take it, the rest take
+    the paragraph's. Embedding levels then reverse the runs (rule L2), and
+    brackets inside right-to-left runs are mirrored.
+    """
+    if rtl is None:
+        rtl = is_rtl(line)
+    if not rtl and not any(is_rtl_char(c) for c in line):
+        return line
+    base = "R" if rtl else "L"
+
+    types = ["R" if is_rtl_char(c) else "L" if is_strong_ltr(c) else "EN" if c.isdigit() else None
+             for c in line]
+    previous = base
+    for i, kind in enumerate(types):
+        if kind in ("L", "R"):
+            previous = kind
+        elif kind == "EN" and previous == "L":
+            types[i] = "L"
+
+    def direction(kind):
+        return "R" if kind == "EN" else kind
+
+    i = 0
+    while i < len(line):
+        if types[i] is not None:
+            i += 1
+            continue
+        end = i
+        while end < len(line) and types[end] is None:
+            end += 1
+        before = direction(types[i - 1]) if i > 0 else base
+        after = direction(types[end]) if end < len(line) else base
+        types[i:end] = [before if before == after else base] * (end - i)
+        i = end
+
+    if rtl:
+        levels = [1 if kind == "R" else 2 for kind in types]
+    else:
+        levels = [0 if kind == "L" else 1 if kind == "R" else 2 for kind in types]
+    chars = [c.translate(MIRRORED) if level % 2 else c for c, level in zip(line, levels)]
+    # From the highest level down to the lowest odd one, reverse every run at or above it
+    for level in range(max(levels), 0, -1):
+        i = 0
+        while i < len(chars):
+            if levels[i] < level:
+                i += 1
+                continue
+            end = i
+            while end < len(chars) and levels[end] >= level:
+                end += 1
+            chars[i:end] = chars[i:end][::-1]
+            levels[i:end] = levels[i:end][::-1]
+            i = end
+    return "".join(chars)
+
+
+class TextBlock:
+    """Rendered lines of one wrapped text."""
+
+    def __init__(self, surface, lines, rtl):
+        self.surface = surface
+        self.lines = lines
+        self.rtl = rtl
+
+    def get_rect(self, **kwargs):
+        return self.surface.get_rect(**kwargs)
+
+    def draw(self, screen, **position):
+        """Blit the block, positioned like Surface.get_rect(**position); return its rect."""
+        rect = self.surface.get_rect(**position)
+        screen.blit(self.surface, rect)
+        return rect
+
+
+class TextLayout:
+    def __init__(self, fonts, max_bytes=DEFAULT_MAX_BYTES):
+        self.fonts = fonts  # FontCache
+        self.max_bytes = max_bytes
+        self.blocks = OrderedDict()
+        self.cached_bytes = 0
+        self.blocks_created = 0
+        self._word_widths = {}
+
+    def wrap(self, text, width, size):
+        """Split text into lines no wider than width, in reading order."""
+        font = self.fonts.get_font(size)
+        space = self._width(font, size, " ")
+        lines = []
+        for paragraph in text.split("\n"):
+            line, line_width = [], 0
+            for word in paragraph.split():
+                word_width = self._width(font, size, word)
+                if word_width > width:
+                    # A word wider than the whole line is broken where it has to be
+                    if line:
+                        lines.append(" ".join(line))
+                    pieces = self._break_word(font, word, width)
+                    lines.extend(pieces[:-1])
+                    line, line_width = [pieces[-1]], font.size(pieces[-1])[0]
+                elif line and line_width + space + word_width > width:
+                    lines.append(" ".join(line))
+                    line, line_width = [word], word_width
+                else:
+                    line_width += word_width + (space if line else 0)
+                    line.append(word)
+            lines.append(" ".join(line))
+        return lines
+
+    def _width(self, font, size, word):
+        key = (word, size)
+        width = self._word_widths.get(key)
+        if width is None:
+            if len(self._word_widths) > 50000:
+                self._word_widths.clear()
+            width = self._word_widths[key] = font.size(word)[0]
+        return width
+
+    @staticmethod
+    def _break_word(font, word, width):
+        pieces, current = [], ""
+        for char in word:
+            if current and font.size(current + char)[0] > width:
+                pieces.append(current)
+                current = char
+            else:
+                current += char
+        pieces.append(current)
+        return pieces
+
+    def block(self, text, width, size, color, align="start", line_height=None):
+        """The rendered block for text wrapped to width.
+
+        align is "start" (left, or right for right-to-left text), "center",
+        "left" or "right". The block is as wide as its longest line.
+        line_height defaults to LINE_SPACING times the font's line size.
+        """
+        key = (text, width, size, tuple(color), align, line_height)
+        block = self.blocks.get(key)
+        if block is not None:
+            self.blocks.move_to_end(key)
+            return block
+
+        block = self._render(text, width, size, color, align, line_height)
+        self.blocks_created += 1
+        self.blocks[key] = block
+        self.cached_bytes += self._bytes(block)
+        while self.cached_bytes > self.max_bytes and len(self.blocks) > 1:
+            _, old = self.blocks.popitem(last=False)
+            self.cached_bytes -= self._bytes(old)
+        return block
+
+    def _render(self, text, width, size, color, align, line_height):
+        rtl = is_rtl(text)
+        font = self.fonts.get_font(size)
+        lines = [visual_order(line, rtl) for line in self.wrap(text, width, size)]
+        rendered = [font.render(line, True, color) for line in lines]
+        line_height = line_height or round(font.get_linesize() * LINE_SPACING)
+        block_width = max(surface.get_width() for surface in rendered)
+        height = line_height * (len(rendered) - 1) + font.get_height()
+        surface = pygame.Surface((max(1, block_width), max(1, height)), pygame.SRCALPHA)
+        if align == "start":
+            align = "right" if rtl else "left"
+        for i, line in enumerate(rendered):
+            x = {"left": 0, "right": block_width - line.get_width(),
+                 "center": (block_width - line.get_width()) // 2}[align]
+            surface.blit(line, (x, i * line_height))
+        return TextBlock(surface, lines, rtl)
+
+    def clear(self):
+        self.blocks.clear()
+        self.cached_bytes = 0
+
+    @staticmethod
+    def _bytes(block):
+        surface = block.surface
+        return surface.get_width() * surface.get_height() * surface.get_bytesize()
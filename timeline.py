@@ -0,0 +1,85 @@
+def linear(t):
+    return t
+
+
+def ease_out_quad(t):
+    return 1 - (1 - t) * (1 - t)
+
+
+class Tween:
+    """Interpolates a value from start to end over duration_ms.
+
+    on_update(value) is called every time the tween advances, so effects
+    keep their drawing state in whatever the callback writes to.
+    """
+
+    def __init__(self, duration_ms, start=0.0, end=1.0, on_update=None,
+                 delay_ms=0, easing=linear):
+        self.duration_ms = max(0, duration_ms)
+        self.start = start
+        self.end = end
+        self.on_update = on_update
+        self.easing = easing
+        self.elapsed = -delay_ms
+
+    @property
+    def done(self):
+        return self.elapsed >= self.duration_ms
+
+    @property
+    def value(self):
+        if self.duration_ms == 0:
+            progress = 1.0
+        else:
+            progress = min(max(self.elapsed / self.duration_ms, 0.0), 1.0)
+        return self.start + (self.end - self.start) * self.easing(progress)
+
+    def advance(self, dt_ms):
+        self.elapsed += dt_ms
+        if self.elapsed >= 0 and self.on_update:
+            self.on_update(self.value)
+
+    def finish(self):
+        self.elapsed = self.duration_ms
+        if self.on_update:
+            self.on_update(self.value)
+
+
+class Timeline:
+    """Advances any number of tweens together on the frame clock."""
+
+    def __init__(self, scheduler=None):
+        self.scheduler = scheduler
+        self.tweens = []
+        self.speed = 1.0  # Playback rate, raised while fast-forwarding
+
+    @property
+    def busy(self):
+        return bool(self.tweens)
+
+    def add(self, tween):
+        if not self.tweens and self.scheduler:
+            # Run the frame loop at full rate while anything is animating
+            self.scheduler.start_animation()
+        self.tweens.append(tween)
+        tween.advance(0)
+        return tween
+
+    def update(self, dt_ms):
+        if not self.tweens:
+            return
+        for tween in list(self.tweens):
+            tween.advance(dt_ms * self.speed)
+        self.tweens = [tween for tween in self.tweens if not tween.done]
+        if not self.tweens and self.scheduler:
+            self.scheduler.stop_animation()
+
+    def finish_all(self):
+        """Skip to the end state of every running tween."""
+        if not self.tweens:
+            return
+        for tween in self.tweens:
+            tween.finish()
+        self.tweens = []
+        if self.scheduler:
+            self.scheduler.stop_animation()
@@ -0,0 +1,115 @@
+"""Fixed logical resolution, scaled to whatever window the game runs in.
+
+The game always draws on a logical surface of one size (WINDOW_SIZE), so
+every position, font size and board layout is the same on a netbook and a
+4K smartboard. present() scales that surface into the window once per frame,
+keeping the aspect ratio and letterboxing the rest. When the window is
+exactly the logical size the logical surface is the display surface itself
+and nothing is scaled or copied.
+
+Mouse positions have to be mapped back with to_logical(). FrameScheduler
+does that for every mouse button event, and calls set_window() again when
+the window is resized, for every screen's event loop.
+"""
+import math
+
+import pygame
+
+LETTERBOX_COLOR = (0, 0, 0)
+DIRTY_MARGIN = 2  # Logical pixels added around dirty rects so smoothing at their edges matches
+
+
+def fit_window_size(logical_size, desktop_size, fraction=0.9):
+    """The logical size, shrunk (keeping its shape) if it doesn't fit on the desktop."""
+    width, height = logical_size
+    desktop_width, desktop_height = desktop_size
+    if desktop_width <= 0 or desktop_height <= 0:
+        return logical_size
+    scale = min(1.0, desktop_width * fraction / width, desktop_height * fraction / height)
+    return round(width * scale), round(height * scale)
+
+
+class Viewport:
+    def __init__(self, logical_size, smooth=True):
+        self.logical_size = tuple(logical_size)
+        self.smooth = smooth  # smoothscale instead of nearest neighbour
+        self.window = None
+        self.surface = None  # What the game draws on, always logical_size
+        self.area = pygame.Rect((0, 0), self.logical_size)  # Where it lands in the window
+        self.scale = 1.0
+        self.changes = 0  # Bumped by set_window so presenters know to redraw everything
+
+    def set_window(self, window):
+        """Fit the logical surface into a new display surface; return the logical surface."""
+        previous, self.window = self.window, window
+        self.changes += 1
+        width, height = window.get_size()
+        logical_width, logical_height = self.logical_size
+        self.scale = min(width / logical_width, height / logical_height)
+        self.area = pygame.Rect(0, 0, max(1, round(logical_width * self.scale)),
+                                max(1, round(logical_height * self.scale)))
+        self.area.center = (width // 2, height // 2)
+
+        if window.get_size() == self.logical_size:
+            self.surface = window
+        else:
+            if self.surface is None or self.surface is previous:
+                self.surface = pygame.Surface(self.logical_size).convert()
+            window.fill(LETTERBOX_COLOR)
+        return self.surface
+
+    @property
+    def scaled(self):
+        return self.surface is not self.window
+
+    def to_logical(self, pos):
+        """Map a window position (such as a mouse click) to logical coordinates."""
+        if not self.scaled:
+            return pos
+        x, y = pos
+        return (math.floor((x - self.area.x) / self.scale),
+                math.floor((y - self.area.y) / self.scale))
+
+    def to_window(self, rect):
+        """The window pixels covering a logical rect."""
+        rect = pygame.Rect(rect)
+        left = self.area.x + math.floor(rect.left * self.scale)
+        top = self.area.y + math.floor(rect.top * self.scale)
+        right = self.area.x + math.ceil(rect.right * self.scale)
+        bottom = self.area.y + math.ceil(rect.bottom * self.scale)
+        return pygame.Rect(left, top, right - left, bottom - top).clip(self.area)
+
+    def present(self, rects=None):
+        """Show the logical surface: all of it, or only rects (logical coordinates)."""
+        if not self.scaled:
+            if rects is None:
+                pygame.display.flip()
+            elif rects:
+                pygame.display.update(rects)
+            return
+
+        if rects is None:
+            self._scale(self.surface, self.area)
+            pygame.display.flip()
+            return
+        bounds = self.surface.get_rect()
+        targets = []
+        for rect in rects:
+            region = pygame.Rect(rect).inflate(2 * DIRTY_MARGIN, 2 * DIRTY_MARGIN).clip(bounds)
+            target = self.to_window(region)
+            if region.w and region.h and target.w and target.h:
+                self._scale(self.surface.subsurface(region), target)
+                targets.append(target)
+        if targets:
+            pygame.display.update(targets)
+
+    def _scale(self, source, target):
+        destination = self.window.subsurface(target)
+        if self.smooth:
+            try:
+                pygame.transform.smoothscale(source, target.size, destination)
+                return
+            except ValueError:
+                # smoothscale only handles 24 and 32 bit surfaces
+                self.smooth = False
+        pygame.transform.scale(source, target.size, destination)